@@ -1,4 +1,5 @@
 from . import addfringe
+from . import catalog
 from . import computegrid
 from . import config
 from . import getobcs
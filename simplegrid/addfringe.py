@@ -21,19 +21,26 @@ def create_parser():
     parser.add_argument('--tilea', required=True, help="""
         (path and) file name of tile whose boundary grid information is to be
         computed using tile 'B' data (mitgridfile format)""")
-    parser.add_argument('--nia', type=int, required=True, help="""
-        number of tracer points in model grid 'x' direction for tile A""")
-    parser.add_argument('--nja', type=int, required=True, help="""
-        number of tracer points in model grid 'y' direction for tile A""")
+    parser.add_argument('--nia', type=int, help="""
+        number of tracer points in model grid 'x' direction for tile A (required
+        unless tilea has a sidecar)""")
+    parser.add_argument('--nja', type=int, help="""
+        number of tracer points in model grid 'y' direction for tile A (required
+        unless tilea has a sidecar)""")
     parser.add_argument('--tileb', required=True, help="""
         (path and) file name of tile whose data will be used to compute tile 'A'
         boundary grid information (mitgridfile format)""")
-    parser.add_argument('--nib', type=int, required=True, help="""
-        number of tracer points in model grid 'x' direction for tile B""")
-    parser.add_argument('--njb', type=int, required=True, help="""
-        number of tracer points in model grid 'y' direction for tile B""")
+    parser.add_argument('--nib', type=int, help="""
+        number of tracer points in model grid 'x' direction for tile B (required
+        unless tileb has a sidecar)""")
+    parser.add_argument('--njb', type=int, help="""
+        number of tracer points in model grid 'y' direction for tile B (required
+        unless tileb has a sidecar)""")
     parser.add_argument('--outfile', required=True, help="""
         file to which updated tile 'A' will be written (mitgridfile format)""")
+    parser.add_argument('--sidecar',action='store_true',help="""
+        also write an outfile sidecar (outfile.json) describing the grid, its
+        dimensions, checksums and extent""")
     parser.add_argument('-s','--strict',action='store_true', help="""
         raise error if nonzero terms found in any of the standard mitgrid matrix
         row/colum padding dimensions (e.g., last row and column of XG, YG,
@@ -58,16 +65,16 @@ def addfringe( strict=False, verbose=False, **kwargs):
     Kwargs:
         tilea (str, required): mitgrid (path and) filename of tile for which
             boundary data are to be computed.
-        nia (int, required): number of tracer points in the model grid 'x'
-            direction for tilea.
-        nja (int, required): number of tracer points in the model grid 'y'
-            direction for tilea.
+        nia (int, required unless tilea has a sidecar): number of
+            tracer points in the model grid 'x' direction for tilea.
+        nja (int, required unless tilea has a sidecar): number of
+            tracer points in the model grid 'y' direction for tilea.
         tileb (str, required): mitgrid (path and) filename of tile that will be
             used to compute boundary data for tilea.
-        nib (int, required): number of tracer points in the model grid 'x'
-            direction for tileb.
-        njb (int, requried): number of tracer points in the model grid 'y'
-            direction for tileb.
+        nib (int, required unless tileb has a sidecar): number of
+            tracer points in the model grid 'x' direction for tileb.
+        njb (int, required unless tileb has a sidecar): number of
+            tracer points in the model grid 'y' direction for tileb.
 
     Returns:
         (tilea_edge,tileb_edge,new_tilea_mitgrid): tuple of tilea and tileb
@@ -119,8 +126,8 @@ def addfringe( strict=False, verbose=False, **kwargs):
     jUB = jub + 1
     cg_rows = iUB + 1
     cg_cols = jUB + 1
-    compute_grid_xg = np.zeros((cg_rows,cg_cols))
-    compute_grid_yg = np.zeros((cg_rows,cg_cols))
+    compute_grid_xg = np.full((cg_rows,cg_cols),np.nan)
+    compute_grid_yg = np.full((cg_rows,cg_cols),np.nan)
     i_cg = lambda i_mitgrid : 1 + 2*i_mitgrid
     j_cg = lambda j_mitgrid : 1 + 2*j_mitgrid
     it = np.nditer(
@@ -148,20 +155,20 @@ def addfringe( strict=False, verbose=False, **kwargs):
         iLB, ilb, iub, iUB, jLB, jlb, jub, jUB,
         geod, verbose)
 
-    # compare tilea with new_tilea, replacing zeros in the former with updated
-    # values from the latter (actually performed somewhat in the reverse, so we
-    # can return new_tilea merged with tilea computed values):
+    # compare tilea with new_tilea, replacing undefined terms in the former with
+    # updated values from the latter (actually performed somewhat in the
+    # reverse, so we can return new_tilea merged with tilea computed values).
+    # tilea terms are undefined (NaN) if written as zeros and not computable
+    # from tilea data alone, so that legitimately zero-valued terms (e.g.,
+    # prime meridian or equator coordinates) are retained:
 
+    tilea_defined = computegrid.defined_terms(
+        compute_grid_xg.shape, ilb, iub, jlb, jub)
     for name in mgf.names:
-        it = np.nditer(
-            [tilea_mitgrid[name],new_tilea_mitgrid[name]],
-             flags=['multi_index'],
-             op_flags=['readwrite'])
-        while not it.finished:
-            if np.PZERO!=it[0]:
-                new_tilea_mitgrid[name][it.multi_index[0],it.multi_index[1]] = \
-                    tilea_mitgrid[name][it.multi_index[0],it.multi_index[1]]
-            it.iternext()
+        tilea_mitgrid[name][
+            ~tilea_defined[name] & (tilea_mitgrid[name]==np.PZERO)] = np.nan
+        np.copyto(new_tilea_mitgrid[name],tilea_mitgrid[name],
+            where=~np.isnan(tilea_mitgrid[name]))
 
     return (tilea_edge,tileb_edge,new_tilea_mitgrid)
 
@@ -187,11 +194,15 @@ def main():
         nib     = args.nib,
         njb     = args.njb)
 
+    # (tile A dimensions, whether given or from its sidecar):
+    (nia,nja) = tilea_with_new_boundary['XC'].shape
+
     if args.verbose:
         print('writing {0:s} with ni={1:d}, nj={2:d}...'.format(
-            args.outfile,args.nia,args.nja))
+            args.outfile,nia,nja))
 
-    gridio.write_mitgridfile(args.outfile,tilea_with_new_boundary,args.nia,args.nja)
+    gridio.write_mitgridfile(args.outfile,tilea_with_new_boundary,nia,nja,
+        sidecar=args.sidecar)
 
     if args.verbose:
         print('...done.')
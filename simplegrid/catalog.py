@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import numpy as np
+from . import gridio
+from . import mitgridfilefields
+from . import util
+# (computed by util, for use in gridio sidecars as well):
+from .util import tile_extent
+
+CATALOG_VERSION = 1
+
+
+def create_parser():
+    """Set up the list of arguments to be provided to catalog.
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+            Build a catalog of mitgrid tile extents for region and point
+            lookup.""",
+        epilog="""
+            Only the sidecar, or else the XG and YG matrices (by memory
+            mapping), of each tile are read, and only once, when the catalog is
+            built; subsequent point or region queries (ref.
+            catalog.find_point, catalog.find_box) read just the catalog
+            file.""")
+    parser.add_argument('--tile', nargs='+', action='append', required=True,
+        metavar='TILEFILE [NI NJ]', help="""
+        (path and) file name of a tile (mitgridfile format), followed by its
+        number of tracer points in model grid 'x' and 'y' directions unless
+        the tile has a sidecar (may be repeated, once per tile)""")
+    parser.add_argument('--outfile', required=True, help="""
+        file to which the catalog will be written (JSON format)""")
+    parser.add_argument('-v','--verbose',action='store_true',help="""
+        verbose output""")
+    return parser
+
+
+def build_catalog( tiles, verbose=False):
+    """Build a catalog of tile dimensions, corners and extents.
+
+    Args:
+        tiles: iterable of (filename,ni,nj) tuples, each consisting of a tile
+            mitgrid (path and) file name and its number of "east-west" and
+            "north-south" grid cells, or of just file names (or ni, nj of
+            None) for tiles with sidecars (ref. gridio.read_sidecar).
+        verbose (bool): True for diagnostic output, False otherwise.
+
+    Returns:
+        catalog (dict): dictionary with 'version' and 'tiles' keys, the latter
+            a list of dictionaries (one per tile, in input order) with
+            'filename', 'ni' and 'nj' keys, a 'corners' dictionary of 'XG' and
+            'YG' lists of tile corner coordinates (in [i,j]=[0,0], [ni,0],
+            [ni,nj], [0,nj] order), and 'cap' and 'box' extent dictionaries
+            (ref. gridio.corner_extent).
+
+    Raises:
+        ValueError: If ni, nj are neither provided nor available from a
+            sidecar, or do not match a tile's sidecar.
+
+    Note:
+        Tile data are not read at all if extents are available from the
+        tile's sidecar.
+
+    """
+    (k_xg,k_yg) = (
+        mitgridfilefields.names.index('XG'),
+        mitgridfilefields.names.index('YG'))
+    entries = []
+    for tile in tiles:
+        (filename,ni,nj) = (tile,None,None) if isinstance(tile,str) else tile
+        sidecar = gridio.read_sidecar(filename)
+        if sidecar is not None:
+            if (ni,nj)==(None,None):
+                (ni,nj) = (sidecar['ni'],sidecar['nj'])
+            elif (ni,nj)!=(sidecar['ni'],sidecar['nj']):
+                raise ValueError(
+                    'ni, nj ({0},{1}) do not match {2:s} sidecar.'.format(
+                        ni,nj,filename))
+        if verbose:
+            print('cataloging {0:s} with ni={1}, nj={2}...'.format(
+                filename,ni,nj))
+        if sidecar is not None and sidecar['cap'] is not None:
+            extent = {name:sidecar[name] for name in ('corners','cap','box')}
+        else:
+            mitgrid = gridio.memmap_mitgridfile(filename,ni,nj)
+            XG = np.array(mitgrid[:,:,k_xg],dtype=np.float64)
+            YG = np.array(mitgrid[:,:,k_yg],dtype=np.float64)
+            del mitgrid
+            extent = gridio.corner_extent(XG,YG)
+        entry = {'filename': filename, 'ni': ni, 'nj': nj}
+        entry.update(extent)
+        entries.append(entry)
+    return {'version': CATALOG_VERSION, 'tiles': entries}
+
+
+def write_catalogfile( filename, catalog):
+    """Write a tile catalog (ref. build_catalog) to a JSON file.
+
+    Args:
+        filename (str): catalog (path and) file name.
+        catalog (dict): tile catalog.
+
+    """
+    with open(filename,'w') as fd:
+        json.dump(catalog,fd,indent=1)
+
+
+def read_catalogfile( filename):
+    """Read a tile catalog written by write_catalogfile.
+
+    Args:
+        filename (str): catalog (path and) file name.
+
+    Returns:
+        catalog (dict): tile catalog (ref. build_catalog).
+
+    Raises:
+        ValueError: If the catalog file version is not supported.
+
+    """
+    with open(filename) as fd:
+        catalog = json.load(fd)
+    if catalog.get('version')!=CATALOG_VERSION:
+        raise ValueError('unsupported catalog version: {0}'.format(
+            catalog.get('version')))
+    return catalog
+
+
+def _lon_overlap( lon_min1, lon_max1, lon_min2, lon_max2):
+    """Determine whether two (eastward) longitude intervals overlap."""
+    return (np.mod(lon_min2-lon_min1,360.) <= lon_max1-lon_min1 or
+        np.mod(lon_min1-lon_min2,360.) <= lon_max2-lon_min2)
+
+
+def find_point( catalog, lon, lat):
+    """Find the catalog tiles that may contain a given point.
+
+    Args:
+        catalog (dict): tile catalog (ref. build_catalog, read_catalogfile).
+        lon (float): point longitude (decimal degrees).
+        lat (float): point latitude (decimal degrees).
+
+    Returns:
+        List of catalog tile dictionaries whose bounding cap and box both
+        contain the point. Since extents are conservative, the list includes
+        every tile that contains the point, but may include near misses as
+        well (ref. util.CellLocator for exact cell location).
+
+    """
+    p = util.lonlat2cart(np.array([[lon]]),np.array([[lat]]))
+    candidates = []
+    for tile in catalog['tiles']:
+        (cap,box) = (tile['cap'],tile['box'])
+        if box is None:
+            # (no defined corner points):
+            continue
+        if not box['lat_min'] <= lat <= box['lat_max']:
+            continue
+        if not _lon_overlap(box['lon_min'],box['lon_max'],lon,lon):
+            continue
+        center = util.lonlat2cart(
+            np.array([[cap['lon']]]),np.array([[cap['lat']]]))
+        if np.degrees(util.cart_dist(p,center)[0,0]) > cap['radius']:
+            continue
+        candidates.append(tile)
+    return candidates
+
+
+def find_box( catalog, lon1, lat1, lon2, lat2):
+    """Find the catalog tiles that may intersect a longitude/latitude box.
+
+    Args:
+        catalog (dict): tile catalog (ref. build_catalog, read_catalogfile).
+        lon1 (float): longitude of box northwest corner point.
+        lat1 (float): latitude of box northwest corner point.
+        lon2 (float): longitude of box southeast corner point.
+        lat2 (float): latitude of box southeast corner point.
+
+    Returns:
+        List of catalog tile dictionaries whose bounding box intersects the
+        given one. As with find_point, near misses may be included.
+
+    Note:
+        The box spans lon1 eastward to lon2, and so may cross the
+        antimeridian (e.g., lon1=170., lon2=-170.). Boxes with lon2-lon1 of
+        360 or more span all longitudes.
+
+    """
+    (lat_min,lat_max) = (min(lat1,lat2),max(lat1,lat2))
+    lon_width = lon2-lon1 if lon2-lon1>=360. else np.mod(lon2-lon1,360.)
+    candidates = []
+    for tile in catalog['tiles']:
+        box = tile['box']
+        if box is None:
+            continue
+        if box['lat_max'] < lat_min or box['lat_min'] > lat_max:
+            continue
+        if not _lon_overlap(
+            box['lon_min'],box['lon_max'],lon1,lon1+lon_width):
+            continue
+        candidates.append(tile)
+    return candidates
+
+
+def main():
+    """Command-line entry point."""
+
+    parser = create_parser()
+    args = parser.parse_args()
+    tiles = []
+    for tile in args.tile:
+        if len(tile)==1:
+            tiles.append(tile[0])
+        elif len(tile)==3:
+            tiles.append((tile[0],int(tile[1]),int(tile[2])))
+        else:
+            parser.error('--tile requires TILEFILE, or TILEFILE NI NJ')
+    catalog = build_catalog(tiles,args.verbose)
+    if args.verbose:
+        print('writing {0:s} with {1:d} tiles...'.format(
+            args.outfile,len(catalog['tiles'])))
+    write_catalogfile(args.outfile,catalog)
+    if args.verbose:
+        print('...done.')
+
+if __name__ == '__main__':
+    main()
+
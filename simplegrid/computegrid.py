@@ -1,12 +1,88 @@
 
+import concurrent.futures
+from multiprocessing import shared_memory
 import numpy as np
 import pyproj
 from . import config
+from . import gridio
 from . import util
 from . import mitgridfilefields
 
+
+class ComputeGrid:
+    """
+    Preallocated compute grid workspace.
+
+    Owns the compute grid point, cartesian coordinate, edge length and sub-area
+    buffers used by fill(), edges(), areas() and tomitgrid() so that, e.g., a
+    batch of regrids producing compute grids of the same shape reuses, rather
+    than reallocates, them.
+
+    Args:
+        shape (tuple of ints, optional): compute grid (rows, cols) dimensions;
+            if None, buffers are allocated by the first call to reset().
+        dtype (numpy dtype, optional): floating point type of all buffers
+            (default=numpy.float64; e.g., numpy.float32 for reduced precision,
+            reduced memory traffic, preview grids).
+
+    Attributes:
+        xg, yg (numpy arrays): compute grid longitudes, latitudes.
+        cart (numpy array): unit sphere cartesian coordinates of the xg, yg
+            points (ref. util.lonlat2cart).
+        edges_x, edges_y (numpy arrays): x- and y-direction edge lengths (ref.
+            edges()).
+        areas (numpy array): sub-areas (ref. areas()), one less than xg in
+            each direction.
+        dtype (numpy dtype): buffer floating point type.
+
+    """
+
+    __slots__ = ('xg','yg','cart','edges_x','edges_y','areas','dtype')
+
+    def __init__( self, shape=None, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.xg = self.yg = self.cart = None
+        self.edges_x = self.edges_y = self.areas = None
+        if shape is not None:
+            self.reset(shape)
+
+    @property
+    def shape( self):
+        """Compute grid (rows, cols) dimensions, or None if unallocated."""
+        return None if self.xg is None else self.xg.shape
+
+    def reset( self, shape):
+        """
+        Prepare the workspace for a new compute grid.
+
+        Args:
+            shape (tuple of ints): compute grid (rows, cols) dimensions.
+
+        Returns:
+            self, with all buffers set to NaN (i.e., undefined), and
+            reallocated only if shape differs from that of the current ones.
+
+        """
+        shape = tuple(shape)
+        if shape!=self.shape:
+            (rows,cols) = shape
+            self.xg         = np.full((rows  ,cols  ),np.nan,self.dtype)
+            self.yg         = np.full((rows  ,cols  ),np.nan,self.dtype)
+            self.cart       = np.full((rows  ,cols  ,3),np.nan,self.dtype)
+            self.edges_x    = np.full((rows-1,cols  ),np.nan,self.dtype)
+            self.edges_y    = np.full((rows  ,cols-1),np.nan,self.dtype)
+            self.areas      = np.full((rows-1,cols-1),np.nan,self.dtype)
+        else:
+            for buffer in (self.xg, self.yg, self.cart,
+                self.edges_x, self.edges_y, self.areas):
+                buffer[...] = np.nan
+        return self
+
+
+@util.staged('areas')
 def areas( compute_grid_xg, compute_grid_yg,
-    compute_grid_edges_x, compute_grid_edges_y, geod, verbose=False):
+    compute_grid_edges_x, compute_grid_edges_y, geod, verbose=False, out=None,
+    compute_grid_cart=None, planar=None, workers=1, dtype=None):
     """
     Compute sub-areas for the compute grid.
 
@@ -22,26 +98,61 @@ def areas( compute_grid_xg, compute_grid_yg,
         geod (pyproj.Geod): current geoid instance (only the semi-major, or
             equatorial axis radius, geod.a is used here).
         verbose (logical): verbose output
+        out (numpy array, optional): array, dimensioned one less than
+            compute_grid_xg in each direction, into which sub-areas are
+            written (e.g., the inner range of a preallocated, full-sized
+            compute grid areas array).
+        compute_grid_cart (numpy array, optional): unit sphere cartesian
+            coordinates of the compute_grid_xg, compute_grid_yg points (ref.
+            util.lonlat2cart), used in place of repeated lon/lat
+            trigonometry if provided.
+        planar (logical, optional): True for the planar, False for the
+            spherical, area formulation; if None (default), determined from
+            compute_grid_edges_x, compute_grid_edges_y (see planar_areas()).
+        workers (int): number of worker processes; if greater than one,
+            sub-areas are computed in row bands (see _run_banded()).
+        dtype (numpy dtype, optional): floating point type of the cartesian
+            coordinates from which, and of the array in which, sub-areas are
+            computed (default: that of compute_grid_xg).
 
     Returns:
-        compute_areas: numpy array of sub-areas for the compute grid.
+        compute_areas: numpy array of sub-areas for the compute grid (out, if
+            provided).
 
     """
 
-    x_edge_mean = compute_grid_edges_x[compute_grid_edges_x.nonzero()].mean()
-    y_edge_mean = compute_grid_edges_y[compute_grid_edges_y.nonzero()].mean()
-
-    if  x_edge_mean<config.PLANAR_SPHER_TRANSITION and \
-        y_edge_mean<config.PLANAR_SPHER_TRANSITION:
+    if planar is None:
+        planar = planar_areas(compute_grid_edges_x,compute_grid_edges_y)
+
+    if dtype is None:
+        dtype = compute_grid_xg.dtype
+    if out is None:
+        out = np.full(
+            (compute_grid_xg.shape[0]-1,compute_grid_xg.shape[1]-1),np.nan,
+            dtype)
+    if compute_grid_cart is not None:
+        compute_grid_cart = compute_grid_cart.astype(dtype,copy=False)
+
+    if workers>1:
+        compute_areas = _areas_parallel(
+            compute_grid_xg, compute_grid_yg, geod, planar, workers, out,
+            compute_grid_cart)
+        if verbose:
+            print('compute_areas nonzero subset:')
+            print(compute_areas)
+        return compute_areas
+
+    if compute_grid_cart is None:
+        compute_grid_cart = util.lonlat2cart(
+            compute_grid_xg,compute_grid_yg).astype(dtype,copy=False)
+
+    if planar:
         # areas are nearly planar; use flat faceted surface approximation:
-        compute_areas = util.pquad_uarea(
-            util.lonlat2cart(compute_grid_xg,compute_grid_yg)) \
-            * np.power(geod.a,2)
+        compute_areas = util.pquad_uarea(compute_grid_cart,out)
     else:
         # areas are surface triangles; use spherical excess formulation:
-        compute_areas = util.squad_uarea(
-            util.lonlat2cart(compute_grid_xg,compute_grid_yg)) \
-            * np.power(geod.a,2)
+        compute_areas = util.squad_uarea(compute_grid_cart,out)
+    compute_areas *= np.power(geod.a,2)
 
     if verbose:
         print('compute_areas nonzero subset:')
@@ -50,8 +161,32 @@ def areas( compute_grid_xg, compute_grid_yg,
     return compute_areas
 
 
+def planar_areas( compute_grid_edges_x, compute_grid_edges_y):
+    """
+    Determine whether compute grid sub-areas can be considered planar.
+
+    Args:
+        compute_grid_edges_x, compute_grid_edges_y (numpy arrays): Arrays of
+            grid edge lengths (as computed by edges()).
+
+    Returns:
+        True if the means of the defined (i.e., non-NaN) x- and y-edge lengths
+        are both less than config.PLANAR_SPHER_TRANSITION, False otherwise.
+
+    """
+
+    x_edge_mean = compute_grid_edges_x[~np.isnan(compute_grid_edges_x)].mean()
+    y_edge_mean = compute_grid_edges_y[~np.isnan(compute_grid_edges_y)].mean()
+
+    return bool(
+        x_edge_mean<config.PLANAR_SPHER_TRANSITION and
+        y_edge_mean<config.PLANAR_SPHER_TRANSITION)
+
+
+@util.staged('edges')
 def edges( compute_grid_xg, compute_grid_yg,
-    ilb, iub, jlb, jub, geod, verbose=False):
+    ilb, iub, jlb, jub, geod, verbose=False, compute_grid_cart=None,
+    workers=1, out=None, dtype=None):
     """
     Use great circle arcs to compute distances between all compute_grid points
 
@@ -62,48 +197,95 @@ def edges( compute_grid_xg, compute_grid_yg,
             with (x,y) values filled in according to cgfill().
         ilb, iub, jlb, jub (ints): row (i) and column (j) lower and upper index
             bounds that define compute_grid_xg and compute_grid_yg range for
-            edge calculations (provides means of avoiding reference to zero
-            boundary values during length calculations).
+            edge calculations (provides means of avoiding reference to
+            undefined boundary values during length calculations).
         geod (pyproj.Geod): current geoid instance (only the semi-major, or
             equatorial axis radius, geod.a is used here).
         verbose (logical): verbose output
+        compute_grid_cart (numpy array, optional): unit sphere cartesian
+            coordinates of the compute_grid_xg, compute_grid_yg points (ref.
+            util.lonlat2cart), used in place of lon/lat
+            trigonometry for spherical geoids if provided.
+        workers (int): number of worker processes; if greater than one, edge
+            lengths are computed in row bands (see _run_banded()).
+        out (tuple of numpy arrays, optional): (compute_edges_x,
+            compute_edges_y) arrays, of the dimensions given below, that are
+            reset to NaN and then written to in place of newly-allocated ones
+            (e.g., ComputeGrid edges_x, edges_y buffers).
+        dtype (numpy dtype, optional): floating point type of newly-allocated
+            edge length arrays, and of the cartesian coordinates from which
+            spherical edge lengths are computed (default: that of
+            compute_grid_xg).
 
     Returns:
         (compute_edges_x, compute_edges_y) tuple of numpy arrays of grid edge lengths.
         compute_edges_x(i,j) contains the edge length from compute_grid_x /
         compute_grid_y (i,j) to (i+1,j) and compute_edges_y(i,j) contains the
-        edge length from compute_grid_x / compute_grid_y (i,j) to (i,j+1)
+        edge length from compute_grid_x / compute_grid_y (i,j) to (i,j+1).
+        Edges outside of the ilb, iub, jlb, jub range are undefined (NaN).
 
     """
 
     # initialization can be based on either *_xg or *_yg since they're the same
     # shape:
     (cg_rows,cg_cols) = compute_grid_xg.shape
-    compute_edges_x = np.zeros((cg_rows-1,cg_cols  ))
-    compute_edges_y = np.zeros((cg_rows  ,cg_cols-1))
+    if dtype is None:
+        dtype = compute_grid_xg.dtype
+    if out is None:
+        compute_edges_x = np.full((cg_rows-1,cg_cols  ),np.nan,dtype)
+        compute_edges_y = np.full((cg_rows  ,cg_cols-1),np.nan,dtype)
+    else:
+        (compute_edges_x,compute_edges_y) = out
+        compute_edges_x[...] = np.nan
+        compute_edges_y[...] = np.nan
+    if compute_grid_cart is not None:
+        compute_grid_cart = compute_grid_cart.astype(dtype,copy=False)
+
+    if workers>1:
+        (compute_edges_x,compute_edges_y) = _edges_parallel(
+            compute_grid_xg, compute_grid_yg, compute_edges_x, compute_edges_y,
+            ilb, iub, jlb, jub, geod, workers, compute_grid_cart)
+        if verbose:
+            print('compute_edges_x:')
+            print( compute_edges_x)
+            print('compute_edges_y:')
+            print( compute_edges_y)
+        return (compute_edges_x,compute_edges_y)
 
     # since matrix slice operations are from start:(stop-1):stride, define a
     # lambda function to make it clear when the stop point should be inclusive,
     # i.e., start:incl(stop):stride
     incl = lambda idx : idx+1
 
-    # x-direction edge lengths:
-    for i in range(ilb,iub):
-        for j in range(jlb,incl(jub)):
-            lon1 = compute_grid_xg[i  ,j]
-            lat1 = compute_grid_yg[i  ,j]
-            lon2 = compute_grid_xg[i+1,j]
-            lat2 = compute_grid_yg[i+1,j]
-            _,_,compute_edges_x[i,j] = geod.inv( lon1,lat1,lon2,lat2)
-
-    # y-direction edge lengths:
-    for i in range(ilb,incl(iub)):
-        for j in range(jlb,jub):
-            lon1 = compute_grid_xg[i,j  ]
-            lat1 = compute_grid_yg[i,j  ]
-            lon2 = compute_grid_xg[i,j+1]
-            lat2 = compute_grid_yg[i,j+1]
-            _,_,compute_edges_y[i,j] = geod.inv( lon1,lat1,lon2,lat2)
+    # distance calculations on whole arrays of start (idx1) and end (idx2)
+    # points, either closed-form (spherical geoid) or with a single, batched
+    # geod.inv call:
+    if util.spherical(geod) and compute_grid_cart is not None:
+        edge_dist = lambda idx1,idx2 : util.cart_dist(
+            compute_grid_cart[idx1], compute_grid_cart[idx2], geod.a)
+    elif util.spherical(geod):
+        edge_dist = lambda idx1,idx2 : util.sphere_dist(
+            compute_grid_xg[idx1], compute_grid_yg[idx1],
+            compute_grid_xg[idx2], compute_grid_yg[idx2], geod.a)
+    else:
+        def edge_dist( idx1, idx2):
+            util.count_geod_call('inv',compute_grid_xg[idx1].size)
+            return geod.inv(
+                np.ascontiguousarray(compute_grid_xg[idx1]),
+                np.ascontiguousarray(compute_grid_yg[idx1]),
+                np.ascontiguousarray(compute_grid_xg[idx2]),
+                np.ascontiguousarray(compute_grid_yg[idx2]))[2]
+
+    # x-direction edge lengths, (i,j) to (i+1,j), over the full i range of
+    # every j column:
+    compute_edges_x[ilb:iub,jlb:incl(jub)] = edge_dist(
+        np.s_[ilb  :iub      ,jlb:incl(jub)],
+        np.s_[ilb+1:incl(iub),jlb:incl(jub)])
+
+    # y-direction edge lengths, (i,j) to (i,j+1), likewise:
+    compute_edges_y[ilb:incl(iub),jlb:jub] = edge_dist(
+        np.s_[ilb:incl(iub),jlb  :jub      ],
+        np.s_[ilb:incl(iub),jlb+1:incl(jub)])
 
     if verbose:
         print('compute_edges_x:')
@@ -114,8 +296,10 @@ def edges( compute_grid_xg, compute_grid_yg,
     return (compute_edges_x,compute_edges_y)
 
 
+@util.staged('fill')
 def fill( compute_grid_xg, compute_grid_yg, ilb, iub, jlb, jub,
-    lon_subscale, lat_subscale, geod, verbose=False):
+    lon_subscale, lat_subscale, geod, verbose=False, batched=False,
+    compute_grid_cart=None, workers=1, inplace=False, dtype=None):
     """
     Use great circle subdivisions to fill in compute grid intermediate points
     according to x/y subdivision levels and index ranges.
@@ -134,16 +318,44 @@ def fill( compute_grid_xg, compute_grid_yg, ilb, iub, jlb, jub,
         lat_subscale (int): user-specified y-direction cell subdivision level.
         geod (pyproj.Geod): current geoid instance.
         verbose (logical): verbose output
+        batched (logical): if True, compute all x-edge, then all y-edge,
+            subdivisions using whole-array geod.inv/geod.fwd calls (see
+            subdivide()) rather than one geod.npts call per coarse edge.
+            Results agree with the default to within round-off. Always True
+            if util.spherical(geod).
+        compute_grid_cart (numpy array, optional): unit sphere cartesian
+            coordinates of the compute_grid_xg, compute_grid_yg points (ref.
+            util.lonlat2cart), updated in place with those of the filled-in
+            points. For spherical geoids, subdivisions are then computed
+            directly from, and stored in, this array (util.slerp()), and only
+            converted to lon/lat once.
+        workers (int): number of worker processes; if greater than one, the
+            batched fill-in is computed in bands of coarse cell rows (see
+            _run_banded()), with results identical to workers=1,
+            batched=True.
+        inplace (logical): if True, fill in compute_grid_xg, compute_grid_yg
+            directly rather than copies of them (e.g., ComputeGrid xg, yg
+            buffers).
+        dtype (numpy dtype, optional): floating point type of the copies of
+            compute_grid_xg, compute_grid_yg that are filled in (default:
+            that of compute_grid_xg); not used if inplace=True, in which case
+            results are stored as per the input arrays' own type.
 
     Returns:
         (compute_grid_xg_out, compute_grid_yg_out) tuple of input arrays with
-        intermediate points filled in.
+        intermediate points filled in (compute_grid_xg, compute_grid_yg
+        themselves if inplace=True).
 
     """
 
-    # explicit output quantities to avoid function "side effects":
-    compute_grid_xg_out = np.copy(compute_grid_xg)
-    compute_grid_yg_out = np.copy(compute_grid_yg)
+    # unless otherwise requested, explicit output quantities to avoid function
+    # "side effects":
+    if inplace:
+        compute_grid_xg_out = compute_grid_xg
+        compute_grid_yg_out = compute_grid_yg
+    else:
+        compute_grid_xg_out = np.array(compute_grid_xg,dtype=dtype)
+        compute_grid_yg_out = np.array(compute_grid_yg,dtype=dtype)
 
     # since matrix slice operations are from start:(stop-1):stride, define a
     # lambda function to make it clear when the stop point should be inclusive,
@@ -159,6 +371,18 @@ def fill( compute_grid_xg, compute_grid_yg, ilb, iub, jlb, jub,
     else:
         lon0to360 = True
 
+    if workers>1:
+        return _fill_parallel(
+            compute_grid_xg_out, compute_grid_yg_out, ilb, iub, jlb, jub,
+            lon_subscale, lat_subscale, geod, lon0to360, workers, verbose,
+            compute_grid_cart)
+
+    if batched or util.spherical(geod):
+        return _fill_batched(
+            compute_grid_xg_out, compute_grid_yg_out, ilb, iub, jlb, jub,
+            lon_subscale, lat_subscale, geod, lon0to360, verbose,
+            compute_grid_cart)
+
     #
     # Step 1: x-edge fill-in according to user-specified subdivision level:
     #
@@ -190,6 +414,7 @@ def fill( compute_grid_xg, compute_grid_yg, ilb, iub, jlb, jub,
         lat2 = compute_grid_yg_out[
             i_cg(it.multi_index[0]+1,ilb,lon_subscale),
             j_cg(it.multi_index[1]  ,jlb,lat_subscale)]
+        util.count_geod_call('npts',lon_subscale*2-1)
         x_edge_subdivided_lonlats = np.array( geod.npts(
             lon1,lat1,lon2,lat2,
             lon_subscale*2-1))  # n intermediate points
@@ -247,6 +472,7 @@ def fill( compute_grid_xg, compute_grid_yg, ilb, iub, jlb, jub,
         lat2 = compute_grid_yg_out[
             i_cg(it.multi_index[0],ilb),
             j_cg(it.multi_index[1]+1,jlb,lat_subscale)]
+        util.count_geod_call('npts',lat_subscale*2-1)
         y_edge_subdivided_lonlats = np.array( geod.npts(
             lon1,lat1,lon2,lat2,
             lat_subscale*2-1))  # n intermediate points
@@ -274,12 +500,370 @@ def fill( compute_grid_xg, compute_grid_yg, ilb, iub, jlb, jub,
         print('compute_grid_yg:')
         print(compute_grid_yg_out)
 
+    if compute_grid_cart is not None:
+        compute_grid_cart[...] = util.lonlat2cart(
+            compute_grid_xg_out,compute_grid_yg_out)
+
+    return compute_grid_xg_out, compute_grid_yg_out
+
+
+def subdivide( lon1, lat1, lon2, lat2, npts, geod):
+    """
+    Compute equally-spaced great circle intermediate points for arrays of
+    segment endpoints.
+
+    Args:
+        lon1, lat1, lon2, lat2 (numpy arrays): segment start and end point
+            longitudes and latitudes (all of the same shape).
+        npts (int): number of intermediate points per segment.
+        geod (pyproj.Geod): current geoid instance.
+
+    Returns:
+        (lons, lats) tuple of numpy arrays of shape lon1.shape+(npts,)
+        containing, along the last axis, the same intermediate points that
+        geod.npts would return for each segment (to within round-off).
+
+    Note:
+        If util.spherical(geod), intermediate points are computed by spherical
+        linear interpolation (util.sphere_npts()) rather than by pyproj.
+
+    """
+
+    if util.spherical(geod):
+        return util.sphere_npts(lon1,lat1,lon2,lat2,npts)
+
+    shape = np.shape(lon1)
+    util.count_geod_call('inv',np.size(lon1))
+    az12,_,dist = geod.inv(
+        np.ravel(lon1), np.ravel(lat1), np.ravel(lon2), np.ravel(lat2))
+
+    # positions along each segment at fractions k/(npts+1), k=1..npts:
+    frac = np.arange(1,npts+1) / (npts+1)
+    util.count_geod_call('fwd',np.size(lon1)*npts)
+    lons,lats,_ = geod.fwd(
+        np.repeat(np.ravel(lon1),npts),
+        np.repeat(np.ravel(lat1),npts),
+        np.repeat(az12,npts),
+        np.outer(dist,frac).ravel())
+
+    return (
+        np.reshape(lons,shape+(npts,)),
+        np.reshape(lats,shape+(npts,)))
+
+
+def _fill_batched( compute_grid_xg_out, compute_grid_yg_out, ilb, iub, jlb, jub,
+    lon_subscale, lat_subscale, geod, lon0to360, verbose=False,
+    compute_grid_cart=None):
+    """Whole-array equivalent of the fill() edge-by-edge subdivision steps,
+    operating in place on the (already copied) compute grid arrays.
+    """
+
+    # Step 1: x-edge fill-in, all coarse x-edges at once:
+
+    _fill_x_edges( compute_grid_xg_out, compute_grid_yg_out,
+        ilb, iub, jlb, jub, lon_subscale, lat_subscale, geod, lon0to360,
+        compute_grid_cart)
+
+    if verbose:
+        print('compute_grid after x-edge subdivision:')
+        print('compute_grid_xg:')
+        print(compute_grid_xg_out)
+        print('compute_grid_yg:')
+        print(compute_grid_yg_out)
+
+    # Step 2: y-direction fill-in for every x-direction subdivision:
+
+    _fill_y_edges( compute_grid_xg_out, compute_grid_yg_out,
+        ilb, iub, jlb, jub, lon_subscale, lat_subscale, geod, lon0to360,
+        compute_grid_cart)
+
+    if verbose:
+        print('compute_grid after y_direction subdivision fill-in:')
+        print('compute_grid_xg:')
+        print(compute_grid_xg_out)
+        print('compute_grid_yg:')
+        print(compute_grid_yg_out)
+
+    return compute_grid_xg_out, compute_grid_yg_out
+
+
+def _subdivide_edges( compute_grid_xg_out, compute_grid_yg_out,
+    start, end, npts, fill_idx, geod, lon0to360, compute_grid_cart=None):
+    """Subdivide all edges from compute grid start to end points (index
+    tuples), storing the k'th intermediate points at fill_idx(k), k=1..npts.
+    """
+
+    if compute_grid_cart is not None and util.spherical(geod):
+        pts = util.slerp(
+            compute_grid_cart[start], compute_grid_cart[end], npts)
+        lons,lats = util.cart2lonlat(
+            pts, compute_grid_xg_out[start][...,np.newaxis])
+    else:
+        lons,lats = subdivide(
+            compute_grid_xg_out[start], compute_grid_yg_out[start],
+            compute_grid_xg_out[end],   compute_grid_yg_out[end],
+            npts, geod)
+        if compute_grid_cart is not None:
+            pts = util.lonlat2cart(
+                np.reshape(lons,(lons.shape[0],-1)),
+                np.reshape(lats,(lats.shape[0],-1))).reshape(
+                lons.shape+(3,))
+    if lon0to360:
+        lons[lons<0.] += 360.
+    for k in range(1,npts+1):
+        compute_grid_xg_out[fill_idx(k)] = lons[...,k-1]
+        compute_grid_yg_out[fill_idx(k)] = lats[...,k-1]
+        if compute_grid_cart is not None:
+            compute_grid_cart[fill_idx(k)] = pts[...,k-1,:]
+
+
+def _fill_x_edges( compute_grid_xg_out, compute_grid_yg_out,
+    ilb, iub, jlb, jub, lon_subscale, lat_subscale, geod, lon0to360,
+    compute_grid_cart=None):
+    """fill() step 1: subdivide all coarse x-edges (columns jlb to jub,
+    inclusive, in steps of 2*lat_subscale).
+    """
+    incl = lambda idx : idx+1
+    cg_stride_i = 2*lon_subscale
+    cg_cols = np.s_[jlb:incl(jub):2*lat_subscale]
+    _subdivide_edges( compute_grid_xg_out, compute_grid_yg_out,
+        (np.s_[ilb            :iub      :cg_stride_i], cg_cols),
+        (np.s_[ilb+cg_stride_i:incl(iub):cg_stride_i], cg_cols),
+        cg_stride_i-1,
+        lambda k : (np.s_[ilb+k:iub:cg_stride_i], cg_cols),
+        geod, lon0to360, compute_grid_cart)
+
+
+def _fill_y_edges( compute_grid_xg_out, compute_grid_yg_out,
+    ilb, iub, jlb, jub, lon_subscale, lat_subscale, geod, lon0to360,
+    compute_grid_cart=None):
+    """fill() step 2: subdivide all y-edges of rows ilb to iub, inclusive.
+    """
+    incl = lambda idx : idx+1
+    cg_stride_j = 2*lat_subscale
+    cg_rows = np.s_[ilb:incl(iub)]
+    _subdivide_edges( compute_grid_xg_out, compute_grid_yg_out,
+        (cg_rows, np.s_[jlb            :jub      :cg_stride_j]),
+        (cg_rows, np.s_[jlb+cg_stride_j:incl(jub):cg_stride_j]),
+        cg_stride_j-1,
+        lambda k : (cg_rows, np.s_[jlb+k:jub:cg_stride_j]),
+        geod, lon0to360, compute_grid_cart)
+
+
+def _row_bands( ilb, iub, stride, workers):
+    """Split compute grid rows ilb to iub (inclusive) into at most workers
+    (i0,i1) bands, each starting and ending a multiple of stride rows from ilb,
+    and each band's last row being the next band's first (one-row overlap).
+    """
+    nsteps = (iub-ilb)//stride
+    if nsteps<1:
+        return [(ilb,iub)]
+    splits = np.linspace(0,nsteps,min(workers,nsteps)+1).round().astype(int)
+    return [(ilb+stride*int(a),ilb+stride*int(b))
+        for (a,b) in zip(splits[:-1],splits[1:])]
+
+
+def _run_banded( worker, inputs, outputs, bands, workers, *args):
+    """Run worker over row bands in a pool of worker processes.
+
+    inputs and outputs (numpy arrays, or None) are copied into shared memory
+    blocks, worker(arrays,i0,i1,last,*args) is called for each (i0,i1) band in
+    bands (last=True for the final band), with arrays the concatenated inputs
+    and outputs, and outputs are then copied back in place. Since adjacent
+    bands overlap by one row, workers must only write rows i0 to i1-1 (i0 to i1
+    for the last band) of any output. Results are identical to those obtained
+    by calling worker on a single, all-encompassing band. If collecting stats
+    (util.collect_stats()), worker process geodesic call counts are added to
+    those of the calling process.
+
+    """
+
+    arrays = list(inputs)+list(outputs)
+    blocks = [None if array is None else
+        shared_memory.SharedMemory(create=True,size=max(array.nbytes,1))
+        for array in arrays]
+    try:
+        specs = []
+        for (array,block) in zip(arrays,blocks):
+            if array is None:
+                specs.append(None)
+                continue
+            np.ndarray(array.shape,array.dtype,buffer=block.buf)[...] = array
+            specs.append((block.name,array.shape,array.dtype.str))
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(workers,len(bands))) as pool:
+            futures = [
+                pool.submit(_band_task,worker,specs,i0,i1,n==len(bands)-1,args)
+                for (n,(i0,i1)) in enumerate(bands)]
+            for future in futures:
+                band_stats = future.result()
+                if util.active_stats() is not None:
+                    util.active_stats().merge(band_stats)
+
+        for (array,block) in list(zip(arrays,blocks))[len(inputs):]:
+            if array is not None:
+                array[...] = np.ndarray(
+                    array.shape,array.dtype,buffer=block.buf)
+    finally:
+        for block in blocks:
+            if block is not None:
+                block.close()
+                block.unlink()
+
+
+def _band_task( worker, specs, i0, i1, last, args):
+    """_run_banded() worker process entry point: attach to the shared memory
+    blocks described by specs, and run worker on band (i0,i1), returning the
+    resulting util.Stats.
+    """
+    blocks = [None if spec is None else
+        shared_memory.SharedMemory(name=spec[0]) for spec in specs]
+    arrays = [None if spec is None else
+        np.ndarray(spec[1],spec[2],buffer=block.buf)
+        for (spec,block) in zip(specs,blocks)]
+    with util.collect_stats(util.Stats()) as stats:
+        worker(arrays,i0,i1,last,*args)
+    del arrays
+    for block in blocks:
+        if block is not None:
+            block.close()
+    return stats
+
+
+def _fill_parallel( compute_grid_xg_out, compute_grid_yg_out, ilb, iub, jlb, jub,
+    lon_subscale, lat_subscale, geod, lon0to360, workers, verbose=False,
+    compute_grid_cart=None):
+    """Banded equivalent of _fill_batched(), with bands of whole coarse cell
+    rows, each subdivided independently (see _fill_band()).
+    """
+
+    _run_banded( _fill_band, (),
+        (compute_grid_xg_out, compute_grid_yg_out, compute_grid_cart),
+        _row_bands(ilb,iub,2*lon_subscale,workers), workers,
+        jlb, jub, lon_subscale, lat_subscale, geod, lon0to360)
+
+    if verbose:
+        print('compute_grid after x-edge and y-direction subdivision fill-in:')
+        print('compute_grid_xg:')
+        print(compute_grid_xg_out)
+        print('compute_grid_yg:')
+        print(compute_grid_yg_out)
+
     return compute_grid_xg_out, compute_grid_yg_out
 
 
+def _fill_band( arrays, i0, i1, last,
+    jlb, jub, lon_subscale, lat_subscale, geod, lon0to360):
+    """_run_banded() worker: batched fill-in of compute grid rows i0 to i1,
+    which bound whole coarse cell rows.
+
+    Edges are subdivided in place, in the shared compute grid arrays, i.e.,
+    with the same array layout as _fill_batched(). Row i1 is the next band's
+    first, and so its y-edges are left to that band (but for the last band).
+    """
+    (compute_grid_xg, compute_grid_yg, compute_grid_cart) = arrays
+    _fill_x_edges( compute_grid_xg, compute_grid_yg,
+        i0, i1, jlb, jub, lon_subscale, lat_subscale, geod, lon0to360,
+        compute_grid_cart)
+    _fill_y_edges( compute_grid_xg, compute_grid_yg,
+        i0, i1 if last else i1-1, jlb, jub, lon_subscale, lat_subscale, geod,
+        lon0to360, compute_grid_cart)
+
+
+def _edges_parallel( compute_grid_xg, compute_grid_yg,
+    compute_edges_x, compute_edges_y, ilb, iub, jlb, jub, geod, workers,
+    compute_grid_cart=None):
+    """Banded equivalent of edges(), writing into the (NaN-initialized)
+    compute_edges_x, compute_edges_y arrays.
+    """
+    _run_banded( _edges_band,
+        (compute_grid_xg, compute_grid_yg, compute_grid_cart),
+        (compute_edges_x, compute_edges_y),
+        _row_bands(ilb,iub,1,workers), workers,
+        jlb, jub, geod)
+    return (compute_edges_x,compute_edges_y)
+
+
+def _edges_band( arrays, i0, i1, last, jlb, jub, geod):
+    """_run_banded() worker: edge lengths for compute grid rows i0 to i1.
+    """
+    (compute_grid_xg, compute_grid_yg, compute_grid_cart,
+        compute_edges_x, compute_edges_y) = arrays
+    band = np.s_[i0:i1+1]
+    (band_edges_x,band_edges_y) = edges(
+        compute_grid_xg[band], compute_grid_yg[band], 0, i1-i0, jlb, jub, geod,
+        compute_grid_cart=None if compute_grid_cart is None else
+            compute_grid_cart[band])
+
+    # y-edges along row i1 are left to the next band:
+    i_end = i1+1 if last else i1
+    compute_edges_x[i0:i1]    = band_edges_x
+    compute_edges_y[i0:i_end] = band_edges_y[:i_end-i0]
+
+
+def _areas_parallel( compute_grid_xg, compute_grid_yg, geod, planar, workers,
+    out=None, compute_grid_cart=None):
+    """Banded equivalent of areas(), for a given planar/spherical choice.
+    """
+    if out is None:
+        out = np.full(
+            (compute_grid_xg.shape[0]-1,compute_grid_xg.shape[1]-1),np.nan)
+    _run_banded( _areas_band,
+        (compute_grid_xg, compute_grid_yg, compute_grid_cart), (out,),
+        _row_bands(0,compute_grid_xg.shape[0]-1,1,workers), workers,
+        geod, planar)
+    return out
+
+
+def _areas_band( arrays, i0, i1, last, geod, planar):
+    """_run_banded() worker: sub-areas of the cells between compute grid rows
+    i0 and i1.
+    """
+    (compute_grid_xg, compute_grid_yg, compute_grid_cart, compute_areas) = \
+        arrays
+    band = np.s_[i0:i1+1]
+    areas( compute_grid_xg[band], compute_grid_yg[band], None, None, geod,
+        out=compute_areas[i0:i1],
+        compute_grid_cart=None if compute_grid_cart is None else
+            compute_grid_cart[band],
+        planar=planar)
+
+
+# compute grid (i,j) offsets of the terms that are summed to produce a single
+# mitgrid edge length or area value (see _strided_sum()):
+_x_edge_pair    = ((0,0),(1,0))
+_y_edge_pair    = ((0,0),(0,1))
+_subcell_quad   = ((0,0),(1,0),(1,1),(0,1))
+
+
+def _strided_sum( compute_grid_values, i0, j0, shape, offsets, order='C'):
+    """Sum compute grid edge lengths or sub-areas into mitgrid quantities.
+
+    For every (i,j) in shape, sums compute_grid_values[i0+2*i+di,j0+2*j+dj]
+    over all (di,dj) in offsets (in the order given). Since undefined (NaN)
+    terms propagate through the sum, the result is np.PZERO (the mitgrid file
+    convention) wherever any of the terms is undefined, e.g., adjacent to the
+    boundary ring. Terms are accumulated in, and the result is, a new float64
+    array (regardless of compute grid precision) in the given memory order
+    ('C' or 'F').
+
+    """
+    terms = [compute_grid_values[i0+di::2,j0+dj::2][:shape[0],:shape[1]]
+        for (di,dj) in offsets]
+    total = np.array(terms[0],dtype=np.float64)
+    for term in terms[1:]:
+        total += term
+    result = np.zeros(shape,order=order)
+    np.copyto(result,total,where=~np.isnan(total))
+    return result
+
+
+@util.staged('tomitgrid')
 def tomitgrid(compute_grid_xg,compute_grid_yg,
     iLB,ilb,iub,iUB,jLB,jlb,jub,jUB,
-    geod,verbose=False):
+    geod,verbose=False,compute_grid_cart=None,workers=1,workspace=None,
+    compact=True,dtype=None,planar=None):
     """Generates an mit grid from a compute grid.
 
     Args:
@@ -301,6 +885,28 @@ def tomitgrid(compute_grid_xg,compute_grid_yg,
             compute_grid_yg.
         geod (pyproj.Geod): current geoid instance.
         verbose (logical): verbose output.
+        compute_grid_cart (numpy array, optional): unit sphere cartesian
+            coordinates of the compute_grid_xg, compute_grid_yg points (e.g.,
+            as maintained by fill()), shared by edge and area calculations.
+        workers (int): number of worker processes for edge and area
+            calculations (see edges(), areas()).
+        workspace (ComputeGrid, optional): workspace whose edge and area
+            buffers are used for intermediate results. Since the workspace
+            (and, typically, compute_grid_xg, compute_grid_yg) may be reused,
+            XC, YC, XG and YG are then always returned as copies rather than
+            compute grid views.
+        compact (logical): if True (default), all mitgrid matrices are
+            returned as contiguous, Fortran-ordered arrays (i.e., mitgrid file
+            order) that do not reference compute_grid_xg, compute_grid_yg, so
+            that the latter may be freed. If False, XC, YC, XG and YG are
+            strided compute grid views.
+        dtype (numpy dtype, optional): floating point type of intermediate
+            edge lengths and sub-areas (default: that of compute_grid_xg, or
+            of workspace buffers, if provided). Edge length and area sums, and
+            XC, YC, XG and YG copies, are always float64.
+        planar (logical, optional): True for the planar, False for the
+            spherical, area formulation; if None (default), determined from
+            the compute grid edge lengths (see areas()).
 
     Returns:
         mitgrid (dict): name/value (numpy 2-d array) pairs
@@ -309,13 +915,6 @@ def tomitgrid(compute_grid_xg,compute_grid_yg,
 
     """
 
-    outgrid = {key:None for key in mitgridfilefields.names}
-
-    # deduce overall lon/lat subdivisions (equal to tracer cell counts) from
-    # input compute_grid ranges:
-    lon_subdiv = (iub-ilb)//2   # integer division in python 3x
-    lat_subdiv = (jub-jlb)//2   # "                           "
-
     # since matrix slice operations are from start:(stop-1):stride, define a
     # lambda function to make it clear when the stop point should be inclusive,
     # i.e., start:incl(stop):stride
@@ -323,15 +922,58 @@ def tomitgrid(compute_grid_xg,compute_grid_yg,
 
     # compute x- and y-direction compute_grid edge lengths:
     (compute_grid_edges_x,compute_grid_edges_y) = edges(
-        compute_grid_xg,compute_grid_yg,ilb,iub,jlb,jub,geod,verbose)
+        compute_grid_xg,compute_grid_yg,ilb,iub,jlb,jub,geod,verbose,
+        compute_grid_cart=compute_grid_cart,workers=workers,
+        out=None if workspace is None else
+            (workspace.edges_x,workspace.edges_y),
+        dtype=dtype)
 
     # compute subgrid areas:
-    compute_grid_areas = np.zeros((iUB-iLB,jUB-jLB))
-    compute_grid_areas[ilb:iub,jlb:jub] = areas(
+    if workspace is None:
+        compute_grid_areas = np.full((iUB-iLB,jUB-jLB),np.nan,
+            compute_grid_xg.dtype if dtype is None else dtype)
+    else:
+        compute_grid_areas = workspace.areas[:iUB-iLB,:jUB-jLB]
+        compute_grid_areas[...] = np.nan
+    areas(
         compute_grid_xg[ilb:incl(iub),jlb:incl(jub)],
         compute_grid_yg[ilb:incl(iub),jlb:incl(jub)],
         compute_grid_edges_x,compute_grid_edges_y,
-        geod,verbose)
+        geod,verbose,out=compute_grid_areas[ilb:iub,jlb:jub],
+        compute_grid_cart=None if compute_grid_cart is None else
+            compute_grid_cart[ilb:incl(iub),jlb:incl(jub)],
+        planar=planar,workers=workers,dtype=compute_grid_areas.dtype)
+
+    # memory order of all outgrid matrices:
+    order = 'F' if compact else 'C'
+
+    return _assemble_mitgrid(
+        compute_grid_xg,compute_grid_yg,
+        compute_grid_edges_x,compute_grid_edges_y,compute_grid_areas,
+        ilb,iub,jlb,jub,order,compact or workspace is not None,verbose)
+
+
+@util.staged('assemble')
+def _assemble_mitgrid( compute_grid_xg, compute_grid_yg,
+    compute_grid_edges_x, compute_grid_edges_y, compute_grid_areas,
+    ilb, iub, jlb, jub, order, copy, verbose=False):
+    """Assemble mitgrid matrices from compute grid points, edge lengths and
+    sub-areas (tomitgrid() second stage), as arrays of the given memory order.
+    XC, YC, XG and YG are compute grid views unless copy is True, in which
+    case they are float64 copies.
+    """
+
+    outgrid = {key:None for key in mitgridfilefields.names}
+
+    # deduce overall lon/lat subdivisions (equal to tracer cell counts) from
+    # input compute_grid ranges:
+    lon_subdiv = (iub-ilb)//2   # integer division in python 3x
+    lat_subdiv = (jub-jlb)//2   # "                           "
+
+    # since matrix slice operations are from start:(stop-1):stride, define a
+    # lambda function to make it clear when the stop point should be inclusive,
+    # i.e., start:incl(stop):stride
+    incl = lambda idx: idx+1
 
     # grid (tracer) cell location data:
     #   XC, YC - tracer cell center longitudes and latitudes
@@ -373,6 +1015,10 @@ def tomitgrid(compute_grid_xg,compute_grid_yg,
     outgrid['YG'] = compute_grid_yg[
         cg_first_i:cg_last_i:cg_stride_i,
         cg_first_j:cg_last_j:cg_stride_j]
+    if copy:
+        for name in ('XC','YC','XG','YG'):
+            outgrid[name] = np.array(
+                outgrid[name],dtype=np.float64,order=order)
     if verbose:
         print("outgrid['XG']:")
         print(outgrid['XG'])
@@ -386,49 +1032,27 @@ def tomitgrid(compute_grid_xg,compute_grid_yg,
 
     # DXG tracer cell southern edge from edge summations:
 
-    outgrid['DXG'] = np.zeros((lon_subdiv,lat_subdiv+1))
-    for i in range(0,lon_subdiv):
-        for j in range(0,incl(lat_subdiv)):
-            if not any(np.PZERO==np.array((
-                compute_grid_edges_x[ ilb + 2*i    , jlb + 2*j],
-                compute_grid_edges_x[ ilb + 2*i + 1, jlb + 2*j]))):
-                outgrid['DXG'][i,j] = \
-                    compute_grid_edges_x[ ilb + 2*i    , jlb + 2*j] + \
-                    compute_grid_edges_x[ ilb + 2*i + 1, jlb + 2*j]
+    outgrid['DXG'] = _strided_sum( compute_grid_edges_x,
+        ilb, jlb, (lon_subdiv,incl(lat_subdiv)), _x_edge_pair,
+        order)
     if verbose:
         print("outgrid['DXG']:")
         print(outgrid['DXG'])
 
     # DYG tracer cell western edge from edge summations:
 
-    outgrid['DYG'] = np.zeros((lon_subdiv+1,lat_subdiv))
-    for i in range(0,incl(lon_subdiv)):
-        for j in range(0,lat_subdiv):
-            if not any(np.PZERO==np.array((
-                compute_grid_edges_y[ ilb + 2*i, jlb + 2*j    ],
-                compute_grid_edges_y[ ilb + 2*i, jlb + 2*j + 1]))):
-                outgrid['DYG'][i,j] = \
-                    compute_grid_edges_y[ ilb + 2*i, jlb + 2*j    ] + \
-                    compute_grid_edges_y[ ilb + 2*i, jlb + 2*j + 1]
+    outgrid['DYG'] = _strided_sum( compute_grid_edges_y,
+        ilb, jlb, (incl(lon_subdiv),lat_subdiv), _y_edge_pair,
+        order)
     if verbose:
         print("outgrid['DYG']:")
         print(outgrid['DYG'])
 
     # RAC from subcell area sums:
 
-    outgrid['RAC'] = np.zeros((lon_subdiv,lat_subdiv))
-    for i in range(0,lon_subdiv):
-        for j in range(0,lat_subdiv):
-            if not any(np.PZERO==np.array((
-                compute_grid_areas[ilb + 2*i    , jlb + 2*j    ],
-                compute_grid_areas[ilb + 2*i + 1, jlb + 2*j    ],
-                compute_grid_areas[ilb + 2*i + 1, jlb + 2*j + 1],
-                compute_grid_areas[ilb + 2*i    , jlb + 2*j + 1]))):
-                outgrid['RAC'][i,j] = \
-                    compute_grid_areas[ilb + 2*i    , jlb + 2*j    ] + \
-                    compute_grid_areas[ilb + 2*i + 1, jlb + 2*j    ] + \
-                    compute_grid_areas[ilb + 2*i + 1, jlb + 2*j + 1] + \
-                    compute_grid_areas[ilb + 2*i    , jlb + 2*j + 1]
+    outgrid['RAC'] = _strided_sum( compute_grid_areas,
+        ilb, jlb, (lon_subdiv,lat_subdiv), _subcell_quad,
+        order)
     if verbose:
         print("outgrid['RAC']:")
         print(outgrid['RAC'])
@@ -440,49 +1064,27 @@ def tomitgrid(compute_grid_xg,compute_grid_yg,
 
     # DXC vorticity cell edge lengths from x-direction edge summations:
 
-    outgrid['DXC'] = np.zeros((lon_subdiv+1,lat_subdiv))
-    for i in range(0,incl(lon_subdiv)):
-        for j in range(0,lat_subdiv):
-            if not any(np.PZERO==np.array((
-                compute_grid_edges_x[ 2*i    , jlb + 2*j + 1],
-                compute_grid_edges_x[ 2*i + 1, jlb + 2*j + 1]))):
-                outgrid['DXC'][i,j] = \
-                    compute_grid_edges_x[ 2*i    , jlb + 2*j + 1] + \
-                    compute_grid_edges_x[ 2*i + 1, jlb + 2*j + 1]
+    outgrid['DXC'] = _strided_sum( compute_grid_edges_x,
+        0, jlb+1, (incl(lon_subdiv),lat_subdiv), _x_edge_pair,
+        order)
     if verbose:
         print("outgrid['DXC']:")
         print(outgrid['DXC'])
 
     # DYC vorticity cell edge lengths from y-direction edge summations:
 
-    outgrid['DYC'] = np.zeros((lon_subdiv,lat_subdiv+1))
-    for i in range(0,lon_subdiv):
-        for j in range(0,incl(lat_subdiv)):
-            if not any(np.PZERO==np.array((
-                compute_grid_edges_y[ ilb + 2*i + 1, 2*j    ],
-                compute_grid_edges_y[ ilb + 2*i + 1, 2*j + 1]))):
-                outgrid['DYC'][i,j] = \
-                    compute_grid_edges_y[ ilb + 2*i + 1, 2*j    ] + \
-                    compute_grid_edges_y[ ilb + 2*i + 1, 2*j + 1]
+    outgrid['DYC'] = _strided_sum( compute_grid_edges_y,
+        ilb+1, 0, (lon_subdiv,incl(lat_subdiv)), _y_edge_pair,
+        order)
     if verbose:
         print("outgrid['DYC']:")
         print(outgrid['DYC'])
 
     # RAZ vorticity cell areas computed from subcell area sums:
 
-    outgrid['RAZ'] = np.zeros((lon_subdiv+1,lat_subdiv+1))
-    for i in range(0,incl(lon_subdiv)):
-        for j in range(0,incl(lat_subdiv)):
-            if not any(np.PZERO==np.array((
-                compute_grid_areas[2*i    , 2*j    ],
-                compute_grid_areas[2*i + 1, 2*j    ],
-                compute_grid_areas[2*i + 1, 2*j + 1],
-                compute_grid_areas[2*i    , 2*j + 1]))):
-                outgrid['RAZ'][i,j] = \
-                    compute_grid_areas[2*i    , 2*j    ] + \
-                    compute_grid_areas[2*i + 1, 2*j    ] + \
-                    compute_grid_areas[2*i + 1, 2*j + 1] + \
-                    compute_grid_areas[2*i    , 2*j + 1]
+    outgrid['RAZ'] = _strided_sum( compute_grid_areas,
+        0, 0, (incl(lon_subdiv),incl(lat_subdiv)), _subcell_quad,
+        order)
     if verbose:
         print("outgrid['RAZ']:")
         print(outgrid['RAZ'])
@@ -494,49 +1096,27 @@ def tomitgrid(compute_grid_xg,compute_grid_yg,
 
     # DXV U cell edge lengths from x-direction edge summations:
 
-    outgrid['DXV'] = np.zeros((lon_subdiv+1,lat_subdiv+1))
-    for i in range(0,incl(lon_subdiv)):
-        for j in range(0,incl(lat_subdiv)):
-            if not any(np.PZERO==np.array((
-                compute_grid_edges_x[ 2*i    , jlb + 2*j],
-                compute_grid_edges_x[ 2*i + 1, jlb + 2*j]))):
-                outgrid['DXV'][i,j] = \
-                    compute_grid_edges_x[ 2*i    , jlb + 2*j] + \
-                    compute_grid_edges_x[ 2*i + 1, jlb + 2*j]
+    outgrid['DXV'] = _strided_sum( compute_grid_edges_x,
+        0, jlb, (incl(lon_subdiv),incl(lat_subdiv)), _x_edge_pair,
+        order)
     if verbose:
         print("outgrid['DXV']:")
         print(outgrid['DXV'])
 
     # DYF U cell edge lengths from y-direction edge summations:
 
-    outgrid['DYF'] = np.zeros((lon_subdiv,lat_subdiv))
-    for i in range(0,lon_subdiv):
-        for j in range(0,lat_subdiv):
-            if not any(np.PZERO==np.array((
-                compute_grid_edges_y[ ilb + 2*i + 1, jlb + 2*j    ],
-                compute_grid_edges_y[ ilb + 2*i + 1, jlb + 2*j + 1]))):
-                outgrid['DYF'][i,j] = \
-                    compute_grid_edges_y[ ilb + 2*i + 1, jlb + 2*j    ] + \
-                    compute_grid_edges_y[ ilb + 2*i + 1, jlb + 2*j + 1]
+    outgrid['DYF'] = _strided_sum( compute_grid_edges_y,
+        ilb+1, jlb, (lon_subdiv,lat_subdiv), _y_edge_pair,
+        order)
     if verbose:
         print("outgrid['DYF']:")
         print(outgrid['DYF'])
 
     # RAW U cell areas from subcell area sums:
 
-    outgrid['RAW'] = np.zeros((lon_subdiv+1,lat_subdiv))
-    for i in range(0,incl(lon_subdiv)):
-        for j in range(0,lat_subdiv):
-            if not any(np.PZERO==np.array((
-                compute_grid_areas[2*i    , jlb + 2*j    ],
-                compute_grid_areas[2*i + 1, jlb + 2*j    ],
-                compute_grid_areas[2*i + 1, jlb + 2*j + 1],
-                compute_grid_areas[2*i    , jlb + 2*j + 1]))):
-                outgrid['RAW'][i,j] = \
-                    compute_grid_areas[2*i    , jlb + 2*j    ] + \
-                    compute_grid_areas[2*i + 1, jlb + 2*j    ] + \
-                    compute_grid_areas[2*i + 1, jlb + 2*j + 1] + \
-                    compute_grid_areas[2*i    , jlb + 2*j + 1]
+    outgrid['RAW'] = _strided_sum( compute_grid_areas,
+        0, jlb, (incl(lon_subdiv),lat_subdiv), _subcell_quad,
+        order)
     if verbose:
         print("outgrid['RAW']:")
         print(outgrid['RAW'])
@@ -548,52 +1128,211 @@ def tomitgrid(compute_grid_xg,compute_grid_yg,
 
     # DXF V cell edge lengths from x-direction edge summations:
 
-    outgrid['DXF'] = np.zeros((lon_subdiv,lat_subdiv))
-    for i in range(0,lon_subdiv):
-        for j in range(0,lat_subdiv):
-            if not any(np.PZERO==np.array((
-                compute_grid_edges_x[ ilb + 2*i    , jlb + 2*j + 1],
-                compute_grid_edges_x[ ilb + 2*i + 1, jlb + 2*j + 1]))):
-                outgrid['DXF'][i,j] = \
-                    compute_grid_edges_x[ ilb + 2*i    , jlb + 2*j + 1] + \
-                    compute_grid_edges_x[ ilb + 2*i + 1, jlb + 2*j + 1]
+    outgrid['DXF'] = _strided_sum( compute_grid_edges_x,
+        ilb, jlb+1, (lon_subdiv,lat_subdiv), _x_edge_pair,
+        order)
     if verbose:
         print("outgrid['DXF']:")
         print(outgrid['DXF'])
 
     # DYU V cell western edge lengths from y-direction edge summations:
 
-    outgrid['DYU'] = np.zeros((lon_subdiv+1,lat_subdiv+1))
-    for i in range(0,incl(lon_subdiv)):
-        for j in range(0,incl(lat_subdiv)):
-            if not any(np.PZERO==np.array((
-                compute_grid_edges_y[ ilb + 2*i, 2*j    ],
-                compute_grid_edges_y[ ilb + 2*i, 2*j + 1]))):
-                outgrid['DYU'][i,j] = \
-                    compute_grid_edges_y[ ilb + 2*i, 2*j    ] + \
-                    compute_grid_edges_y[ ilb + 2*i, 2*j + 1]
+    outgrid['DYU'] = _strided_sum( compute_grid_edges_y,
+        ilb, 0, (incl(lon_subdiv),incl(lat_subdiv)), _y_edge_pair,
+        order)
     if verbose:
         print("outgrid['DYU']:")
         print(outgrid['DYU'])
 
     # RAS V cell areas from subcell area sums:
 
-    outgrid['RAS'] = np.zeros((lon_subdiv,lat_subdiv+1))
-    for i in range(0,lon_subdiv):
-        for j in range(0,incl(lat_subdiv)):
-            if not any(np.PZERO==np.array((
-                compute_grid_areas[ilb + 2*i    , 2*j    ],
-                compute_grid_areas[ilb + 2*i + 1, 2*j    ],
-                compute_grid_areas[ilb + 2*i + 1, 2*j + 1],
-                compute_grid_areas[ilb + 2*i    , 2*j + 1]))):
-                outgrid['RAS'][i,j] = \
-                    compute_grid_areas[ilb + 2*i    , 2*j    ] + \
-                    compute_grid_areas[ilb + 2*i + 1, 2*j    ] + \
-                    compute_grid_areas[ilb + 2*i + 1, 2*j + 1] + \
-                    compute_grid_areas[ilb + 2*i    , 2*j + 1]
+    outgrid['RAS'] = _strided_sum( compute_grid_areas,
+        ilb, 0, (lon_subdiv,incl(lat_subdiv)), _subcell_quad,
+        order)
     if verbose:
         print("outgrid['RAS']:")
         print(outgrid['RAS'])
 
     return outgrid
 
+
+def defined_terms( shape, ilb, iub, jlb, jub):
+    """
+    Determine which mitgrid terms tomitgrid() defines, given the range of
+    defined (filled-in) compute grid points.
+
+    Args:
+        shape (tuple of ints): compute grid (rows, cols) dimensions.
+        ilb, iub, jlb, jub (ints): compute grid indices that define the range
+            of defined points, as per tomitgrid(); all others (e.g., the
+            boundary ring) are undefined.
+
+    Returns:
+        defined (dict): name/value (boolean numpy 2-d array) pairs
+            corresponding to the matrices returned by tomitgrid(), True for
+            terms computed from defined points only, and False for those left
+            undefined (np.PZERO), e.g., along tile edges for which no
+            neighboring tile data are available.
+
+    """
+
+    # edge lengths and sub-areas are defined wherever all of their end or
+    # corner points are (ref. edges(), areas()), so that sums of ones in place
+    # of compute grid values are nonzero for exactly the defined terms:
+    points = np.full(shape,np.nan)
+    points[ilb:iub+1,jlb:jub+1] = 1.
+    edges_x = points[:-1,:] + points[1:,:]
+    edges_y = points[:,:-1] + points[:,1:]
+    sub_areas = edges_x[:,:-1] + edges_x[:,1:]
+    mitgrid = _assemble_mitgrid( points, points, edges_x, edges_y, sub_areas,
+        ilb, iub, jlb, jub, 'C', False)
+    return {name:value!=np.PZERO for (name,value) in mitgrid.items()}
+
+
+def stream_mitgrid( XG, YG, lon_subscale, lat_subscale, geod, emit,
+    band_rows=1, planar=None, verbose=False):
+    """
+    Band-by-band equivalent of compute grid construction, fill() and
+    tomitgrid(), for which memory use is bounded by band, rather than grid,
+    size.
+
+    Args:
+        XG, YG (numpy arrays): corner point longitudes and latitudes of the
+            grid to be subdivided, mapped to the compute grid as in regrid()
+            and mkgrid().
+        lon_subscale (int): x-direction cell subdivision level.
+        lat_subscale (int): y-direction cell subdivision level.
+        geod (pyproj.Geod): current geoid instance.
+        emit (callable): function called as emit(i0,mitgrid) for successive
+            bands of finished rows, where mitgrid is a dictionary of matrices
+            (as per tomitgrid()) containing rows i0 and up of the corresponding
+            whole-grid matrices.
+        band_rows (int): number of tracer cell rows per band.
+        planar (logical, optional): True for the planar, False for the
+            spherical, area formulation (see areas()); if None (default),
+            determined as in tomitgrid(), but from mean edge lengths estimated
+            from the coarse grid column subdivisions (x-edges along, and
+            y-edges evenly dividing the great circle arcs between, coarse grid
+            columns) rather than from those of every band.
+        verbose (logical): verbose output.
+
+    Returns:
+        (ni,nj) tuple of subdivided grid tracer cell counts.
+
+    Note:
+        Bands are filled in from XG, YG x-edge subdivisions precomputed along
+        the coarse grid columns only, so that results are identical to those
+        of fill() and tomitgrid() on the whole compute grid, given the same
+        planar argument. With planar=None, the planar/spherical choices may
+        differ for grids whose mean edge lengths are close to
+        config.PLANAR_SPHER_TRANSITION, since estimated mean y-edge lengths
+        are exact, but mean x-edge lengths may differ by a few percent for
+        large coarse grid cells.
+
+    """
+
+    # compute grid bounds, as in regrid() and mkgrid():
+    (ni,nj) = ((XG.shape[0]-1)*lon_subscale,(XG.shape[1]-1)*lat_subscale)
+    (ilb,iub,iUB) = (1,1+2*ni,2+2*ni)
+    (jlb,jub,jUB) = (1,1+2*nj,2+2*nj)
+
+    lon0to360 = not np.any(XG<0.)
+
+    # fill() step 1, x-edge subdivision, for the coarse grid columns only:
+    stride = 2*lon_subscale
+    coarse_xg = np.full((iUB+1,XG.shape[1]),np.nan)
+    coarse_yg = np.full((iUB+1,XG.shape[1]),np.nan)
+    coarse_xg[ilb:iub+1:stride,:] = XG
+    coarse_yg[ilb:iub+1:stride,:] = YG
+    coarse_cart = util.lonlat2cart(coarse_xg,coarse_yg)
+    with util.stage('fill'):
+        _subdivide_edges( coarse_xg, coarse_yg,
+            np.s_[ilb:iub:stride], np.s_[ilb+stride:iub+1:stride], stride-1,
+            lambda k : np.s_[ilb+k:iub:stride], geod, lon0to360, coarse_cart)
+
+    bands = [(i0,min(i0+band_rows,ni)) for i0 in range(0,ni,band_rows)]
+
+    if planar is None:
+        # (coarse grid column y-edges span 2*lat_subscale compute grid
+        # y-edges each):
+        (coarse_edges_x,coarse_edges_y) = edges( coarse_xg, coarse_yg,
+            ilb, iub, 0, XG.shape[1]-1, geod, compute_grid_cart=coarse_cart)
+        planar = planar_areas(coarse_edges_x,coarse_edges_y/(2*lat_subscale))
+
+    for (i0,i1) in bands:
+        if verbose:
+            print('generating rows {0} to {1} of {2}...'.format(i0,i1-1,ni))
+        (xg,yg,cart,edges_x,edges_y,fl,fu) = _stream_band( i0, i1,
+            coarse_xg, coarse_yg, coarse_cart, ilb, iub, jlb, jub, jUB,
+            lon_subscale, lat_subscale, geod, lon0to360)
+        band_areas = np.full((xg.shape[0]-1,jUB),np.nan)
+        areas( xg[fl:fu+1,jlb:jub+1], yg[fl:fu+1,jlb:jub+1], edges_x, edges_y,
+            geod, out=band_areas[fl:fu,jlb:jub],
+            compute_grid_cart=cart[fl:fu+1,jlb:jub+1], planar=planar)
+        band_mitgrid = _assemble_mitgrid( xg, yg, edges_x, edges_y, band_areas,
+            1, 1+2*(i1-i0), jlb, jub, 'F', True)
+        if i1<ni:
+            # trailing rows belong to the next band:
+            for name in band_mitgrid:
+                band_mitgrid[name] = band_mitgrid[name][:i1-i0]
+        emit(i0,band_mitgrid)
+
+    return ni, nj
+
+
+def stream_mitgridfile( filename, XG, YG, lon_subscale, lat_subscale, geod,
+    band_rows=1, planar=None, verbose=False):
+    """
+    Generate a mitgrid file band by band (see stream_mitgrid()), writing each
+    band of rows directly to its place in the file.
+
+    Args:
+        filename (str): (path and) file name of the mitgrid file to be
+            written.
+        XG, YG, lon_subscale, lat_subscale, geod, band_rows, planar, verbose:
+            see stream_mitgrid().
+
+    Returns:
+        (ni,nj) tuple of subdivided grid tracer cell counts.
+
+    """
+    (ni,nj) = ((XG.shape[0]-1)*lon_subscale,(XG.shape[1]-1)*lat_subscale)
+    mitgrid_memmap = gridio.memmap_mitgridfile(filename,ni,nj,mode='w+')
+    stream_mitgrid( XG, YG, lon_subscale, lat_subscale, geod,
+        lambda i0,band_mitgrid :
+            gridio.write_mitgridfile_rows(mitgrid_memmap,i0,band_mitgrid),
+        band_rows, planar, verbose)
+    mitgrid_memmap.flush()
+    return ni, nj
+
+
+def _stream_band( i0, i1, coarse_xg, coarse_yg, coarse_cart,
+    ilb, iub, jlb, jub, jUB, lon_subscale, lat_subscale, geod, lon0to360):
+    """stream_mitgrid() band (tracer rows i0 to i1-1) compute grid, edge
+    lengths, and local fill/edge row range.
+
+    The band spans compute grid rows 2*i0 to 2*i1+2, i.e., the points of a
+    complete compute grid for i1-i0 tracer rows, with real, rather than ring,
+    values in place of the first and last rows wherever these exist.
+
+    """
+    lo = 2*i0
+    rows = 2*(i1-i0)+3
+    coarse_cols = np.s_[jlb:jub+1:2*lat_subscale]
+    xg = np.full((rows,jUB+1),np.nan)
+    yg = np.full((rows,jUB+1),np.nan)
+    cart = np.full((rows,jUB+1,3),np.nan)
+    xg[:,coarse_cols] = coarse_xg[lo:lo+rows]
+    yg[:,coarse_cols] = coarse_yg[lo:lo+rows]
+    cart[:,coarse_cols] = coarse_cart[lo:lo+rows]
+
+    # fill() step 2, and edge lengths, for the non-ring band rows:
+    fl = max(ilb,lo)-lo
+    fu = min(iub,lo+rows-1)-lo
+    with util.stage('fill'):
+        _fill_y_edges( xg, yg, fl, fu, jlb, jub, lon_subscale, lat_subscale,
+            geod, lon0to360, cart)
+    (edges_x,edges_y) = edges( xg, yg, fl, fu, jlb, jub, geod,
+        compute_grid_cart=cart)
+
+    return xg, yg, cart, edges_x, edges_y, fl, fu
@@ -19,3 +19,28 @@ surfaces is assumed and, if greater, a spherical surface formulation is used.
 Used in computegrid.areas().
 """
 
+SPHERICAL_BACKEND = True
+"""If True, and the geoid in use is a sphere (pyproj.Geod.sphere), great circle
+distances and subdivisions are computed using closed-form spherical formulae on
+whole arrays rather than pyproj's general geodesic solver. Results are
+analytically the same; set to False to route all calculations through pyproj
+(e.g., for validation purposes). Used in computegrid.edges(),
+computegrid.subdivide() and util.nearest().
+"""
+
+NEAREST_CHUNK_SIZE = 2**22
+"""Maximum number of elements of the search origin to grid point distance
+matrices computed at once in exhaustive (i.e., unindexed) nearest neighbour
+searches for many points. Used in util.nearest_many().
+"""
+
+MITGRID_WRITE_CHUNK_SIZE = 2**20
+"""Maximum number of (padded) matrix terms formatted and written at once when
+writing mitgrid files, i.e., the size of the write buffer, in doubles. Used in
+gridio.write_mitgridfile().
+"""
+
+LOCATE_CHUNK_SIZE = 2**16
+"""Maximum number of (point, candidate cell) pairs tested at once when locating
+the cells containing many points. Used in util.CellLocator.locate().
+"""
@@ -25,16 +25,20 @@ def create_parser():
             package.""")
     parser.add_argument('--parent_mitgridfile', required=True, help="""
         mitgrid (path and) file name of global simulation grid data""")
-    parser.add_argument('--ni_parent', type=int, required=True, help="""
-        number of tracer points in the parent model grid 'x' direction""")
-    parser.add_argument('--nj_parent', type=int, required=True, help="""
-        number of tracer points in the parent model grid 'y' direction""")
+    parser.add_argument('--ni_parent', type=int, help="""
+        number of tracer points in the parent model grid 'x' direction
+        (required unless parent_mitgridfile has a sidecar)""")
+    parser.add_argument('--nj_parent', type=int, help="""
+        number of tracer points in the parent model grid 'y' direction
+        (required unless parent_mitgridfile has a sidecar)""")
     parser.add_argument('--regional_mitgridfile', required=True, help="""
         mitgrid (path and) filename of regional grid data""")
-    parser.add_argument('--ni_regional', type=int, required=True, help="""
-        number of tracer points in the regional model grid 'x' direction""")
-    parser.add_argument('--nj_regional', type=int, required=True, help="""
-        number of tracer points in the regional model grid 'y' direction""")
+    parser.add_argument('--ni_regional', type=int, help="""
+        number of tracer points in the regional model grid 'x' direction
+        (required unless regional_mitgridfile has a sidecar)""")
+    parser.add_argument('--nj_regional', type=int, help="""
+        number of tracer points in the regional model grid 'y' direction
+        (required unless regional_mitgridfile has a sidecar)""")
     parser.add_argument('--parent_resultsdir', required=True, help="""
         MITgcm parent grid results directory""")
     parser.add_argument('--OB_Jnorth', type=int, help="""
@@ -106,20 +110,20 @@ def getobcs( strict=False, verbose=False, **kwargs):
     Kwargs:
         parent_mitgridfile (str, required if no parent_mitgrid_matrices):
             (path and) filename of global simulation grid data.
-        ni_parent (int, required if parent_mitgridfile): number of tracer points
-            in the parent model grid 'x' direction.
-        nj_parent (int, required if parent_mitgridfile): number of tracer points
-            in the parent model grid 'y' direction.
+        ni_parent (int, required if parent_mitgridfile without a sidecar):
+            number of tracer points in the parent model grid 'x' direction.
+        nj_parent (int, required if parent_mitgridfile without a sidecar):
+            number of tracer points in the parent model grid 'y' direction.
         parent_mitgrid_matrices (dict, required if no parent_mitgridfile):
             global simulation grid data as name/value (numpy 2-d array) pairs
             corresponding to matrix name and ordering convention listed in
             mitgridfilefields module.
         regional_mitgridfile (str, required if no regional_mitgrid_matrices):
             (path and) filename of regional grid data.
-        ni_regional (int, required if regional_mitgridfile): number of tracer
-            points in the regional model grid 'x' direction.
-        nj_regional (int, required if regional_mitgridfile): number of tracer
-            points in the regional model grid 'y' direction.
+        ni_regional (int, required if regional_mitgridfile without a sidecar):
+            number of tracer points in the regional model grid 'x' direction.
+        nj_regional (int, required if regional_mitgridfile without a sidecar):
+            number of tracer points in the regional model grid 'y' direction.
         regional_mitgrid_matrices (dict, required if no regional_mitgridfile):
             regional grid data as name/value (numpy 2-d array) pairs
             corresponding to matrix name and ordering convention listed in
@@ -173,14 +177,13 @@ def getobcs( strict=False, verbose=False, **kwargs):
         readmsg = 'reading parent grid from'
     # get parent grid from any one of several possible input sources:
     if parent_mitgridfile:
-        if ni_parent and nj_parent:
-            if verbose:
-                print('{0} {1}...'.format(readmsg,parent_mitgridfile))
-            parent_mitgrid = gridio.read_mitgridfile(
-                parent_mitgridfile, ni_parent, nj_parent, strict, verbose)
-        else:
-            raise ValueError(
-                "ni_parent and nj_parent required if parent_mitgridfile specified.")
+        if verbose:
+            print('{0} {1}...'.format(readmsg,parent_mitgridfile))
+        # (ni_parent, nj_parent from the file's sidecar, if not provided):
+        parent_mitgrid = gridio.read_mitgridfile(
+            parent_mitgridfile, ni_parent, nj_parent, strict, verbose,
+            mmap=True, fields=('XC','YC','XG','YG'))
+        (ni_parent, nj_parent) = parent_mitgrid['XC'].shape
     elif parent_mitgrid_matrices:
         if verbose:
             print('{0} {1}...'.format(readmsg,'parent_mitgrid_matrices'))
@@ -202,14 +205,13 @@ def getobcs( strict=False, verbose=False, **kwargs):
     if verbose:
         readmsg = 'reading regional grid from'
     if regional_mitgridfile:
-        if ni_regional and nj_regional:
-            if verbose:
-                print('{0} {1}...'.format(readmsg,regional_mitgridfile))
-            regional_mitgrid = gridio.read_mitgridfile(
-                regional_mitgridfile, ni_regional, nj_regional, strict, verbose)
-        else:
-            raise ValueError(
-                "ni_regional and nj_regional required if regional_mitgridfile specified.")
+        if verbose:
+            print('{0} {1}...'.format(readmsg,regional_mitgridfile))
+        # (ni_regional, nj_regional from the file's sidecar, if not provided):
+        regional_mitgrid = gridio.read_mitgridfile(
+            regional_mitgridfile, ni_regional, nj_regional, strict, verbose,
+            mmap=True, fields=('XC','YC','XG','YG'))
+        (ni_regional, nj_regional) = regional_mitgrid['XC'].shape
     elif regional_mitgrid_matrices:
         if verbose:
             print('{0} {1}...'.format(readmsg,'regional_mitgrid_matrices'))
@@ -1,32 +1,64 @@
 
+import json
 import numpy as np
+import os
 import struct
 import sys
+import zlib
+from . import config
 from . import mitgridfilefields as mgf
+from . import util
 
-def read_mitgridfile(filename,ni,nj,strict=False,verbose=False):
+SIDECAR_EXT = '.json'
+SIDECAR_VERSION = 1
+
+def read_mitgridfile(filename,ni=None,nj=None,strict=False,verbose=False,
+    mmap=False,fields=None,return_sidecar=False):
     """Read a serial (plain format) grid definition file.
 
     *.mitgrid files consist of contiguous binary segments, each of nominal size
     (ni+1)*(nj+1) terms. Since file data structure and sizes are implied,
-    expected grid cell counts, ni and nj, must be provided on input.
+    expected grid cell counts, ni and nj, must be provided on input, unless
+    the file has a sidecar (ref. write_mitgridfile_sidecar) from which they
+    are taken. If they are provided, sidecars that cannot be read (ref.
+    read_sidecar) are ignored.
 
     Args:
         filename (str): mitgrid (path and) file name.
-        ni (int): number of expected nominal "east-west" grid cells.
-        nj (int): number of expected nominal "north-south" grid cells.
+        ni (int): number of expected nominal "east-west" grid cells (optional
+            if the file has a sidecar).
+        nj (int): number of expected nominal "north-south" grid cells
+            (optional if the file has a sidecar).
         strict (bool): raise error if nonzero terms found in any of the standard
             mitgrid matrix row/column padding dimensions (e.g., last row and
-            column of XG, YG, etc.), False to ignore.
+            column of XG, YG, etc.), False to ignore. Padding is checked
+            whether or not the file's sidecar records it as zero, since other
+            writers may have modified the file since (ref. verify_sidecar to
+            check file data against sidecar checksums).
         verbose (bool): progress reporting to stdio.
+        mmap (bool): if True, map the file into memory rather than reading it,
+            so that data are read from disk only when, and if, accessed
+            (e.g., just XG and YG). False (default) to read all data up front.
+        fields (sequence of str, optional): names of the matrices to be
+            returned (e.g., ('XG','YG')). If mmap=False, only the file
+            segments of these matrices are read. Default: all matrices listed
+            in mitgridfilefields.names.
+        return_sidecar (bool): if True, also return the file's sidecar.
 
     Returns:
         mitgrid_matrices (dict): name/value (numpy 2-d array) pairs
             corresponding to matrix name and ordering convention listed in
-            mitgridfilefields module.
+            mitgridfilefields module. If mmap=True, values are (trimmed)
+            views of a copy-on-write numpy.memmap: they may be modified in
+            memory, but changes are never written back to the file.
+        sidecar (dict): if return_sidecar=True, sidecar contents (ref.
+            read_sidecar), or None if the file has no (readable) sidecar.
 
     Raises:
         RuntimeError: If strict=True flags nonzero terms (see strict).
+        ValueError: If fields includes names not in mitgridfilefields.names,
+            if ni, nj are not provided and the file has no sidecar, or if they
+            do not match those of its sidecar (ref. read_sidecar).
 
     Comments:
         - Nominal "north-south"/"east-west" directions depend on the particular
@@ -35,6 +67,8 @@ def read_mitgridfile(filename,ni,nj,strict=False,verbose=False):
             respectively.
         - The data stream in mitgrid files is assumed to read columwise (e.g. in
             Fortran order) into the respective grid descriptor matrices.
+        - strict=True checks access each matrix's padding row and column and
+            thus, with mmap=True, cause part of every matrix to be read.
 
     Examples:
         >>> # llc 90 gridfile:
@@ -75,6 +109,8 @@ def read_mitgridfile(filename,ni,nj,strict=False,verbose=False):
                 -112.0900639 , -111.86579135]])
 
     """
+    (ni,nj,sidecar) = _mitgridfile_dims(filename,ni,nj)
+
     # read raw data:
     slice_size = (ni+1)*(nj+1)
 
@@ -85,24 +121,42 @@ def read_mitgridfile(filename,ni,nj,strict=False,verbose=False):
     # ...instead, we have to resort to reading in monolithic array:
     dt = np.dtype(mgf.datatype)
 
+    names = _field_names(fields)
+    offsets = {name:k*slice_size for (k,name) in enumerate(mgf.names)}
+
     if verbose:
-        sys.stdout.write('reading {0:d} doubles from {1:s}... '.format(
-            len(mgf.names)*slice_size,filename))
-    rawdata = np.fromfile(filename,dt)
+        sys.stdout.write('{0:s} {1:d} doubles from {2:s}... '.format(
+            'mapping' if mmap else 'reading',len(names)*slice_size,filename))
+    if mmap or fields is None:
+        if mmap:
+            rawdata = np.memmap(filename,dt,mode='c')
+        else:
+            rawdata = np.fromfile(filename,dt)
+        segments = {name:rawdata[offsets[name]:offsets[name]+slice_size]
+            for name in names}
+    else:
+        # seek to, and read, just the requested fields' data segments:
+        segments = dict()
+        with open(filename,'rb') as fd:
+            for name in names:
+                fd.seek(offsets[name]*dt.itemsize)
+                segments[name] = np.fromfile(fd,dt,count=slice_size)
     if verbose:
         sys.stdout.write(' done.\n')
 
     # and store shaped, resized arrays by name/value:
     mitgrid_matrices = dict()
-    for (name,ni_del,nj_del) in zip(mgf.names,mgf.ni_delta_sizes,mgf.nj_delta_sizes):
+    for name in names:
+        k = mgf.names.index(name)
+        (ni_del,nj_del) = (mgf.ni_delta_sizes[k],mgf.nj_delta_sizes[k])
         # reshape, resize separately to allow intermediate error checking:
-        start = slice_size * mgf.names.index(name)
-        end   = slice_size * (mgf.names.index(name)+1)
         # because of numpy bug:
         mitgrid_matrices[name] = np.reshape(
-            rawdata[start:end],(ni+1,nj+1),order=mgf.order)
+            segments[name],(ni+1,nj+1),order=mgf.order)
         # instead of:
         # mitgrid_matrices[name] = np.reshape(rawdata[0][name],(ni+1,nj+1),order=mgf.order)
+        # (only the padding row and column are accessed, so also checked if
+        # the file has a sidecar):
         if strict and \
             (   (not ni_del and any(mitgrid_matrices[name][ni,:]))
                 or
@@ -118,10 +172,88 @@ def read_mitgridfile(filename,ni,nj,strict=False,verbose=False):
         mitgrid_matrices[name] = mitgrid_matrices[name][:ni+ni_del,:nj+nj_del]
         if verbose:
             sys.stdout.write(' done.\n')
+    if return_sidecar:
+        return mitgrid_matrices, sidecar
+    return mitgrid_matrices
+
+
+def _field_names(fields):
+    """Validate mitgrid field name selection (None for all)."""
+    names = mgf.names if fields is None else tuple(fields)
+    unknown = [name for name in names if name not in mgf.names]
+    if unknown:
+        raise ValueError('unknown mitgrid field(s): {0}'.format(unknown))
+    return names
+
+
+def read_mitgridfile_window(filename,ni,nj,i0,i1,j0,j1,fields=None,
+    verbose=False):
+    """Read a rectangular window of each matrix in a serial (plain format) grid
+    definition file.
+
+    Only the data within the window are read: since matrices are stored in
+    Fortran order, one contiguous run of i1-i0 terms per window column (or,
+    for full-height windows, a single run per matrix).
+
+    Args:
+        filename (str): mitgrid (path and) file name.
+        ni (int): number of expected nominal "east-west" grid cells (None, if
+            the file has a sidecar, for its value).
+        nj (int): number of expected nominal "north-south" grid cells (None,
+            if the file has a sidecar, for its value).
+        i0, i1 (int): window row range, i0<=i<i1, with 0<=i0<=i1<=ni+1.
+        j0, j1 (int): window column range, j0<=j<j1, with 0<=j0<=j1<=nj+1.
+        fields (sequence of str, optional): names of the matrices to be
+            read (e.g., ('XG','YG')). Default: all matrices listed in
+            mitgridfilefields.names.
+        verbose (bool): progress reporting to stdio.
+
+    Returns:
+        mitgrid_matrices (dict): name/value (numpy 2-d array) pairs, each
+            value equal to read_mitgridfile(filename,ni,nj)[name][i0:i1,j0:j1]
+            (i.e., also trimmed per mitgridfilefields delta sizes).
+
+    Raises:
+        ValueError: If the window is not within (ni+1)x(nj+1) bounds, if
+            fields includes names not in mitgridfilefields.names, or if ni, nj
+            are neither provided nor available from a sidecar.
+
+    """
+    names = _field_names(fields)
+    (ni,nj,_) = _mitgridfile_dims(filename,ni,nj)
+    if not (0<=i0<=i1<=ni+1 and 0<=j0<=j1<=nj+1):
+        raise ValueError(
+            'window [{0}:{1},{2}:{3}] exceeds {4}x{5} mitgrid bounds.'.format(
+                i0,i1,j0,j1,ni+1,nj+1))
+
+    dt = np.dtype(mgf.datatype)
+    if verbose:
+        sys.stdout.write('reading [{0}:{1},{2}:{3}] window of {4:s}... '.format(
+            i0,i1,j0,j1,filename))
+    mitgrid_matrices = dict()
+    with open(filename,'rb') as fd:
+        for name in names:
+            k = mgf.names.index(name)
+            rows = max(min(i1,ni+mgf.ni_delta_sizes[k])-i0,0)
+            cols = max(min(j1,nj+mgf.nj_delta_sizes[k])-j0,0)
+            window = np.empty((rows,cols),dt,order=mgf.order)
+            # (file offset, in terms, of window element [0,0]):
+            offset = (k*(nj+1)+j0)*(ni+1)+i0
+            if rows==ni+1:
+                fd.seek(offset*dt.itemsize)
+                window[:,:] = np.reshape(np.fromfile(fd,dt,count=rows*cols),
+                    (rows,cols),order=mgf.order)
+            else:
+                for c in range(cols if rows else 0):
+                    fd.seek((offset+c*(ni+1))*dt.itemsize)
+                    window[:,c] = np.fromfile(fd,dt,count=rows)
+            mitgrid_matrices[name] = window
+    if verbose:
+        sys.stdout.write(' done.\n')
     return mitgrid_matrices
 
 
-def write_mitgridfile(filename,griddata,ni,nj,verbose=False):
+def write_mitgridfile(filename,griddata,ni,nj,verbose=False,sidecar=False):
     """Write a serial (plain format) grid definition file that can be read with
     read_mitgridfile.
 
@@ -133,33 +265,290 @@ def write_mitgridfile(filename,griddata,ni,nj,verbose=False):
             griddata matrices
         nj (int): number of nominal "north-south" grid cells in the collection
             of griddata matrices
+        sidecar (bool): if True, also write a sidecar file (ref.
+            write_mitgridfile_sidecar) describing the written data, computed
+            as they are written. If False (default), any existing sidecar is
+            removed.
     Returns:
         bool: True for success, False otherwise.
 
     Comments:
         - Empty griddata fields will be written as fully-populated arrays of
           NaNs.
+        - Data are written directly from the griddata matrices, at most
+          config.MITGRID_WRITE_CHUNK_SIZE terms at a time, and the file is
+          flushed to disk (fsync) before returning.
 
     """
 
-    fd = open(filename,'wb')
-    slice_size = (ni+1)*(nj+1)
+    # each matrix is written column by column (i.e., in Fortran order), a
+    # bounded chunk of columns at a time, each chunk formatted as padded,
+    # big-endian doubles in a single reusable buffer:
+    chunk_cols = max(1,config.MITGRID_WRITE_CHUNK_SIZE//(ni+1))
+    buffer = np.empty((min(chunk_cols,nj+1),ni+1),mgf.datatype)
+
+    checksums = dict()
+    with open(filename,'wb') as fd:
+        for (name,ni_del,nj_del) in zip(
+            mgf.names,mgf.ni_delta_sizes,mgf.nj_delta_sizes):
+            checksums[name] = 0
+            if griddata[name] is None:
+                data = np.full((1,1),np.nan)
+            else:
+                data = np.asarray(griddata[name])
+            data = np.broadcast_to(data,(ni+ni_del,nj+nj_del))
+            for j0 in range(0,nj+1,chunk_cols):
+                j1 = min(j0+chunk_cols,nj+1)
+                chunk = buffer[:j1-j0]
+                # (rows of chunk are matrix columns j0 through j1-1):
+                chunk[:,ni+ni_del:] = 0.
+                if j0 < nj+nj_del:
+                    chunk[:min(j1,nj+nj_del)-j0,:ni+ni_del] = \
+                        data[:,j0:j1].T
+                chunk[max(nj+nj_del-j0,0):,:] = 0.
+                fd.write(chunk.data)
+                checksums[name] = zlib.crc32(chunk.data,checksums[name])
+        # flush and sync before closing, so that the file is complete on disk
+        # on return:
+        fd.flush()
+        os.fsync(fd.fileno())
 
-    for (name,ni_del,nj_del) in zip(mgf.names,mgf.ni_delta_sizes,mgf.nj_delta_sizes):
-
-        # copy data to standard (ni+1,nj+1)-sized array:
-        tmparray = np.zeros((ni+1,nj+1))
-        tmparray[:ni+ni_del,:nj+nj_del] = griddata[name]    # note: tmparray will be NaNs
-                                                            # if griddata[name]=None
-                                                            # for numpy v1.16.2
-        # since np.tofile writes in C order, explicity recast array to vector
-        # using fortran ordering:
-        tmparray = np.reshape(tmparray,slice_size,order='F')
-        # finally, ensure double-precision, big-endian representation:
-        outarray = tmparray.astype('>f8')
-        # append to output file:
-        outarray.tofile(fd)
-
-    fd.close
+    if sidecar:
+        _write_sidecar(filename,ni,nj,checksums,griddata['XG'],griddata['YG'])
+    else:
+        _remove_sidecar(filename)
     return True
 
+
+def memmap_mitgridfile(filename,ni=None,nj=None,mode='r'):
+    """Map a serial (plain format) grid definition file into memory.
+
+    Args:
+        filename (str): mitgrid (path and) file name.
+        ni (int): number of nominal "east-west" grid cells (optional, except
+            for mode 'w+', if the file has a sidecar).
+        nj (int): number of nominal "north-south" grid cells (optional, except
+            for mode 'w+', if the file has a sidecar).
+        mode (str): numpy.memmap file mode ('r', 'r+', or 'w+' to create, or
+            overwrite, a zero-filled file of the implied size). Any existing
+            sidecar is removed for modes 'r+' and 'w+', since mapped data may
+            then be changed.
+
+    Returns:
+        numpy.memmap of shape (ni+1,nj+1,len(mitgridfilefields.names)), whose
+            [:,:,k] elements are those of the k'th mitgridfilefields.names
+            matrix (i.e., mitgrid file layout, in Fortran order).
+
+    """
+    if mode!='w+':
+        (ni,nj,_) = _mitgridfile_dims(filename,ni,nj)
+    if mode!='r':
+        _remove_sidecar(filename)
+    return np.memmap(filename,dtype=mgf.datatype,mode=mode,
+        shape=(ni+1,nj+1,len(mgf.names)),order=mgf.order)
+
+
+def write_mitgridfile_rows(mitgrid_memmap,i0,griddata):
+    """Write a band of rows of each grid matrix to a mapped mitgrid file.
+
+    Args:
+        mitgrid_memmap (numpy.memmap): mapped mitgrid file (ref.
+            memmap_mitgridfile).
+        i0 (int): index of the first row of the band.
+        griddata: dictionary of numpy array data (ref. mitgridfilefields.py),
+            each matrix containing rows i0 and up of the corresponding, full,
+            grid matrix.
+
+    Note:
+        Any sidecar of the mapped file is removed, as it no longer describes
+        the file's data.
+
+    """
+    if mitgrid_memmap.filename:
+        _remove_sidecar(mitgrid_memmap.filename)
+    for (k,name) in enumerate(mgf.names):
+        (rows,cols) = griddata[name].shape
+        mitgrid_memmap[i0:i0+rows,:cols,k] = griddata[name]
+
+
+def sidecar_filename(filename):
+    """Sidecar (path and) file name of a mitgrid file (ref.
+    write_mitgridfile_sidecar)."""
+    return filename + SIDECAR_EXT
+
+
+def corner_extent(XG,YG):
+    """Summarize the location of a grid (e.g., for a sidecar or catalog).
+
+    Args:
+        XG (numpy 2-d array): grid corner point longitudes (decimal degrees).
+        YG (numpy 2-d array): grid corner point latitudes (decimal degrees).
+
+    Returns:
+        dictionary with a 'corners' dictionary of 'XG' and 'YG' lists of grid
+            corner coordinates (in [i,j]=[0,0], [ni,0], [ni,nj], [0,nj]
+            order), and 'cap' and 'box' extent dictionaries (ref.
+            util.tile_extent; both None if no corner points are defined).
+
+    """
+    corners = ([0,-1,-1,0],[0,0,-1,-1])
+    try:
+        (cap,box) = util.tile_extent(XG,YG)
+    except ValueError:
+        (cap,box) = (None,None)
+    return {
+        'corners': {
+            'XG': [float(x) for x in XG[corners]],
+            'YG': [float(y) for y in YG[corners]]},
+        'cap': cap, 'box': box}
+
+
+def write_mitgridfile_sidecar(filename,ni,nj):
+    """Write a sidecar file describing an existing mitgrid file.
+
+    The sidecar, named per sidecar_filename, is a small JSON file with the
+    mitgrid file's 'ni', 'nj', 'dtype', 'order' and 'fields' (matrix names, in
+    file order), per-matrix 'checksums' (CRC-32 of each padded data segment),
+    whether all padding rows and columns are 'zero_padded', and its
+    'corners', 'cap' and 'box' extents (ref. corner_extent). With it,
+    readers need not be given ni, nj, and catalogs of many files need not
+    read them (ref. catalog.build_catalog).
+
+    Args:
+        filename (str): mitgrid (path and) file name.
+        ni (int): number of nominal "east-west" grid cells.
+        nj (int): number of nominal "north-south" grid cells.
+
+    Note:
+        write_mitgridfile(...,sidecar=True) writes the same sidecar without
+        having to read the data back.
+
+    """
+    _remove_sidecar(filename)
+    mitgrid = memmap_mitgridfile(filename,ni,nj)
+    checksums = {name:zlib.crc32(np.ascontiguousarray(mitgrid[:,:,k].T))
+        for (k,name) in enumerate(mgf.names)}
+    zero_padded = not any(
+        (not ni_del and np.any(mitgrid[ni,:,k])) or
+        (not nj_del and np.any(mitgrid[:,nj,k]))
+        for (k,(ni_del,nj_del)) in enumerate(
+            zip(mgf.ni_delta_sizes,mgf.nj_delta_sizes)))
+    (k_xg,k_yg) = (mgf.names.index('XG'),mgf.names.index('YG'))
+    _write_sidecar(filename,ni,nj,checksums,
+        mitgrid[:,:,k_xg],mitgrid[:,:,k_yg],zero_padded)
+
+
+def _write_sidecar(filename,ni,nj,checksums,XG,YG,zero_padded=True):
+    """Write a sidecar given mitgrid file checksums and XG, YG data."""
+    if XG is None or YG is None:
+        extent = {'corners':None,'cap':None,'box':None}
+    else:
+        extent = corner_extent(
+            np.asarray(XG,dtype=np.float64),np.asarray(YG,dtype=np.float64))
+    sidecar = {
+        'version': SIDECAR_VERSION,
+        'ni': ni, 'nj': nj,
+        'dtype': mgf.datatype, 'order': mgf.order,
+        'fields': list(mgf.names),
+        'checksums': checksums,
+        'zero_padded': zero_padded}
+    sidecar.update(extent)
+    with open(sidecar_filename(filename),'w') as fd:
+        json.dump(sidecar,fd,indent=1)
+
+
+def _remove_sidecar(filename):
+    """Remove a (possibly stale) mitgrid file sidecar, if any."""
+    try:
+        os.remove(sidecar_filename(filename))
+    except FileNotFoundError:
+        pass
+
+
+def read_sidecar(filename):
+    """Read the sidecar of a mitgrid file, if any.
+
+    Args:
+        filename (str): mitgrid (path and) file name (not that of the sidecar
+            itself).
+
+    Returns:
+        sidecar (dict): sidecar contents (ref. write_mitgridfile_sidecar), or
+            None if the mitgrid file has no sidecar.
+
+    Raises:
+        ValueError: If the sidecar is not valid JSON, if its version or data
+            layout is not supported (e.g., it is not a sidecar at all), or if
+            the mitgrid file size is not that implied by the sidecar (e.g.,
+            the sidecar is stale).
+
+    """
+    try:
+        with open(sidecar_filename(filename)) as fd:
+            sidecar = json.load(fd)
+    except FileNotFoundError:
+        return None
+    if not isinstance(sidecar,dict) or \
+        not {'ni','nj','checksums'}.issubset(sidecar) or \
+        sidecar.get('version')!=SIDECAR_VERSION or \
+        sidecar.get('dtype')!=mgf.datatype or \
+        sidecar.get('order')!=mgf.order or \
+        sidecar.get('fields')!=list(mgf.names):
+        raise ValueError(
+            'unsupported sidecar version or layout: {0:s}'.format(
+                sidecar_filename(filename)))
+    expected_size = len(mgf.names)*(sidecar['ni']+1)*(sidecar['nj']+1)* \
+        np.dtype(mgf.datatype).itemsize
+    if os.path.getsize(filename)!=expected_size:
+        raise ValueError(
+            '{0:s} size does not match its sidecar (ni={1}, nj={2}).'.format(
+                filename,sidecar['ni'],sidecar['nj']))
+    return sidecar
+
+
+def verify_sidecar(filename):
+    """Check mitgrid file data against the checksums in its sidecar.
+
+    Args:
+        filename (str): mitgrid (path and) file name.
+
+    Returns:
+        List of the names of matrices whose data do not match their sidecar
+        checksums (i.e., empty if all match).
+
+    Raises:
+        ValueError: If the file has no sidecar, or it is unsupported (ref.
+            read_sidecar).
+
+    """
+    sidecar = read_sidecar(filename)
+    if sidecar is None:
+        raise ValueError('{0:s} has no sidecar.'.format(filename))
+    mitgrid = memmap_mitgridfile(filename,sidecar['ni'],sidecar['nj'])
+    return [name for (k,name) in enumerate(mgf.names)
+        if zlib.crc32(np.ascontiguousarray(mitgrid[:,:,k].T))!=
+            sidecar['checksums'][name]]
+
+
+def _mitgridfile_dims(filename,ni,nj):
+    """Resolve mitgrid file dimensions, ni, nj, from those given and/or the
+    file's sidecar, returning (ni,nj,sidecar). Unreadable sidecars are
+    ignored (sidecar=None) if both ni and nj are given."""
+    try:
+        sidecar = read_sidecar(filename)
+    except ValueError:
+        if ni is None or nj is None:
+            raise
+        sidecar = None
+    if sidecar is None:
+        if ni is None or nj is None:
+            raise ValueError(
+                'ni, nj required for {0:s} (no sidecar found).'.format(
+                    filename))
+    elif ni is None and nj is None:
+        (ni,nj) = (sidecar['ni'],sidecar['nj'])
+    elif (ni,nj)!=(sidecar['ni'],sidecar['nj']):
+        raise ValueError(
+            'ni, nj ({0},{1}) do not match {2:s} sidecar ({3},{4}).'.format(
+                ni,nj,filename,sidecar['ni'],sidecar['nj']))
+    return ni, nj, sidecar
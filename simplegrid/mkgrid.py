@@ -37,8 +37,30 @@ def create_parser():
         y-direction tracer cells)""")
     parser.add_argument('--outfile', help="""
         file to which grid matrices will be written (mitgridfile format)""")
+    parser.add_argument('--sidecar',action='store_true',help="""
+        also write an outfile sidecar (outfile.json) describing the grid, its
+        dimensions, checksums and extent""")
+    parser.add_argument('--band_rows', type=int, help="""
+        if specified, generate the grid this many (tracer cell) rows at a time,
+        writing each band directly to outfile, rather than all at once""")
+    parser.add_argument('--workers', type=int, default=1, help="""
+        number of worker processes for compute grid calculations
+        (default=1)""")
+    parser.add_argument('--dtype', default='float64',
+        choices=['float64','float32'], help="""
+        floating point type of compute grid coordinates, edge lengths and
+        areas (default=float64; float32 for reduced precision previews)""")
+    parser.add_argument('--areas', choices=['planar','spherical'], help="""
+        compute grid sub-area formulation (default: planar if mean compute
+        grid edge lengths are less than config.PLANAR_SPHER_TRANSITION,
+        spherical otherwise)""")
     parser.add_argument('-v','--verbose',action='store_true',help="""
         verbose output""")
+    parser.add_argument('--stats',action='store_true',help="""
+        print geodesic call counts and per-stage timings""")
+    parser.add_argument('--trace_memory',action='store_true',help="""
+        with --stats, also trace and print per-stage peak memory allocations
+        (tracing slows down, and so inflates the timings of, every stage)""")
     return parser
 
 
@@ -60,11 +82,39 @@ def mkgrid( verbose=False, **kwargs):
         lat_subscale (int, required): desired number of latitudinal
             subdivisions in the resulting grid (number of y-direction tracer
             cells).
+        workers (int, optional): number of worker processes among which
+            compute grid fill-in, edge and area calculations are divided, by
+            row band (default=1).
+        workspace (computegrid.ComputeGrid, optional): compute grid workspace
+            to be (re)used, e.g., across a batch of grids of the same
+            dimensions (default: a new workspace).
+        dtype (numpy dtype, optional): floating point type of a new workspace's
+            compute grid coordinates, edge lengths and sub-areas
+            (default=numpy.float64; e.g., numpy.float32 for exploratory or
+            preview grids). Edge length and area sums, and returned matrices,
+            are always float64.
+        stats (util.Stats, optional): if provided, geodesic call counts and
+            per-stage timings (ref. util.collect_stats) are added to it.
+        band_rows (int, optional): if provided, generate the grid band_rows
+            (tracer cell) rows at a time, writing each band directly to
+            outfile, so that memory use is bounded by band rather than grid
+            size (ref. computegrid.stream_mitgridfile; workers, workspace and
+            dtype are not used).
+        planar (bool, optional): True for planar, False for spherical,
+            compute grid sub-areas (ref. computegrid.areas); if not provided,
+            determined from mean compute grid edge lengths (with band_rows,
+            as estimated by computegrid.stream_mitgrid).
+        outfile (str, required if band_rows provided): (path and) file name
+            of the mitgrid file to be written.
 
     Returns:
         (newgrid,newgrid_ni,newgrid_nj): For consistency with regrid(), tuple
             consisting of dictionary of grid matrices and corresponding tracer
-            cell counts ni (=lon_subscale input) and nj (=lat_subscale input).
+            cell counts ni (=lon_subscale input) and nj (=lat_subscale input)
+            (newgrid is None if band_rows is provided).
+
+    Raises:
+        ValueError: If band_rows is provided without outfile.
 
     Note:
         Corner point information (lon1/lat1, lon2/lat2) can be either literal
@@ -74,6 +124,13 @@ def mkgrid( verbose=False, **kwargs):
 
     """
 
+    with util.collect_stats(kwargs.get('stats')), util.stage('mkgrid'):
+        return _mkgrid(verbose,**kwargs)
+
+
+def _mkgrid( verbose, **kwargs):
+    """Grid creation body, within any stats collection (ref. mkgrid)."""
+
     # kwarg handling:
     lon1        = kwargs.get('lon1')
     lat1        = kwargs.get('lat1')
@@ -81,6 +138,12 @@ def mkgrid( verbose=False, **kwargs):
     lat2        = kwargs.get('lat2')
     lon_subscale= kwargs.get('lon_subscale')
     lat_subscale= kwargs.get('lat_subscale')
+    workers     = kwargs.get('workers',1)
+    workspace   = kwargs.get('workspace')
+    dtype       = kwargs.get('dtype',np.float64)
+    band_rows   = kwargs.get('band_rows')
+    planar      = kwargs.get('planar')
+    outfile     = kwargs.get('outfile')
 
     # for now, assume spherical geoid (perhaps user-specified later):
     geod = pyproj.Geod(ellps='sphere')
@@ -96,9 +159,9 @@ def mkgrid( verbose=False, **kwargs):
     #
     # Based on user-selected discretization level, create a "compute grid" that
     # spans the expected range, plus a boundary "ring" one compute cell wide.
-    # Initializing boundary grid values to np.PZERO will allow us to compute
-    # subsequent mitgrid values using consistent indexing, while naturally
-    # producing undefined values at the boundaries. The total compute grid
+    # Initializing boundary grid values to NaN (undefined) will allow us to
+    # compute subsequent mitgrid values using consistent indexing, while
+    # naturally producing undefined values at the boundaries. The total compute grid
     # ranges are given by LB/UB, while the user-selected range is given by
     # lb/ub; a picture might help:
     #
@@ -107,7 +170,7 @@ def mkgrid( verbose=False, **kwargs):
     #           |
     #       jUB +------------------+
     #           |                  |
-    #       jub +   o----------+   |<-- ring of PZERO values
+    #       jub +   o----------+   |<-- ring of NaN values
     #           |   |          |   |
     #           |   |          |<--|--- area to be regridded
     #           |   |          |   |    (lat_subscale x lon_subscale)
@@ -127,11 +190,26 @@ def mkgrid( verbose=False, **kwargs):
     jub = jlb + 2*lat_subscale  # compute grids are at 2x resolution
     jUB = jub + 1
 
-    # "compute grid" dimensions, allocation:
+    if band_rows:
+        # band-by-band alternative to steps 1-3, below, with lon1/lat1 and
+        # lon2/lat2 as northwest and southeast corners:
+        if not outfile:
+            raise ValueError("outfile required if band_rows specified")
+        (ni_streamed,nj_streamed) = computegrid.stream_mitgridfile( outfile,
+            np.array([[lon1,lon1],[lon2,lon2]]),
+            np.array([[lat2,lat1],[lat2,lat1]]),
+            lon_subscale,lat_subscale,geod,band_rows,planar,verbose)
+        return (None,ni_streamed,nj_streamed)
+
+    # "compute grid" dimensions, allocation (or reuse of a caller-provided
+    # workspace):
     num_compute_grid_rows = iUB + 1
     num_compute_grid_cols = jUB + 1
-    compute_grid_xg = np.zeros((num_compute_grid_rows,num_compute_grid_cols))
-    compute_grid_yg = np.zeros((num_compute_grid_rows,num_compute_grid_cols))
+    if workspace is None:
+        workspace = computegrid.ComputeGrid(dtype=dtype)
+    workspace.reset((num_compute_grid_rows,num_compute_grid_cols))
+    compute_grid_xg = workspace.xg
+    compute_grid_yg = workspace.yg
 
     #
     # Step 2: Populate compute grid points corresponding to user-selected corner
@@ -149,16 +227,24 @@ def mkgrid( verbose=False, **kwargs):
 
     # 2b: fill in intermediate points per user-specified subdivision level:
 
+    # unit sphere cartesian coordinates, maintained alongside xg, yg and
+    # shared by all subsequent compute grid operations:
+    compute_grid_cart = util.lonlat2cart(
+        compute_grid_xg,compute_grid_yg,out=workspace.cart)
+
     (compute_grid_xg,compute_grid_yg) = computegrid.fill(
         compute_grid_xg,compute_grid_yg,ilb,iub,jlb,jub,
-        lon_subscale,lat_subscale,geod,verbose)
+        lon_subscale,lat_subscale,geod,verbose,
+        compute_grid_cart=compute_grid_cart,workers=workers,inplace=True)
 
     #
     # Step 3: Use compute grid to generate full set of mitgrid data:
     #
 
     outgrid = computegrid.tomitgrid( compute_grid_xg, compute_grid_yg,
-        iLB, ilb, iub, iUB, jLB, jlb, jub, jUB, geod, verbose)
+        iLB, ilb, iub, iUB, jLB, jlb, jub, jUB, geod, verbose,
+        compute_grid_cart=compute_grid_cart,workers=workers,
+        workspace=workspace,planar=planar)
 
     return outgrid, lon_subscale, lat_subscale
 
@@ -168,6 +254,7 @@ def main():
 
     parser = create_parser()
     args = parser.parse_args()
+    stats = util.Stats(trace_memory=args.trace_memory) if args.stats else None
     (newgrid,newgrid_ni,newgrid_nj) = mkgrid(
         args.verbose,
         lon1        = args.lon1,
@@ -175,13 +262,28 @@ def main():
         lon2        = args.lon2,
         lat2        = args.lat2,
         lon_subscale= args.lon_subscale,
-        lat_subscale= args.lat_subscale)
-    if args.verbose:
-        print('writing {0:s} with ni={1:d}, nj={2:d}...'.
-            format(args.outfile,newgrid_ni,newgrid_nj))
-    gridio.write_mitgridfile(args.outfile,newgrid,newgrid_ni,newgrid_nj)
-    if args.verbose:
-        print('...done.')
+        lat_subscale= args.lat_subscale,
+        workers     = args.workers,
+        dtype       = args.dtype,
+        band_rows   = args.band_rows,
+        planar      = None if args.areas is None else args.areas=='planar',
+        outfile     = args.outfile,
+        stats       = stats)
+    if not args.band_rows:
+        # (otherwise, already written, band-by-band)
+        if args.verbose:
+            print('writing {0:s} with ni={1:d}, nj={2:d}...'.
+                format(args.outfile,newgrid_ni,newgrid_nj))
+        with util.collect_stats(stats), util.stage('write'):
+            gridio.write_mitgridfile(
+                args.outfile,newgrid,newgrid_ni,newgrid_nj,
+                sidecar=args.sidecar)
+        if args.verbose:
+            print('...done.')
+    elif args.sidecar:
+        gridio.write_mitgridfile_sidecar(args.outfile,newgrid_ni,newgrid_nj)
+    if args.stats:
+        print(stats)
 
 if __name__ == '__main__':
     main()
@@ -32,10 +32,12 @@ def create_parser():
     parser.add_argument('--yg_file', help="""
         YG (path and) file input alternative to mitgridfile (see --xg_file
         comments)""")
-    parser.add_argument('--ni', type=int, required=True, help="""
-        number of tracer points in model grid 'x' direction""")
-    parser.add_argument('--nj', type=int, required=True, help="""
-        number of tracer points in model grid 'y' direction""")
+    parser.add_argument('--ni', type=int, help="""
+        number of tracer points in model grid 'x' direction (required unless
+        mitgridfile has a sidecar)""")
+    parser.add_argument('--nj', type=int, help="""
+        number of tracer points in model grid 'y' direction (required unless
+        mitgridfile has a sidecar)""")
     parser.add_argument('--lon1', type=float, required=True, help="""
         longitude of northwest corner point""")
     parser.add_argument('--lat1', type=float, required=True, help="""
@@ -54,12 +56,38 @@ def create_parser():
     parser.add_argument('--outfile', required=True, help="""
         file to which regridded matrices will be written (mitgridfile
         format)""")
+    parser.add_argument('--band_rows', type=int, help="""
+        if specified, generate the grid this many (tracer cell) rows at a time,
+        writing each band directly to outfile, rather than all at once""")
+    parser.add_argument('--workers', type=int, default=1, help="""
+        number of worker processes for compute grid calculations
+        (default=1)""")
+    parser.add_argument('--dtype', default='float64',
+        choices=['float64','float32'], help="""
+        floating point type of compute grid coordinates, edge lengths and
+        areas (default=float64; float32 for reduced precision previews)""")
+    parser.add_argument('--areas', choices=['planar','spherical'], help="""
+        compute grid sub-area formulation (default: planar if mean compute
+        grid edge lengths are less than config.PLANAR_SPHER_TRANSITION,
+        spherical otherwise)""")
+    parser.add_argument('--index_cache', help="""
+        if specified, directory in which to store, and from which to reuse,
+        parent grid spatial indices (e.g., across regrids of the same parent
+        grid)""")
+    parser.add_argument('--sidecar',action='store_true',help="""
+        also write an outfile sidecar (outfile.json) describing the grid, its
+        dimensions, checksums and extent""")
     parser.add_argument('-s','--strict',action='store_true', help="""
         raise error if nonzero terms found in any of the standard mitgrid matrix
         row/colum padding dimensions (e.g., last row and column of XG, YG,
         etc.)""")
     parser.add_argument('-v','--verbose',action='store_true',help="""
         verbose output""")
+    parser.add_argument('--stats',action='store_true',help="""
+        print geodesic call counts and per-stage timings""")
+    parser.add_argument('--trace_memory',action='store_true',help="""
+        with --stats, also trace and print per-stage peak memory allocations
+        (tracing slows down, and so inflates the timings of, every stage)""")
     return parser
 
 
@@ -87,10 +115,12 @@ def regrid( strict=False, verbose=False, **kwargs):
         mitgrid_matrices (dict, required if no mitgridfile or xg_file, yg_file):
             name/value (numpy 2-d array) pairs corresponding to matrix name and
             ordering convention listed in mitgridfilefields module.
-        ni (int, required if mitgridfile or xg/yg_file specified): number of
-            tracer points in the model grid 'x' direction.
-        nj (int, required if mitgridfile or xg/yg_file specified): number of
-            tracer points in the model grid 'y' direction.
+        ni (int, required if xg/yg_file, or mitgridfile without a sidecar,
+            specified): number of tracer points in the model grid 'x'
+            direction.
+        nj (int, required if xg/yg_file, or mitgridfile without a sidecar,
+            specified): number of tracer points in the model grid 'y'
+            direction.
         lon1 (float, required): longitude of northwest corner point.
         lat1 (float, required): latitude of northwest corner point.
         lon2 (float, required): longitude of southeast corner point.
@@ -100,17 +130,45 @@ def regrid( strict=False, verbose=False, **kwargs):
             x-direction cells; int>=1).
         lat_subscale (int, required): subscale factor to be applied to each cell
             in the model grid 'y' direction (see lon_subscale comments; int>=1).
+        workers (int, optional): number of worker processes among which
+            compute grid fill-in, edge and area calculations are divided, by
+            row band (default=1).
+        workspace (computegrid.ComputeGrid, optional): compute grid workspace
+            to be (re)used, e.g., across a batch of regrids of the same
+            dimensions (default: a new workspace).
+        dtype (numpy dtype, optional): floating point type of a new workspace's
+            compute grid coordinates, edge lengths and sub-areas
+            (default=numpy.float64; e.g., numpy.float32 for exploratory or
+            preview grids). Edge length and area sums, and returned matrices,
+            are always float64.
+        stats (util.Stats, optional): if provided, geodesic call counts and
+            per-stage timings (ref. util.collect_stats) are added to it.
+        index_cache (str, optional): if provided, directory in which XG, YG
+            spatial indices are stored, and from which they are reused, keyed
+            by XG, YG content (ref. util.cached_nearest_index).
+        band_rows (int, optional): if provided, generate the grid band_rows
+            (tracer cell) rows at a time, writing each band directly to
+            outfile, so that memory use is bounded by band rather than grid
+            size (ref. computegrid.stream_mitgridfile; workers, workspace and
+            dtype are not used).
+        planar (bool, optional): True for planar, False for spherical,
+            compute grid sub-areas (ref. computegrid.areas); if not provided,
+            determined from mean compute grid edge lengths (with band_rows,
+            as estimated by computegrid.stream_mitgrid).
+        outfile (str, required if band_rows provided): (path and) file name
+            of the mitgrid file to be written.
 
     Returns:
         (newgrid,newgrid_ni,newgrid_nj): Tuple consisting of dictionary of
             newly-regridded subdomain matrices (ref. mitgridfilefields.py for
-            names and ordering), and regridded ni, nj subdomain cell counts.
+            names and ordering), and regridded ni, nj subdomain cell counts
+            (newgrid is None if band_rows is provided).
 
     Raises:
         RuntimeError: If strict=True flags nonzero terms (see strict).
         ValueError: If none of mitgridfile, xg_file/yg_file pair, or
-            mitgrid_matrices are provided, or if lon/lat input pairs are not
-            diagonally-located.
+            mitgrid_matrices are provided, if lon/lat input pairs are not
+            diagonally-located, or if band_rows is provided without outfile.
 
     Note:
         Corner point information (lon1/lat1, lon2/lat2) can be either literal
@@ -120,6 +178,13 @@ def regrid( strict=False, verbose=False, **kwargs):
 
     """
 
+    with util.collect_stats(kwargs.get('stats')), util.stage('regrid'):
+        return _regrid(strict,verbose,**kwargs)
+
+
+def _regrid( strict, verbose, **kwargs):
+    """Regrid body, within any stats collection (ref. regrid)."""
+
     # kwarg handling:
     mitgridfile     = kwargs.get('mitgridfile')
     xg_file         = kwargs.get('xg_file')
@@ -133,14 +198,27 @@ def regrid( strict=False, verbose=False, **kwargs):
     lat2            = kwargs.get('lat2')
     lon_subscale    = kwargs.get('lon_subscale')
     lat_subscale    = kwargs.get('lat_subscale')
+    workers         = kwargs.get('workers',1)
+    workspace       = kwargs.get('workspace')
+    dtype           = kwargs.get('dtype',np.float64)
+    band_rows       = kwargs.get('band_rows')
+    planar          = kwargs.get('planar')
+    outfile         = kwargs.get('outfile')
+    index_cache     = kwargs.get('index_cache')
 
     # read XG, YG data from source provided:
+    index_key = None
     if mitgridfile:
-        if ni and nj:
-            mitgrid = gridio.read_mitgridfile( mitgridfile, ni, nj,
-                strict, verbose)
-        else:
-            raise ValueError("ni, nj required if mitgridfile specified")
+        # (only XG and YG are needed, so just map the file; ni, nj may come
+        # from its sidecar, if any):
+        (mitgrid,sidecar) = gridio.read_mitgridfile( mitgridfile, ni, nj,
+            strict, verbose, mmap=True, fields=('XG','YG'),
+            return_sidecar=True)
+        if sidecar is not None:
+            # sidecar checksums identify XG, YG content without reading it:
+            index_key = 'mitgrid_{0}x{1}_{2:08x}_{3:08x}'.format(
+                sidecar['ni'],sidecar['nj'],
+                sidecar['checksums']['XG'],sidecar['checksums']['YG'])
     elif xg_file and yg_file:
         mitgrid = {key:None for key in mitgridfilefields.names}
         if ni and nj:
@@ -171,39 +249,56 @@ def regrid( strict=False, verbose=False, **kwargs):
     geod = pyproj.Geod(ellps='sphere')
 
     # determine original XG, YG matrix indices corresponding to user input
-    # lat/lon corners:
+    # lat/lon corners (once, using a spatial index rather than a search of all
+    # XG, YG points for each):
 
-    i_nw,j_nw,_ = util.nearest(lon1,lat1,mitgrid['XG'],mitgrid['YG'],geod)
-    i_se,j_se,_ = util.nearest(lon2,lat2,mitgrid['XG'],mitgrid['YG'],geod)
+    if index_cache:
+        index = util.cached_nearest_index(
+            mitgrid['XG'],mitgrid['YG'],index_cache,verbose,key=index_key)
+    else:
+        index = util.NearestIndex(mitgrid['XG'],mitgrid['YG'])
+    i_nw,j_nw,_ = util.nearest(
+        lon1,lat1,mitgrid['XG'],mitgrid['YG'],geod,index)
+    i_se,j_se,_ = util.nearest(
+        lon2,lat2,mitgrid['XG'],mitgrid['YG'],geod,index)
 
     # make sure diagonal corners and not degenerate sides have been input:
     if i_nw==i_se or j_nw==j_se:
         raise ValueError("lon/lat input pairs must be diagonally-opposed.")
 
-    # if necessary, rotate xg, yg into user-directed nw/se alignment:
-    while not (j_nw>j_se and i_se>i_nw):
-        if verbose:
-            print('performing 90 degree XG, YG rotation...')
-            print('...start: (i,j)_nw = ({0},{1}), (i,j)_se = ({2},{3})'.format(i_nw,j_nw,i_se,j_se))
-        mitgrid['XG'] = np.rot90(mitgrid['XG'])
-        mitgrid['YG'] = np.rot90(mitgrid['YG'])
-        i_nw,j_nw,_ = util.nearest(lon1,lat1,mitgrid['XG'],mitgrid['YG'],geod)
-        i_se,j_se,_ = util.nearest(lon2,lat2,mitgrid['XG'],mitgrid['YG'],geod)
-        if verbose:
-            print('...end:   (i,j)_nw = ({0},{1}), (i,j)_se = ({2},{3})'.format(i_nw,j_nw,i_se,j_se))
+    # since matrix slice operations are from start:(stop-1):stride, define a
+    # lambda function to make it clear when the stop point should be inclusive,
+    # i.e., start:incl(stop):stride
+    incl = lambda idx : idx+1
+
+    # if necessary, rotate xg, yg into user-directed nw/se alignment (nw at
+    # min i, max j, se at max i, min j). Since each 90 degree (np.rot90)
+    # rotation of an m x n matrix maps index (i,j) to (n-1-j,i), and thus the
+    # nw to se index offset (di,dj) to (-dj,di), the number of rotations
+    # follows directly from the located corners, and only the selected
+    # sub-window need be rotated:
+    (di,dj) = (i_se-i_nw,j_se-j_nw)
+    rotations = 0
+    while not (dj<0 and di>0):
+        (di,dj) = (-dj,di)
+        rotations += 1
+    if verbose and rotations:
+        print('performing {0} 90 degree XG, YG rotation(s) of selected range...'.format(rotations))
+        print('...start: (i,j)_nw = ({0},{1}), (i,j)_se = ({2},{3})'.format(i_nw,j_nw,i_se,j_se))
+    selected = np.s_[
+        min(i_nw,i_se):incl(max(i_nw,i_se)),
+        min(j_nw,j_se):incl(max(j_nw,j_se))]
+    XG_selected = np.rot90(mitgrid['XG'][selected],rotations)
+    YG_selected = np.rot90(mitgrid['YG'][selected],rotations)
 
     if verbose:
         print('remeshing {0} x {1} cell grid based on'.format(
-            abs(i_nw-i_se),abs(j_nw-j_se)))
+            XG_selected.shape[0]-1,XG_selected.shape[1]-1))
         print('located corner points ({0:9.4f},{1:9.4f}) and ({2:9.4f},{3:9.4f})'.format(
             lon1,lat1,lon2,lat2))
         print('resulting grid will be {0} x {1} cells (lon/lat subscale = {2}/{3})'.format(
-            abs(i_nw-i_se)*lon_subscale,abs(j_nw-j_se)*lat_subscale,lon_subscale,lat_subscale))
-
-    # since matrix slice operations are from start:(stop-1):stride, define a
-    # lambda function to make it clear when the stop point should be inclusive,
-    # i.e., start:incl(stop):stride
-    incl = lambda idx : idx+1
+            (XG_selected.shape[0]-1)*lon_subscale,
+            (XG_selected.shape[1]-1)*lat_subscale,lon_subscale,lat_subscale))
 
     #
     # Step 1:
@@ -211,9 +306,9 @@ def regrid( strict=False, verbose=False, **kwargs):
     # Based on user-selected corner points and discretization level, create a
     # "compute grid" that spans the selected NW/SE range, at double the
     # resolution, plus a boundary "ring" one compute cell wide.  Initializing
-    # boundary grid values to np.PZERO will allow us to compute subsequent
-    # mitgrid values using consistent indexing, while naturally producing
-    # undefined values at the boundaries. The total compute grid ranges are
+    # boundary grid values to NaN (undefined) will allow us to compute
+    # subsequent mitgrid values using consistent indexing, while naturally
+    # producing undefined values at the boundaries. The total compute grid ranges are
     # given by LB/UB, while the user-selected range, given by ilb_mitgrid,
     # iub_mitgrid, jlb_mitgrid, jub_mitgrid, is mapped (along with all
     # intermediate mitgrid points) to the corresponding compute grid range,
@@ -226,7 +321,7 @@ def regrid( strict=False, verbose=False, **kwargs):
     #                       |
     #                   jUB +------------------+
     #                       |                  |
-    #   jub_mitgrid <-> jub +   o----------+   |<-- ring of PZERO values
+    #   jub_mitgrid <-> jub +   o----------+   |<-- ring of NaN values
     #        .              |   |          |   |
     #        .              |   |          |<--|--- area to be regridded
     #        .              |   |          |   |
@@ -241,9 +336,18 @@ def regrid( strict=False, verbose=False, **kwargs):
     #                  ilb_mitgrid  ...  iub_mitgrid
     #
 
-    # mitgrid index bounds:
-    ilb_mitgrid, jlb_mitgrid = min(i_nw,i_se), min(j_nw,j_se)
-    iub_mitgrid, jub_mitgrid = max(i_nw,i_se), max(j_nw,j_se)
+    # mitgrid index bounds, relative to the (aligned) selected range:
+    ilb_mitgrid, jlb_mitgrid = 0, 0
+    iub_mitgrid, jub_mitgrid = XG_selected.shape[0]-1, XG_selected.shape[1]-1
+
+    if band_rows:
+        # band-by-band alternative to steps 1-3, below:
+        if not outfile:
+            raise ValueError("outfile required if band_rows specified")
+        (ni_streamed,nj_streamed) = computegrid.stream_mitgridfile( outfile,
+            XG_selected,YG_selected,
+            lon_subscale,lat_subscale,geod,band_rows,planar,verbose)
+        return (None,ni_streamed,nj_streamed)
 
     # compute grid bounds:
     iLB = 0
@@ -255,42 +359,30 @@ def regrid( strict=False, verbose=False, **kwargs):
     jub = jlb + 2*lat_subscale*(jub_mitgrid-jlb_mitgrid)
     jUB = jub + 1
 
-    # compute grid initialization, allocation:
+    # compute grid initialization, allocation (or reuse of a caller-provided
+    # workspace):
     num_compute_grid_rows = iUB + 1
     num_compute_grid_cols = jUB + 1
-    compute_grid_xg = np.zeros((num_compute_grid_rows,num_compute_grid_cols))
-    compute_grid_yg = np.zeros((num_compute_grid_rows,num_compute_grid_cols))
-
-    # map mitgrid values to corresponding compute_grid locations:
-    
-    # index transformation from partitioned grid space (e.g., between lower and
-    # upper bounds) to compute grid space:
-    i_cg = lambda i_mitgrid,lon_subscale : 1 + 2*lon_subscale*i_mitgrid
-    j_cg = lambda j_mitgrid,lat_subscale : 1 + 2*lat_subscale*j_mitgrid
-
-    it = np.nditer(
-        [mitgrid['XG'][ilb_mitgrid:incl(iub_mitgrid),jlb_mitgrid:incl(jub_mitgrid)],
-         mitgrid['YG'][ilb_mitgrid:incl(iub_mitgrid),jlb_mitgrid:incl(jub_mitgrid)]],
-        flags=['multi_index'])
-    while not it.finished:
-        compute_grid_xg[
-            i_cg(it.multi_index[0],lon_subscale),
-            j_cg(it.multi_index[1],lat_subscale)] = it[0]
-        compute_grid_yg[
-            i_cg(it.multi_index[0],lon_subscale),
-            j_cg(it.multi_index[1],lat_subscale)] = it[1]
-        it.iternext()
+    if workspace is None:
+        workspace = computegrid.ComputeGrid(dtype=dtype)
+    workspace.reset((num_compute_grid_rows,num_compute_grid_cols))
+    compute_grid_xg = workspace.xg
+    compute_grid_yg = workspace.yg
+
+    # map mitgrid values to corresponding compute_grid locations, i.e., every
+    # 2*lon_subscale'th row and 2*lat_subscale'th column from ilb, jlb:
+
+    compute_grid_xg[ilb:incl(iub):2*lon_subscale,jlb:incl(jub):2*lat_subscale] = \
+        XG_selected
+    compute_grid_yg[ilb:incl(iub):2*lon_subscale,jlb:incl(jub):2*lat_subscale] = \
+        YG_selected
 
     if verbose:
         print('user-selected range:')
         print("mitgrid['XG']:")
-        print(mitgrid['XG'][
-            ilb_mitgrid:incl(iub_mitgrid),
-            jlb_mitgrid:incl(jub_mitgrid)])
+        print(XG_selected)
         print("mitgrid['YG']:")
-        print(mitgrid['YG'][
-            ilb_mitgrid:incl(iub_mitgrid),
-            jlb_mitgrid:incl(jub_mitgrid)])
+        print(YG_selected)
         print('user-selected range, mapped to compute_grid:')
         print('compute_grid_xg:')
         print(compute_grid_xg)
@@ -302,16 +394,24 @@ def regrid( strict=False, verbose=False, **kwargs):
     # user-specified subdivision level, times two ("compute grid" resolution):
     #
 
+    # unit sphere cartesian coordinates, maintained alongside xg, yg and
+    # shared by all subsequent compute grid operations:
+    compute_grid_cart = util.lonlat2cart(
+        compute_grid_xg,compute_grid_yg,out=workspace.cart)
+
     (compute_grid_xg,compute_grid_yg) = computegrid.fill(
         compute_grid_xg,compute_grid_yg, ilb,iub,jlb,jub,
-        lon_subscale,lat_subscale,geod,verbose)
+        lon_subscale,lat_subscale,geod,verbose,
+        compute_grid_cart=compute_grid_cart,workers=workers,inplace=True)
 
     #
     # Step 3: Use compute grid to generate full set of mitgrid data:
     #
 
     outgrid = computegrid.tomitgrid( compute_grid_xg, compute_grid_yg,
-        iLB, ilb, iub, iUB, jLB, jlb, jub, jUB, geod, verbose)
+        iLB, ilb, iub, iUB, jLB, jlb, jub, jUB, geod, verbose,
+        compute_grid_cart=compute_grid_cart,workers=workers,
+        workspace=workspace,planar=planar)
 
     return (
         outgrid,
@@ -324,6 +424,7 @@ def main():
 
     parser = create_parser()
     args = parser.parse_args()
+    stats = util.Stats(trace_memory=args.trace_memory) if args.stats else None
     (newgrid,ni_regridded,nj_regridded) = regrid(
         args.strict,
         args.verbose,
@@ -337,13 +438,30 @@ def main():
         lon2        = args.lon2,
         lat2        = args.lat2,
         lon_subscale= args.lon_subscale,
-        lat_subscale= args.lat_subscale)
-    if args.verbose:
-        print('writing {0:s} with ni={1:d}, nj={2:d}...'.
-            format(args.outfile,ni_regridded,nj_regridded))
-    gridio.write_mitgridfile(args.outfile,newgrid,ni_regridded,nj_regridded)
-    if args.verbose:
-        print('...done.')
+        lat_subscale= args.lat_subscale,
+        workers     = args.workers,
+        dtype       = args.dtype,
+        band_rows   = args.band_rows,
+        planar      = None if args.areas is None else args.areas=='planar',
+        outfile     = args.outfile,
+        stats       = stats,
+        index_cache = args.index_cache)
+    if not args.band_rows:
+        # (otherwise, already written, band-by-band)
+        if args.verbose:
+            print('writing {0:s} with ni={1:d}, nj={2:d}...'.
+                format(args.outfile,ni_regridded,nj_regridded))
+        with util.collect_stats(stats), util.stage('write'):
+            gridio.write_mitgridfile(
+                args.outfile,newgrid,ni_regridded,nj_regridded,
+                sidecar=args.sidecar)
+        if args.verbose:
+            print('...done.')
+    elif args.sidecar:
+        gridio.write_mitgridfile_sidecar(
+            args.outfile,ni_regridded,nj_regridded)
+    if args.stats:
+        print(stats)
 
 if __name__ == '__main__':
     main()
@@ -17,22 +17,25 @@ def create_parser():
             Join two tiles along a common edge.""")
     parser.add_argument('--tilea', required=True, help="""
         (path and) file name of first tile (mitgridfile format)""")
-    parser.add_argument('--nia', type=int, required=True, help="""
+    parser.add_argument('--nia', type=int, help="""
         number of tracer points in model grid 'x' direction for the first
-        tile""")
-    parser.add_argument('--nja', type=int, required=True, help="""
+        tile (required unless tilea has a sidecar)""")
+    parser.add_argument('--nja', type=int, help="""
         number of tracer points in model grid 'y' direction for the first
-        tile""")
+        tile (required unless tilea has a sidecar)""")
     parser.add_argument('--tileb', required=True, help="""
         (path and) file name of second tile (mitgridfile format)""")
-    parser.add_argument('--nib', type=int, required=True, help="""
+    parser.add_argument('--nib', type=int, help="""
         number of tracer points in model grid 'x' direction for the second
-        tile""")
-    parser.add_argument('--njb', type=int, required=True, help="""
+        tile (required unless tileb has a sidecar)""")
+    parser.add_argument('--njb', type=int, help="""
         number of tracer points in model grid 'y' direction for the second
-        tile""")
+        tile (required unless tileb has a sidecar)""")
     parser.add_argument('--outfile', required=True, help="""
         file to which combined tiles will be written (mitgridfile format)""")
+    parser.add_argument('--sidecar',action='store_true',help="""
+        also write an outfile sidecar (outfile.json) describing the grid, its
+        dimensions, checksums and extent""")
     parser.add_argument('-s','--strict',action='store_true', help="""
         raise error if nonzero terms found in any of the standard mitgrid matrix
         row/colum padding dimensions (e.g., last row and column of XG, YG,
@@ -53,15 +56,15 @@ def stitch( strict=False, verbose=False, **kwargs):
 
     Kwargs:
         tilea (str, required): mitgrid (path and) filename of first tile.
-        nia (int, required): number of tracer points in the model grid 'x'
-            direction for tile a.
-        nja (int, required): number of tracer points in the model grid 'y'
-            direction for tile a.
+        nia (int, required unless tilea has a sidecar): number of
+            tracer points in the model grid 'x' direction for tile a.
+        nja (int, required unless tilea has a sidecar): number of
+            tracer points in the model grid 'y' direction for tile a.
         tileb (str, required): mitgrid (path and) filename of second tile.
-        nib (int, required): number of tracer points in the model grid 'x'
-            direction for tile b.
-        njb (int, required): number of tracer points in the model grid 'y'
-            direction for tile b.
+        nib (int, required unless tileb has a sidecar): number of
+            tracer points in the model grid 'x' direction for tile b.
+        njb (int, required unless tileb has a sidecar): number of
+            tracer points in the model grid 'y' direction for tile b.
 
     Returns:
         (c,nic,njc): combined tile (mitgrid dictionary of named numpy arrays)
@@ -223,7 +226,7 @@ def main():
             'writing combined tile to {0:s} with ni={1:d}, nj={2:d}...'.format(
             args.outfile,nic,njc))
 
-    gridio.write_mitgridfile(args.outfile,c,nic,njc)
+    gridio.write_mitgridfile(args.outfile,c,nic,njc,sidecar=args.sidecar)
 
     if args.verbose:
         print('...done.')
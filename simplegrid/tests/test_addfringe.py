@@ -1,4 +1,6 @@
 
+import os
+import tempfile
 import unittest
 import simplegrid as sg
 import numpy.testing as nptest
@@ -237,6 +239,33 @@ class TestAddfringe(unittest.TestCase):
             nptest.assert_almost_equal(new_tilea_grid[a],validated_grid[b])
 
 
+    def test_addfringe_9(self):
+        """Tile A terms that are zero-valued, but defined (as for tracer cell
+        centers on the prime meridian and equator), are retained as such.
+        """
+
+        (tilea,_,_) = sg.mkgrid.mkgrid(
+            lon1=-1., lat1=1., lon2=3., lat2=-1., lon_subscale=1,
+            lat_subscale=1)
+        (tileb,_,_) = sg.mkgrid.mkgrid(
+            lon1=3., lat1=1., lon2=5., lat2=-1., lon_subscale=1,
+            lat_subscale=1)
+        # (e.g., as per some other tile generator):
+        tilea['XC'][...] = 0.
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (tilea_file,tileb_file) = (
+                os.path.join(tmpdir,'tile_A.mitgrid'),
+                os.path.join(tmpdir,'tile_B.mitgrid'))
+            sg.gridio.write_mitgridfile(tilea_file,tilea,1,1)
+            sg.gridio.write_mitgridfile(tileb_file,tileb,1,1)
+            (_,_,new_tilea_grid) = sg.addfringe.addfringe(
+                tilea=tilea_file,nia=1,nja=1,tileb=tileb_file,nib=1,njb=1)
+
+        for name in sg.mitgridfilefields.names:
+            nptest.assert_array_equal(new_tilea_grid[name],tilea[name])
+
+
 if __name__=='__main__':
     unittest.main()
 
@@ -0,0 +1,71 @@
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+import pyproj
+import simplegrid as sg
+
+
+class TestAreas(unittest.TestCase):
+
+    def test_squad_uarea_1(self):
+        """Spherical quadrilateral areas for a subset of llc 90 tile cells,
+        compared against pyproj polygon areas on the same sphere.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        XG = mg['XG'][0:5,0:4]
+        YG = mg['YG'][0:5,0:4]
+
+        areas = sg.util.squad_uarea(sg.util.lonlat2cart(XG,YG)) * geod.a**2
+
+        for i in range(XG.shape[0]-1):
+            for j in range(XG.shape[1]-1):
+                (area,_) = geod.polygon_area_perimeter(
+                    (XG[i,j],XG[i+1,j],XG[i+1,j+1],XG[i,j+1]),
+                    (YG[i,j],YG[i+1,j],YG[i+1,j+1],YG[i,j+1]))
+                nptest.assert_allclose(areas[i,j],abs(area),rtol=1.e-9)
+
+
+    def test_squad_uarea_2(self):
+        """Spherical quadrilateral area for a small (approx. 100m x 100m) cell.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        XG = np.array([[0.,0.],[0.001,0.001]])
+        YG = np.array([[0.,0.001],[0.,0.001]])
+
+        area = sg.util.squad_uarea(sg.util.lonlat2cart(XG,YG))[0,0] * geod.a**2
+        (ref_area,_) = geod.polygon_area_perimeter(
+            (0.,0.001,0.001,0.),(0.,0.,0.001,0.001))
+
+        nptest.assert_allclose(area,abs(ref_area),rtol=1.e-9)
+
+
+    def test_pquad_uarea_1(self):
+        """Planar quadrilateral areas written into a preallocated buffer,
+        compared against a cell-by-cell cross product computation.
+        """
+
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        cart = sg.util.lonlat2cart(mg['XG'][0:5,0:4],mg['YG'][0:5,0:4])
+
+        buffer = np.zeros((6,5))
+        areas = sg.util.pquad_uarea(cart,out=buffer[1:5,1:4])
+        self.assertIs(areas.base,buffer)
+        nptest.assert_equal(buffer[0,:],0.)
+        nptest.assert_equal(buffer[:,0],0.)
+
+        for i in range(cart.shape[0]-1):
+            for j in range(cart.shape[1]-1):
+                ab = cart[i+1,j  ,:] - cart[i,j,:]
+                ac = cart[i+1,j+1,:] - cart[i,j,:]
+                ad = cart[i  ,j+1,:] - cart[i,j,:]
+                nptest.assert_allclose(areas[i,j],
+                    0.5*np.linalg.norm(np.cross(ab,ac)+np.cross(ac,ad)),
+                    rtol=1.e-14)
+
+
+if __name__=='__main__':
+    unittest.main()
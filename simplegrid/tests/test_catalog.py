@@ -0,0 +1,87 @@
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import simplegrid as sg
+
+
+class TestCatalog(unittest.TestCase):
+
+    tiles = [
+        ('./data/tile005.mitgrid',270,90),
+        ('./data/tile_A_2x2.mitgrid',2,2),
+        ('./data/tile_B_W_2x2.mitgrid',2,2)]
+
+    def test_catalog_1(self):
+        catalog = sg.catalog.build_catalog(self.tiles)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            catalog_file = os.path.join(tmpdir,'tiles.json')
+            sg.catalog.write_catalogfile(catalog_file,catalog)
+            self.assertEqual(sg.catalog.read_catalogfile(catalog_file),catalog)
+        self.assertEqual(
+            [(t['filename'],t['ni'],t['nj']) for t in catalog['tiles']],
+            self.tiles)
+        self.assertEqual(catalog['tiles'][1]['corners'],
+            {'XG':[0.,1.,1.,0.],'YG':[0.,0.,1.,1.]})
+
+    def test_catalog_sidecar(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tile = os.path.join(tmpdir,'tile005.mitgrid')
+            sg.gridio.write_mitgridfile(tile,mg,270,90,sidecar=True)
+            # (extents from the sidecar, or from the data):
+            catalog = sg.catalog.build_catalog([tile])
+            os.remove(sg.gridio.sidecar_filename(tile))
+            self.assertEqual(
+                catalog,sg.catalog.build_catalog([(tile,270,90)]))
+
+            sg.gridio.write_mitgridfile_sidecar(tile,270,90)
+            with self.assertRaises(ValueError):
+                sg.catalog.build_catalog([(tile,90,270)])
+
+    def test_find_point(self):
+        # every tracer cell center point of a tile is found:
+        catalog = sg.catalog.build_catalog(self.tiles)
+        names = lambda tiles: [t['filename'] for t in tiles]
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        for (lon,lat) in zip(mg['XC'].ravel(),mg['YC'].ravel()):
+            self.assertIn('./data/tile005.mitgrid',
+                names(sg.catalog.find_point(catalog,lon,lat)))
+
+        # (tile005 extents, which reach within a degree of the south pole,
+        # span all longitudes, so consider just the two small tiles here):
+        catalog = sg.catalog.build_catalog(self.tiles[1:])
+        self.assertEqual(names(sg.catalog.find_point(catalog,0.75,0.25)),
+            ['./data/tile_A_2x2.mitgrid'])
+        self.assertEqual(names(sg.catalog.find_point(catalog,-0.75,0.25)),
+            ['./data/tile_B_W_2x2.mitgrid'])
+        self.assertEqual(sg.catalog.find_point(catalog,100.,0.),[])
+
+    def test_find_box(self):
+        catalog = sg.catalog.build_catalog(self.tiles[1:])
+        names = lambda tiles: [t['filename'] for t in tiles]
+        self.assertEqual(names(sg.catalog.find_box(catalog,0.8,1.,1.,0.)),
+            ['./data/tile_A_2x2.mitgrid'])
+        self.assertEqual(names(sg.catalog.find_box(catalog,-2.,3.,2.,-3.)),
+            ['./data/tile_A_2x2.mitgrid','./data/tile_B_W_2x2.mitgrid'])
+        self.assertEqual(sg.catalog.find_box(catalog,5.,3.,175.,-3.),[])
+        # boxes may span the antimeridian:
+        self.assertEqual(names(sg.catalog.find_box(catalog,170.,1.,-0.8,0.)),
+            ['./data/tile_B_W_2x2.mitgrid'])
+
+        # tiles spanning the antimeridian:
+        (mg,_,_) = sg.mkgrid.mkgrid(
+            lon1=170., lat1=10., lon2=-170., lat2=-10.,
+            lon_subscale=20, lat_subscale=20)
+        (cap,box) = sg.catalog.tile_extent(mg['XG'],mg['YG'])
+        self.assertTrue(box['lon_min']<170. and box['lon_max']>190.)
+        self.assertTrue(box['lon_max']-box['lon_min']<25.)
+        self.assertAlmostEqual(cap['lon']%360.,180.)
+        np.testing.assert_allclose(cap['lat'],0.,atol=1.e-12)
+
+
+if __name__=='__main__':
+    unittest.main()
+
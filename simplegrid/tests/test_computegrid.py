@@ -0,0 +1,378 @@
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+import pyproj
+import simplegrid as sg
+
+
+def _compute_grid( XG, YG, lon_subscale, lat_subscale):
+    """Map XG, YG onto a NaN-ringed compute grid, as in regrid.regrid()."""
+    (ni,nj) = XG.shape
+    compute_grid_xg = np.full(
+        (2*lon_subscale*(ni-1)+3,2*lat_subscale*(nj-1)+3), np.nan)
+    compute_grid_yg = np.full(compute_grid_xg.shape, np.nan)
+    compute_grid_xg[1:-1:2*lon_subscale,1:-1:2*lat_subscale] = XG
+    compute_grid_yg[1:-1:2*lon_subscale,1:-1:2*lat_subscale] = YG
+    (iub,jub) = (compute_grid_xg.shape[0]-2,compute_grid_xg.shape[1]-2)
+    return compute_grid_xg, compute_grid_yg, 1, iub, 1, jub
+
+
+class TestComputeGrid(unittest.TestCase):
+
+    def setUp(self):
+        spherical_backend = sg.config.SPHERICAL_BACKEND
+        def restore():
+            sg.config.SPHERICAL_BACKEND = spherical_backend
+        self.addCleanup(restore)
+
+    def test_edges_1(self):
+        """Batched edge lengths of a filled llc 90 tile subdomain compute
+        grid, compared against one geod.inv call per edge.
+        """
+
+        sg.config.SPHERICAL_BACKEND = False
+        geod = pyproj.Geod(ellps='WGS84')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid(
+            mg['XG'][100:106,10:14], mg['YG'][100:106,10:14], 2, 3)
+        (xg,yg) = sg.computegrid.fill(xg, yg, ilb, iub, jlb, jub, 2, 3, geod)
+
+        (edges_x,edges_y) = sg.computegrid.edges(
+            xg, yg, ilb, iub, jlb, jub, geod)
+
+        edges_x_ref = np.full((xg.shape[0]-1,xg.shape[1]),np.nan)
+        edges_y_ref = np.full((xg.shape[0],xg.shape[1]-1),np.nan)
+        for i in range(ilb,iub+1):
+            for j in range(jlb,jub+1):
+                if i<iub:
+                    edges_x_ref[i,j] = geod.inv(
+                        xg[i,j],yg[i,j],xg[i+1,j],yg[i+1,j])[2]
+                if j<jub:
+                    edges_y_ref[i,j] = geod.inv(
+                        xg[i,j],yg[i,j],xg[i,j+1],yg[i,j+1])[2]
+
+        # identical, including the undefined ring outside ilb..iub, jlb..jub:
+        nptest.assert_array_equal(edges_x, edges_x_ref)
+        nptest.assert_array_equal(edges_y, edges_y_ref)
+
+
+    def test_fill_batched_1(self):
+        """Batched and edge-by-edge fill of an llc 90 tile subdomain.
+        """
+
+        sg.config.SPHERICAL_BACKEND = False
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid(
+            mg['XG'][100:120,10:25], mg['YG'][100:120,10:25], 3, 2)
+
+        (xg_ref,yg_ref) = sg.computegrid.fill(
+            xg, yg, ilb, iub, jlb, jub, 3, 2, geod)
+        (xg_bat,yg_bat) = sg.computegrid.fill(
+            xg, yg, ilb, iub, jlb, jub, 3, 2, geod, batched=True)
+
+        nptest.assert_allclose(xg_bat, xg_ref, rtol=0., atol=1.e-10)
+        nptest.assert_allclose(yg_bat, yg_ref, rtol=0., atol=1.e-10)
+
+
+    def test_fill_batched_2(self):
+        """Batched and edge-by-edge fill across the prime meridian using 0 to
+        360 degree longitudes.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        XG = np.array([[350.,350.],[10.,10.]])
+        YG = np.array([[-5.,10.],[-5.,10.]])
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid( XG, YG, 3, 2)
+
+        (xg_ref,yg_ref) = sg.computegrid.fill(
+            xg, yg, ilb, iub, jlb, jub, 3, 2, geod)
+        (xg_bat,yg_bat) = sg.computegrid.fill(
+            xg, yg, ilb, iub, jlb, jub, 3, 2, geod, batched=True)
+
+        nptest.assert_allclose(xg_bat, xg_ref, rtol=0., atol=1.e-10)
+        nptest.assert_allclose(yg_bat, yg_ref, rtol=0., atol=1.e-10)
+
+
+    def test_spherical_backend_1(self):
+        """Closed-form spherical fill and edge lengths compared against pyproj
+        for an llc 90 tile subdomain.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid(
+            mg['XG'][200:215,60:70], mg['YG'][200:215,60:70], 2, 3)
+
+        results = []
+        for spherical_backend in (False,True):
+            sg.config.SPHERICAL_BACKEND = spherical_backend
+            (xg_filled,yg_filled) = sg.computegrid.fill(
+                xg, yg, ilb, iub, jlb, jub, 2, 3, geod)
+            (edges_x,edges_y) = sg.computegrid.edges(
+                xg_filled, yg_filled, ilb, iub, jlb, jub, geod)
+            results.append((xg_filled,yg_filled,edges_x,edges_y))
+
+        for (pyproj_result,spherical_result) in zip(*results):
+            nptest.assert_allclose(
+                spherical_result, pyproj_result, rtol=1.e-12, atol=1.e-9)
+
+
+    def test_spherical_backend_2(self):
+        """Closed-form spherical subdivision across the antimeridian compared
+        against pyproj.Geod.npts.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        lon1 = np.array([[-170.,175.,10.]])
+        lat1 = np.array([[ -60.,45.,-0.]])
+        lon2 = np.array([[ 170.,-175.,10.]])
+        lat2 = np.array([[  60.,46.,80.]])
+
+        (lons,lats) = sg.util.sphere_npts(lon1,lat1,lon2,lat2,7)
+
+        for j in range(lon1.shape[1]):
+            ref = np.array(geod.npts(lon1[0,j],lat1[0,j],lon2[0,j],lat2[0,j],7))
+            nptest.assert_allclose(lons[0,j,:],ref[:,0],rtol=0.,atol=1.e-10)
+            nptest.assert_allclose(lats[0,j,:],ref[:,1],rtol=0.,atol=1.e-10)
+
+
+    def test_unit_vectors_1(self):
+        """Fill, edge and area calculations with and without a shared compute
+        grid cartesian coordinate array.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid(
+            mg['XG'][30:40,50:58], mg['YG'][30:40,50:58], 3, 2)
+
+        compute_grid_cart = sg.util.lonlat2cart(xg,yg)
+        (xg_cart,yg_cart) = sg.computegrid.fill(
+            xg, yg, ilb, iub, jlb, jub, 3, 2, geod,
+            compute_grid_cart=compute_grid_cart)
+        (xg_ref,yg_ref) = sg.computegrid.fill(
+            xg, yg, ilb, iub, jlb, jub, 3, 2, geod)
+
+        nptest.assert_allclose(xg_cart, xg_ref, rtol=0., atol=1.e-10)
+        nptest.assert_allclose(yg_cart, yg_ref, rtol=0., atol=1.e-10)
+        nptest.assert_allclose(
+            compute_grid_cart, sg.util.lonlat2cart(xg_cart,yg_cart),
+            rtol=0., atol=1.e-14)
+
+        mg_cart = sg.computegrid.tomitgrid(
+            xg_cart, yg_cart, 0, ilb, iub, iub+1, 0, jlb, jub, jub+1, geod,
+            compute_grid_cart=compute_grid_cart)
+        mg_ref = sg.computegrid.tomitgrid(
+            xg_ref, yg_ref, 0, ilb, iub, iub+1, 0, jlb, jub, jub+1, geod)
+        for name in sg.mitgridfilefields.names:
+            nptest.assert_allclose(mg_cart[name], mg_ref[name], rtol=1.e-10)
+
+
+    def test_workers_1(self):
+        """Single- and multi-process (row band) fill and mitgrid generation
+        for an llc 90 tile subdomain.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid(
+            mg['XG'][100:120,10:25], mg['YG'][100:120,10:25], 3, 2)
+
+        results = []
+        for workers in (1,3):
+            compute_grid_cart = sg.util.lonlat2cart(xg,yg)
+            (xg_filled,yg_filled) = sg.computegrid.fill(
+                xg, yg, ilb, iub, jlb, jub, 3, 2, geod,
+                compute_grid_cart=compute_grid_cart, workers=workers)
+            mg_filled = sg.computegrid.tomitgrid(
+                xg_filled, yg_filled, 0, ilb, iub, iub+1, 0, jlb, jub, jub+1,
+                geod, compute_grid_cart=compute_grid_cart, workers=workers)
+            results.append((xg_filled,yg_filled,compute_grid_cart,mg_filled))
+
+        for (serial,banded) in zip(results[0][:3],results[1][:3]):
+            nptest.assert_array_equal(banded, serial)
+        for name in sg.mitgridfilefields.names:
+            nptest.assert_array_equal(results[1][3][name], results[0][3][name])
+
+
+    def test_workers_2(self):
+        """Single- and multi-process (row band) batched fill and mitgrid
+        generation for an ellipsoidal geoid.
+        """
+
+        geod = pyproj.Geod(ellps='WGS84')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid(
+            mg['XG'][40:52,70:78], mg['YG'][40:52,70:78], 2, 2)
+
+        (xg_ref,yg_ref) = sg.computegrid.fill(
+            xg, yg, ilb, iub, jlb, jub, 2, 2, geod, batched=True)
+        (xg_par,yg_par) = sg.computegrid.fill(
+            xg, yg, ilb, iub, jlb, jub, 2, 2, geod, workers=4)
+        nptest.assert_array_equal(xg_par, xg_ref)
+        nptest.assert_array_equal(yg_par, yg_ref)
+
+        mg_ref = sg.computegrid.tomitgrid(
+            xg_ref, yg_ref, 0, ilb, iub, iub+1, 0, jlb, jub, jub+1, geod)
+        mg_par = sg.computegrid.tomitgrid(
+            xg_ref, yg_ref, 0, ilb, iub, iub+1, 0, jlb, jub, jub+1, geod,
+            workers=4)
+        for name in sg.mitgridfilefields.names:
+            nptest.assert_array_equal(mg_par[name], mg_ref[name])
+
+
+    def test_workers_3(self):
+        """Single- and multi-process (row band) fill and mitgrid generation
+        for several llc 90 tile subdomains and subdivision levels.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        for (window,lon_subscale,lat_subscale) in (
+            (np.s_[ 10: 30, 5:20], 4, 5),
+            (np.s_[ 50: 70,30:45], 5, 5),
+            (np.s_[150:170,40:55], 7, 3),
+            (np.s_[  0: 40, 0:30], 2, 2),
+            (np.s_[200:260,20:80], 1, 1)):
+            (xg,yg,ilb,iub,jlb,jub) = _compute_grid(
+                mg['XG'][window], mg['YG'][window], lon_subscale, lat_subscale)
+
+            results = []
+            for workers in (1,4):
+                compute_grid_cart = sg.util.lonlat2cart(xg,yg)
+                (xg_filled,yg_filled) = sg.computegrid.fill(
+                    xg, yg, ilb, iub, jlb, jub, lon_subscale, lat_subscale,
+                    geod, compute_grid_cart=compute_grid_cart, workers=workers)
+                mg_filled = sg.computegrid.tomitgrid(
+                    xg_filled, yg_filled, 0, ilb, iub, iub+1, 0, jlb, jub,
+                    jub+1, geod, compute_grid_cart=compute_grid_cart,
+                    workers=workers)
+                results.append(
+                    (xg_filled,yg_filled,compute_grid_cart,mg_filled))
+
+            for (serial,banded) in zip(results[0][:3],results[1][:3]):
+                nptest.assert_array_equal(banded, serial)
+            for name in sg.mitgridfilefields.names:
+                nptest.assert_array_equal(
+                    results[1][3][name], results[0][3][name])
+
+
+    def test_workspace_1(self):
+        """Repeated (single- and multi-process) grid generation in a single
+        ComputeGrid workspace, compared against that using newly-allocated
+        compute grids.
+        """
+
+        workspace = sg.computegrid.ComputeGrid()
+        corners = ((1.,3.,4.,1.),(-4.,65.,0.,60.))
+        grids = []
+        for workers in (1,3):
+            for (lon1,lat1,lon2,lat2) in corners:
+                (grid,_,_) = sg.mkgrid.mkgrid(
+                    lon1=lon1, lat1=lat1, lon2=lon2, lat2=lat2,
+                    lon_subscale=6, lat_subscale=4, workspace=workspace,
+                    workers=workers)
+                if not grids:
+                    buffers = (workspace.xg,workspace.areas)
+                grids.append(grid)
+        self.assertIs(workspace.xg,buffers[0])
+        self.assertIs(workspace.areas,buffers[1])
+
+        for ((lon1,lat1,lon2,lat2),grid) in zip(corners*2,grids):
+            (ref,_,_) = sg.mkgrid.mkgrid(
+                lon1=lon1, lat1=lat1, lon2=lon2, lat2=lat2,
+                lon_subscale=6, lat_subscale=4)
+            for name in sg.mitgridfilefields.names:
+                nptest.assert_array_equal(grid[name], ref[name])
+
+
+    def test_compact_1(self):
+        """Compact (default) and compute grid view tomitgrid results.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid(
+            mg['XG'][60:66,20:25], mg['YG'][60:66,20:25], 2, 3)
+        (xg,yg) = sg.computegrid.fill(xg, yg, ilb, iub, jlb, jub, 2, 3, geod)
+
+        mg_compact = sg.computegrid.tomitgrid(
+            xg, yg, 0, ilb, iub, iub+1, 0, jlb, jub, jub+1, geod)
+        mg_views = sg.computegrid.tomitgrid(
+            xg, yg, 0, ilb, iub, iub+1, 0, jlb, jub, jub+1, geod,
+            compact=False)
+
+        self.assertIs(mg_views['XG'].base,xg)
+        for name in sg.mitgridfilefields.names:
+            self.assertIsNone(mg_compact[name].base)
+            self.assertTrue(mg_compact[name].flags.f_contiguous)
+            nptest.assert_array_equal(mg_compact[name], mg_views[name])
+
+
+    def test_undefined_1(self):
+        """Undefined (NaN) boundary ring edge lengths, and corresponding zero
+        mitgrid terms, for a grid with prime meridian/equator corners and
+        zero-length polar edges.
+        """
+
+        geod = pyproj.Geod(ellps='sphere')
+        XG = np.array([[0.,0.],[10.,10.]])
+        YG = np.array([[0.,90.],[0.,90.]])
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid( XG, YG, 2, 3)
+        (xg,yg) = sg.computegrid.fill(xg, yg, ilb, iub, jlb, jub, 2, 3, geod)
+
+        (edges_x,edges_y) = sg.computegrid.edges(
+            xg, yg, ilb, iub, jlb, jub, geod)
+        self.assertTrue(np.all(np.isnan(edges_x[0,:])))
+        self.assertTrue(np.all(np.isnan(edges_y[:,0])))
+        nptest.assert_allclose(edges_x[ilb:iub,jub], 0., atol=1.e-6)
+
+        mg = sg.computegrid.tomitgrid(
+            xg, yg, 0, ilb, iub, iub+1, 0, jlb, jub, jub+1, geod)
+        for name in sg.mitgridfilefields.names:
+            self.assertFalse(np.any(np.isnan(mg[name])))
+        nptest.assert_allclose(mg['DXG'][:,-1], 0., atol=1.e-6)
+        self.assertTrue(np.all(mg['DXG'][:,:-1]>0.))
+        nptest.assert_equal(mg['DXC'][0,:], 0.)
+        self.assertTrue(np.all(mg['DXC'][1:-1,:]>0.))
+        self.assertTrue(np.all(mg['RAC']>0.))
+
+
+    def test_stats_1(self):
+        """Geodesic call counts and stage records for edge-by-edge, batched
+        and banded pyproj fill and edge calculations.
+        """
+
+        sg.config.SPHERICAL_BACKEND = False
+        geod = pyproj.Geod(ellps='sphere')
+        XG = np.array([[0.,0.,0.],[1.,1.,1.]])
+        YG = np.array([[0.,1.,2.],[0.,1.,2.]])
+        (xg,yg,ilb,iub,jlb,jub) = _compute_grid( XG, YG, 2, 3)
+
+        # 1*3 coarse x-edges of 3 points, then 5*2 y-edges of 5 points:
+        stats = sg.util.Stats()
+        with sg.util.collect_stats(stats):
+            sg.computegrid.fill(xg, yg, ilb, iub, jlb, jub, 2, 3, geod)
+        self.assertEqual(stats.calls, {'npts':[13,59]})
+        self.assertEqual(stats.stages['fill'][0], 1)
+
+        for workers in (1,2):
+            stats = sg.util.Stats()
+            with sg.util.collect_stats(stats):
+                (xg_f,yg_f) = sg.computegrid.fill(
+                    xg, yg, ilb, iub, jlb, jub, 2, 3, geod, batched=True)
+                sg.computegrid.edges(
+                    xg_f, yg_f, ilb, iub, jlb, jub, geod, workers=workers)
+            self.assertEqual(stats.calls['fwd'][1], 3*3+5*2*5)
+            # (y-edges along the row shared by two bands are computed twice):
+            self.assertEqual(
+                stats.calls['inv'][1], 3+5*2+4*13+(5+workers-1)*12)
+            self.assertEqual(list(stats.stages), ['fill','edges'])
+
+        self.assertIsNone(sg.util.active_stats())
+
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+
+import filecmp
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import simplegrid as sg
+
+
+class TestGridio(unittest.TestCase):
+
+    def test_read_mmap(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        mg_mapped = sg.gridio.read_mitgridfile(
+            './data/tile005.mitgrid', 270, 90, strict=True, mmap=True)
+        self.assertEqual(list(mg_mapped),list(mg))
+        for name in mg:
+            self.assertIsInstance(mg_mapped[name],np.memmap)
+            self.assertEqual(mg_mapped[name].shape,mg[name].shape)
+            np.testing.assert_array_equal(mg_mapped[name],mg[name])
+
+        # modifiable in memory only:
+        mg_mapped['XG'][0,0] = 0.
+        mg_mapped = sg.gridio.read_mitgridfile(
+            './data/tile005.mitgrid', 270, 90, mmap=True)
+        self.assertEqual(mg_mapped['XG'][0,0],mg['XG'][0,0])
+
+    def test_read_fields(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        for mmap in (False,True):
+            mg_fields = sg.gridio.read_mitgridfile(
+                './data/tile005.mitgrid', 270, 90, strict=True, mmap=mmap,
+                fields=('YG','XG','RAC'))
+            self.assertEqual(list(mg_fields),['YG','XG','RAC'])
+            for name in mg_fields:
+                self.assertEqual(mg_fields[name].shape,mg[name].shape)
+                np.testing.assert_array_equal(mg_fields[name],mg[name])
+
+        with self.assertRaises(ValueError):
+            sg.gridio.read_mitgridfile(
+                './data/tile005.mitgrid', 270, 90, fields=('XG','ZG'))
+
+    def test_read_window(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        for (i0,i1,j0,j1) in (
+            (10,20,30,45),(0,271,5,7),(265,271,85,91),(0,271,0,91),(5,5,0,3)):
+            mg_window = sg.gridio.read_mitgridfile_window(
+                './data/tile005.mitgrid', 270, 90, i0, i1, j0, j1)
+            self.assertEqual(list(mg_window),list(mg))
+            for name in mg:
+                np.testing.assert_array_equal(
+                    mg_window[name],mg[name][i0:i1,j0:j1])
+
+        mg_window = sg.gridio.read_mitgridfile_window(
+            './data/tile005.mitgrid', 270, 90, 100, 104, 40, 42,
+            fields=('XG','YG'))
+        self.assertEqual(list(mg_window),['XG','YG'])
+
+        with self.assertRaises(ValueError):
+            sg.gridio.read_mitgridfile_window(
+                './data/tile005.mitgrid', 270, 90, 0, 272, 0, 10)
+
+    def test_write(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        chunk_size = sg.config.MITGRID_WRITE_CHUNK_SIZE
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = os.path.join(tmpdir,'tile005.mitgrid')
+            try:
+                # single column, several column, and whole matrix chunks:
+                for write_chunk_size in (1,1000,2**20):
+                    sg.config.MITGRID_WRITE_CHUNK_SIZE = write_chunk_size
+                    sg.gridio.write_mitgridfile(outfile,mg,270,90)
+                    self.assertTrue(filecmp.cmp(
+                        outfile,'./data/tile005.mitgrid',shallow=False))
+            finally:
+                sg.config.MITGRID_WRITE_CHUNK_SIZE = chunk_size
+
+            # empty fields are written as NaNs (and padded with zeros):
+            mg['RAZ'] = None
+            mg['DXC'] = np.float32(mg['DXC'])
+            sg.gridio.write_mitgridfile(outfile,mg,270,90)
+            mg_written = sg.gridio.read_mitgridfile(
+                outfile, 270, 90, strict=True)
+            self.assertTrue(np.all(np.isnan(mg_written['RAZ'])))
+            np.testing.assert_array_equal(mg_written['DXC'],mg['DXC'])
+            np.testing.assert_array_equal(mg_written['XG'],mg['XG'])
+
+    def test_sidecar(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = os.path.join(tmpdir,'tile005.mitgrid')
+            sg.gridio.write_mitgridfile(outfile,mg,270,90,sidecar=True)
+            sidecar = sg.gridio.read_sidecar(outfile)
+            self.assertEqual((sidecar['ni'],sidecar['nj']),(270,90))
+            self.assertTrue(sidecar['zero_padded'])
+            self.assertEqual(sidecar['corners']['XG'],
+                [float(x) for x in mg['XG'][[0,-1,-1,0],[0,0,-1,-1]]])
+
+            # same sidecar whether written with, or after, the data:
+            sg.gridio.write_mitgridfile_sidecar(outfile,270,90)
+            self.assertEqual(sg.gridio.read_sidecar(outfile),sidecar)
+            self.assertEqual(sg.gridio.verify_sidecar(outfile),[])
+
+            # auto-sizing, and checking, of ni, nj:
+            for kwargs in ({},{'mmap':True},{'fields':('XG',)}):
+                mg_read = sg.gridio.read_mitgridfile(
+                    outfile, strict=True, **kwargs)
+                np.testing.assert_array_equal(mg_read['XG'],mg['XG'])
+            (_,sidecar_read) = sg.gridio.read_mitgridfile(
+                outfile, mmap=True, return_sidecar=True)
+            self.assertEqual(sidecar_read,sidecar)
+            mg_window = sg.gridio.read_mitgridfile_window(
+                outfile, None, None, 3, 5, 7, 9, fields=('YG',))
+            np.testing.assert_array_equal(mg_window['YG'],mg['YG'][3:5,7:9])
+            with self.assertRaises(ValueError):
+                sg.gridio.read_mitgridfile(outfile, 90, 270)
+
+            # modified data no longer match sidecar checksums:
+            k = sg.mitgridfilefields.names.index('DXV')
+            with open(outfile,'r+b') as fd:
+                fd.seek(k*271*91*8)
+                fd.write(np.array(mg['DXV'][0,0]+1.,dtype='>f8').tobytes())
+            self.assertEqual(sg.gridio.verify_sidecar(outfile),['DXV'])
+
+            # padding is checked even if the (stale) sidecar records it as
+            # zero:
+            k = sg.mitgridfilefields.names.index('XC')
+            with open(outfile,'r+b') as fd:
+                fd.seek((k*271*91+270)*8)
+                fd.write(np.array(1.,dtype='>f8').tobytes())
+            self.assertTrue(sg.gridio.read_sidecar(outfile)['zero_padded'])
+            with self.assertRaises(RuntimeError):
+                sg.gridio.read_mitgridfile(outfile, strict=True)
+
+            # sidecars do not survive mapping for writing (e.g., of nonzero
+            # padding terms):
+            sg.gridio.write_mitgridfile(outfile,mg,270,90,sidecar=True)
+            mapped = sg.gridio.memmap_mitgridfile(outfile,mode='r+')
+            self.assertIsNone(sg.gridio.read_sidecar(outfile))
+            mapped[270,0,sg.mitgridfilefields.names.index('XC')] = 1.
+            mapped.flush()
+            del mapped
+            with self.assertRaises(RuntimeError):
+                sg.gridio.read_mitgridfile(outfile, 270, 90, strict=True)
+            sg.gridio.write_mitgridfile(outfile,mg,270,90,sidecar=True)
+            mapped = np.memmap(outfile,dtype=sg.mitgridfilefields.datatype,
+                mode='r+',shape=(271,91,len(sg.mitgridfilefields.names)),
+                order='F')
+            sg.gridio.write_mitgridfile_rows(mapped,0,mg)
+            del mapped
+            self.assertIsNone(sg.gridio.read_sidecar(outfile))
+
+            # stale sidecars are removed, or flagged if not:
+            sg.gridio.write_mitgridfile(outfile,mg,270,90)
+            self.assertIsNone(sg.gridio.read_sidecar(outfile))
+            with self.assertRaises(ValueError):
+                sg.gridio.read_mitgridfile(outfile)
+            sg.gridio.write_mitgridfile_sidecar(outfile,270,90)
+            with open(outfile,'ab') as fd:
+                fd.write(b'0')
+            with self.assertRaises(ValueError):
+                sg.gridio.read_sidecar(outfile)
+
+    def test_foreign_sidecar(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = os.path.join(tmpdir,'tile005.mitgrid')
+            sg.gridio.write_mitgridfile(outfile,mg,270,90)
+            # corrupt, or unrelated, <file>.json files are ignored if ni, nj
+            # are provided:
+            for content in ('{"ni": 2','[1, 2]','{"version": 7}'):
+                with open(sg.gridio.sidecar_filename(outfile),'w') as fd:
+                    fd.write(content)
+                with self.assertRaises(ValueError):
+                    sg.gridio.read_sidecar(outfile)
+                with self.assertRaises(ValueError):
+                    sg.gridio.read_mitgridfile(outfile)
+                mg_read = sg.gridio.read_mitgridfile(
+                    outfile, 270, 90, strict=True)
+                np.testing.assert_array_equal(mg_read['XG'],mg['XG'])
+                mapped = sg.gridio.memmap_mitgridfile(outfile,270,90)
+                np.testing.assert_array_equal(
+                    mapped[:,:,sg.mitgridfilefields.names.index('XG')],mg['XG'])
+                del mapped
+
+
+if __name__=='__main__':
+    unittest.main()
+
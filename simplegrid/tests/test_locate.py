@@ -0,0 +1,77 @@
+
+import unittest
+
+import numpy as np
+import numpy.testing as nptest
+import simplegrid as sg
+
+
+class TestLocate(unittest.TestCase):
+
+    def test_locate_centers(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        locator = sg.util.CellLocator(mg['XG'],mg['YG'])
+        (i,j,s,t) = locator.locate(mg['XC'],mg['YC'])
+        (i_ref,j_ref) = np.indices(mg['XC'].shape)
+        nptest.assert_array_equal(i,i_ref)
+        nptest.assert_array_equal(j,j_ref)
+        nptest.assert_allclose(s,0.5,atol=0.05)
+        nptest.assert_allclose(t,0.5,atol=0.05)
+
+    def test_locate_fractions(self):
+        (mg,_,_) = sg.mkgrid.mkgrid(
+            lon1=10., lat1=5., lon2=20., lat2=-5.,
+            lon_subscale=10, lat_subscale=10)
+        locator = sg.util.CellLocator(mg['XG'],mg['YG'])
+        (i,j,s,t) = locator.locate(
+            np.array([[12.25,19.99],[0.,15.5]]),
+            np.array([[0.5,-4.9],[0.,-10.]]))
+        nptest.assert_array_equal(i,[[2,9],[-1,-1]])
+        nptest.assert_array_equal(j,[[5,0],[-1,-1]])
+        # (to within great circle, vs. parallel, cell edge differences):
+        nptest.assert_allclose(s[0],[0.25,0.99],atol=5.e-3)
+        nptest.assert_allclose(t[0],[0.5,0.1],atol=5.e-3)
+        self.assertTrue(np.all(np.isnan(s[1])))
+        self.assertTrue(np.all(np.isnan(t[1])))
+
+        with self.assertRaises(ValueError):
+            locator.locate([12.25,19.99],[0.5])
+
+    def test_locate_batches(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        locator = sg.util.CellLocator(mg['XG'],mg['YG'])
+        rng = np.random.default_rng(3)
+        lons = np.concatenate(
+            (rng.uniform(-180.,180.,200),mg['XC'][::9,::9].ravel()))
+        lats = np.concatenate(
+            (rng.uniform(-90.,90.,200),mg['YC'][::9,::9].ravel()))
+        locate_chunk_size = sg.config.LOCATE_CHUNK_SIZE
+        try:
+            # batches of mostly off-grid points, in chunks of a few points,
+            # as located one at a time:
+            sg.config.LOCATE_CHUNK_SIZE = 16
+            (i,j,s,t) = locator.locate(lons,lats)
+        finally:
+            sg.config.LOCATE_CHUNK_SIZE = locate_chunk_size
+        for (k,(lon,lat)) in enumerate(zip(lons,lats)):
+            nptest.assert_array_equal(
+                locator.locate(lon,lat),(i[k],j[k],s[k],t[k]))
+        self.assertTrue(np.all(i[200:]>=0))
+        self.assertTrue(np.any(i[:200]<0) and np.any(i[:200]>=0))
+
+        # points just beyond the (great circle) grid boundary, and outside
+        # its bounding box:
+        (mg,_,_) = sg.mkgrid.mkgrid(
+            lon1=10., lat1=5., lon2=20., lat2=-5.,
+            lon_subscale=10, lat_subscale=10)
+        locator = sg.util.CellLocator(mg['XG'],mg['YG'])
+        (i,j,s,t) = locator.locate(
+            [9.9,20.05,15.,15.,100.,-15.],[0.,0.,5.2,-5.2,0.,-60.])
+        nptest.assert_array_equal(i,-1)
+        nptest.assert_array_equal(j,-1)
+        self.assertTrue(np.all(np.isnan(s)) and np.all(np.isnan(t)))
+
+
+if __name__=='__main__':
+    unittest.main()
+
@@ -1,5 +1,6 @@
 
 import unittest
+import numpy as np
 import simplegrid as sg
 import numpy.testing as nptest
 
@@ -60,6 +61,68 @@ class TestMkgrid(unittest.TestCase):
         for a,b in zip(newgrid,validated_grid):
             nptest.assert_almost_equal(newgrid[a],validated_grid[b])
 
+    def test_mkgrid_3(self):
+        """Tests reduced precision (float32) compute grid creation of simple
+        10x10 grid on 1deg x 1deg region against full precision results.
+        """
+
+        (grid64,_,_) = sg.mkgrid.mkgrid(
+            lon1=1., lat1=2.,
+            lon2=2., lat2=1.,
+            lon_subscale=10, lat_subscale=10)
+        (grid32,_,_) = sg.mkgrid.mkgrid(
+            lon1=1., lat1=2.,
+            lon2=2., lat2=1.,
+            lon_subscale=10, lat_subscale=10,
+            dtype=np.float32)
+
+        for name in sg.mitgridfilefields.names:
+            self.assertEqual(grid32[name].dtype,np.float64)
+            nptest.assert_allclose(grid32[name],grid64[name],rtol=1.e-4)
+
+    def test_mkgrid_4(self):
+        """Tests reduced precision (float32) compute grid creation of a coarse
+        8x8 grid (10deg x 10deg cells, with areas computed from spherical
+        excess) spanning the prime meridian and equator against full precision
+        results.
+        """
+
+        corners = dict(lon1=-40., lat1=50., lon2=40., lat2=-30.)
+        (grid64,_,_) = sg.mkgrid.mkgrid(
+            **corners, lon_subscale=8, lat_subscale=8)
+        (grid32,_,_) = sg.mkgrid.mkgrid(
+            **corners, lon_subscale=8, lat_subscale=8, dtype=np.float32)
+
+        for name in sg.mitgridfilefields.names:
+            self.assertEqual(grid32[name].dtype,np.float64)
+            if name in ('XC','YC','XG','YG'):
+                # (absolute, since coordinates are zero along the prime
+                # meridian and equator):
+                nptest.assert_allclose(
+                    grid32[name],grid64[name],rtol=0.,atol=1.e-4)
+            else:
+                nptest.assert_allclose(grid32[name],grid64[name],rtol=1.e-5)
+        self.assertTrue(np.all(grid64['RAC']>5.e11))
+
+    def test_mkgrid_stats(self):
+        """Tests stage recording while creating a 4x3 grid, with and
+        without memory tracing.
+        """
+
+        corners = dict(lon1=1., lat1=4., lon2=5., lat2=1.)
+        for trace_memory in (False,True):
+            stats = sg.util.Stats(trace_memory=trace_memory)
+            (grid,_,_) = sg.mkgrid.mkgrid(
+                **corners, lon_subscale=4, lat_subscale=3, stats=stats)
+            self.assertEqual(stats.stages['mkgrid'][0], 1)
+            self.assertIn('fill', stats.stages)
+            self.assertEqual(stats.stages['mkgrid'][2]>0, trace_memory)
+            self.assertIsNone(sg.util.active_stats())
+        (grid_nostats,_,_) = sg.mkgrid.mkgrid(
+            **corners, lon_subscale=4, lat_subscale=3)
+        for name in sg.mitgridfilefields.names:
+            nptest.assert_array_equal(grid[name],grid_nostats[name])
+
 if __name__=='__main__':
     unittest.main()
 
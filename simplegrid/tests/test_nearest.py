@@ -1,6 +1,10 @@
 
+import glob
+import os
+import tempfile
 import unittest
 
+import numpy as np
 import pyproj
 import simplegrid as sg
 
@@ -28,6 +32,104 @@ class TestNearest(unittest.TestCase):
         self.assertEqual((i,j),(135,45))
         self.assertAlmostEqual(dist,6.2719790)
 
+    def test_nearest_pyproj(self):
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        spherical_backend = sg.config.SPHERICAL_BACKEND
+        try:
+            sg.config.SPHERICAL_BACKEND = False
+            i,j,dist = sg.util.nearest(-83.,-24.310,mg['XG'],mg['YG'],geod)
+        finally:
+            sg.config.SPHERICAL_BACKEND = spherical_backend
+        self.assertEqual((i,j),(135,45))
+        self.assertAlmostEqual(dist,6.2719790)
+
+
+    def test_nearest_index(self):
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        index = sg.util.NearestIndex(mg['XG'],mg['YG'],leaf_size=16)
+        i,j,dist = sg.util.nearest(-83.,-24.310,mg['XG'],mg['YG'],geod,index)
+        self.assertEqual((i,j),(135,45))
+        self.assertAlmostEqual(dist,6.2719790)
+
+        # indexed and exhaustive searches for arbitrary points, and for grid
+        # points themselves:
+        rng = np.random.default_rng(5)
+        lons = np.concatenate(
+            (rng.uniform(-140.,-60.,50),mg['XG'][::30,::10].ravel()))
+        lats = np.concatenate(
+            (rng.uniform(-89.,75.,50),mg['YG'][::30,::10].ravel()))
+        for (lon,lat) in zip(lons,lats):
+            (i,j,dist) = sg.util.nearest(lon,lat,mg['XG'],mg['YG'],geod)
+            (i_idx,j_idx,dist_idx) = sg.util.nearest(
+                lon,lat,mg['XG'],mg['YG'],geod,index)
+            self.assertEqual((i_idx,j_idx),(i,j))
+            self.assertAlmostEqual(dist_idx,dist,places=4)
+        (i,j) = index.query_many(lons,lats)
+        self.assertEqual(
+            list(zip(i,j)),[index.query(*pt) for pt in zip(lons,lats)])
+
+        with self.assertRaises(ValueError):
+            sg.util.nearest(-83.,-24.310,mg['XG'][1:],mg['YG'][1:],geod,index)
+
+
+    def test_nearest_many(self):
+        geod = pyproj.Geod(ellps='sphere')
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        index = sg.util.NearestIndex(mg['XG'],mg['YG'])
+        rng = np.random.default_rng(7)
+        lons = rng.uniform(-140.,-60.,(4,5))
+        lats = rng.uniform(-89.,75.,(4,5))
+        spherical_backend = sg.config.SPHERICAL_BACKEND
+        nearest_chunk_size = sg.config.NEAREST_CHUNK_SIZE
+        try:
+            # exhaustive searches in chunks of three origins, or indexed:
+            sg.config.NEAREST_CHUNK_SIZE = 3*mg['XG'].size
+            for spherical in (True,False):
+                sg.config.SPHERICAL_BACKEND = spherical
+                for search_index in (None,index):
+                    (i,j,dist) = sg.util.nearest_many(
+                        lons,lats,mg['XG'],mg['YG'],geod,search_index)
+                    self.assertEqual(i.shape,lons.shape)
+                    for (k,(lon,lat)) in enumerate(zip(lons.flat,lats.flat)):
+                        (i_ref,j_ref,dist_ref) = sg.util.nearest(
+                            lon,lat,mg['XG'],mg['YG'],geod)
+                        self.assertEqual((i.flat[k],j.flat[k]),(i_ref,j_ref))
+                        self.assertAlmostEqual(dist.flat[k],dist_ref,places=4)
+        finally:
+            sg.config.SPHERICAL_BACKEND = spherical_backend
+            sg.config.NEAREST_CHUNK_SIZE = nearest_chunk_size
+
+
+    def test_nearest_index_cache(self):
+        mg = sg.gridio.read_mitgridfile('./data/tile005.mitgrid', 270, 90)
+        index = sg.util.NearestIndex(mg['XG'],mg['YG'])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # built and stored, then reused:
+            for _ in range(2):
+                cached = sg.util.cached_nearest_index(
+                    mg['XG'],mg['YG'],cache_dir)
+                for name in ('points','order','nodes','splits'):
+                    np.testing.assert_array_equal(
+                        getattr(cached,name),getattr(index,name))
+                self.assertEqual(cached.query(-83.,-24.310),(135,45))
+            (cache_file,) = glob.glob(os.path.join(cache_dir,'*.npz'))
+
+            # corrupt indices are rebuilt, and replaced:
+            with open(cache_file,'wb') as fd:
+                fd.write(b'not an index')
+            cached = sg.util.cached_nearest_index(mg['XG'],mg['YG'],cache_dir)
+            self.assertEqual(cached.query(-83.,-24.310),(135,45))
+            sg.util.NearestIndex.load(cache_file)
+
+            # different points, different index:
+            cached = sg.util.cached_nearest_index(
+                mg['XG'][:,1:],mg['YG'][:,1:],cache_dir)
+            self.assertEqual(cached.query(-83.,-24.310),(135,44))
+            self.assertEqual(
+                len(glob.glob(os.path.join(cache_dir,'*.npz'))),2)
+
 
 if __name__=='__main__':
     unittest.main()
@@ -1,4 +1,6 @@
 
+import os
+import tempfile
 import unittest
 import simplegrid as sg
 import numpy as np
@@ -248,6 +250,77 @@ class TestRegrid(unittest.TestCase):
                 "array['{0}'] max diff is not less than {1}%".format(name,maxdiff/100.))
 
 
+    def test_regrid_8(self):
+        """Tests band-by-band (streamed to file) 3x2 remeshing of a 4x3 cell
+        region of an llc 90 model tile against the same, all at once,
+        remeshing, with default, planar and spherical sub-areas.
+        """
+
+        tile = './data/tile005.mitgrid'
+        mg = sg.gridio.read_mitgridfile(tile,270,90)
+        corners = dict(
+            lon1=mg['XG'][100,13], lat1=mg['YG'][100,13],  # "NW"
+            lon2=mg['XG'][104,10], lat2=mg['YG'][104,10])  # "SE"
+
+        for planar in (None,True,False):
+            (newgrid,newgrid_ni,newgrid_nj) = sg.regrid.regrid(
+                mitgridfile=tile, ni=270, nj=90,
+                lon_subscale=3, lat_subscale=2, **corners, planar=planar)
+
+            for band_rows in (1,5,7):
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    outfile = os.path.join(tmpdir,'regrid_test_8.mitgrid')
+                    (streamed,streamed_ni,streamed_nj) = sg.regrid.regrid(
+                        mitgridfile=tile, ni=270, nj=90,
+                        lon_subscale=3, lat_subscale=2, **corners,
+                        band_rows=band_rows, outfile=outfile, planar=planar)
+                    self.assertIsNone(streamed)
+                    self.assertEqual(
+                        (streamed_ni,streamed_nj),(newgrid_ni,newgrid_nj))
+                    streamed = sg.gridio.read_mitgridfile(
+                        outfile,streamed_ni,streamed_nj,True)
+
+                for name in sg.mitgridfilefields.names:
+                    nptest.assert_array_equal(streamed[name],newgrid[name])
+
+
+    def test_regrid_9(self):
+        """Tests 2x3 remeshing of a 10x8 cell region of an llc 90 model tile
+        with corners given in each of the four diagonal orders, each requiring
+        a different number of XG, YG rotations into nw/se alignment.
+        """
+
+        tile = './data/tile005.mitgrid'
+        mg = sg.gridio.read_mitgridfile(tile,270,90)
+        mg_XG = np.copy(mg['XG'])
+        corner = lambda i,j : (mg['XG'][i,j],mg['YG'][i,j])
+
+        results = []
+        for (p1,p2) in (
+            ((100,28),(110,20)), ((110,20),(100,28)),
+            ((100,20),(110,28)), ((110,28),(100,20))):
+            ((lon1,lat1),(lon2,lat2)) = (corner(*p1),corner(*p2))
+            results.append(sg.regrid.regrid(
+                mitgrid_matrices=mg,
+                lon1=lon1, lat1=lat1, lon2=lon2, lat2=lat2,
+                lon_subscale=2, lat_subscale=3))
+
+        # the caller's matrices are not rotated in place:
+        nptest.assert_array_equal(mg['XG'],mg_XG)
+
+        # nw/se corners, as given, require no rotation, and se/nw, sw/ne and
+        # ne/sw corners two, three and one 90 degree rotations, respectively:
+        window = np.s_[100:111,20:29]
+        for (result,rotations) in zip(results,(0,2,3,1)):
+            (newgrid,newgrid_ni,newgrid_nj) = result
+            XG = np.rot90(mg['XG'][window],rotations)
+            YG = np.rot90(mg['YG'][window],rotations)
+            self.assertEqual(
+                (newgrid_ni,newgrid_nj),
+                ((XG.shape[0]-1)*2,(XG.shape[1]-1)*3))
+            nptest.assert_array_equal(newgrid['XG'][::2,::3],XG)
+            nptest.assert_array_equal(newgrid['YG'][::2,::3],YG)
+
 if __name__=='__main__':
     unittest.main()
 
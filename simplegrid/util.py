@@ -1,11 +1,20 @@
 
+import contextlib
+import functools
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+import zipfile
 import numpy as np
+from . import config
 
 # some useful constants:
 edges = (N,S,E,W) = list(range(4))
 
 
-def lonlat2cart( lons, lats, rad=1.):
+def lonlat2cart( lons, lats, rad=1., out=None):
     """Convert longitude/latitude to cartesian coordinates.
 
     Args:
@@ -13,6 +22,8 @@ def lonlat2cart( lons, lats, rad=1.):
         lats (numpy 2-d array): latitude ("y") values (decimal degrees).
         rad (float): nominal sphere radius (default=1. returns cartesian
             coordinates on the unit sphere).
+        out (numpy 3-d array, optional): array of shape lons.shape+(3,) into
+            which cartesian coordinates are written.
 
     Returns:
         cart (numpy 3-d array): cartesian coordinates on the sphere.  Rows and
@@ -30,15 +41,634 @@ def lonlat2cart( lons, lats, rad=1.):
 
     dims = list(lons.shape)
     dims.append(3)
-    cart = np.zeros(dims)
-    cart[:,:,0] = np.cos(np.radians(lons))*np.cos(np.radians(lats)) # x
-    cart[:,:,1] = np.sin(np.radians(lons))*np.cos(np.radians(lats)) # y
-    cart[:,:,2] = np.sin(np.radians(lats))                          # z
+    cart = np.empty(dims) if out is None else out
+    lam, phi = np.radians(lons), np.radians(lats)
+    cos_phi = np.cos(phi)
+    # (z by way of a contiguous result; see cart2lonlat):
+    np.multiply(np.cos(lam),cos_phi,out=cart[:,:,0])                # x
+    np.multiply(np.sin(lam),cos_phi,out=cart[:,:,1])                # y
+    cart[:,:,2] = np.sin(phi)                                       # z
+    if rad!=1.:
+        cart *= rad
 
     return cart
 
 
-def nearest(lon,lat,lons,lats,geod):
+def cart2lonlat( cart, lon_ref=None):
+    """Convert unit sphere cartesian coordinates to longitude/latitude.
+
+    Args:
+        cart (numpy array): array of cartesian coordinates, with x, y and z
+            components along the last axis (ref. lonlat2cart).
+        lon_ref (numpy array, optional): reference longitudes (decimal
+            degrees), broadcast-compatible with cart[...,0]. If provided,
+            longitudes are computed relative to, and added to, lon_ref before
+            reduction to the -180 to +180 range, with +/-180 signed as per the
+            unreduced value (as in pyproj.Geod.npts results).
+
+    Returns:
+        (lons, lats) tuple of numpy arrays of longitudes (-180 to +180 range)
+        and latitudes (decimal degrees).
+
+    """
+
+    # (numpy's vectorized transcendental functions may fall back to, and
+    # differ in the last bit from, their scalar equivalents for strided
+    # operands, depending on where the result happens to be allocated, so
+    # operate on contiguous copies for results independent of array layout):
+    (x,y,z) = (np.array(cart[...,k]) for k in range(3))
+    lats = np.degrees(np.arctan2(z,np.hypot(x,y)))
+    if lon_ref is None:
+        lons = np.degrees(np.arctan2(y,x))
+    else:
+        lam_ref = np.radians(lon_ref)
+        (cos_ref,sin_ref) = (np.cos(lam_ref),np.sin(lam_ref))
+        lons = lon_ref + np.degrees(np.arctan2(
+            y*cos_ref - x*sin_ref,
+            x*cos_ref + y*sin_ref))
+        lons_reduced = lons - 360.*np.round(lons/360.)
+        lons = np.where(
+            np.abs(lons_reduced)==180.,np.copysign(180.,lons),lons_reduced)
+    return lons, lats
+
+
+def cart_dist( p, q, rad=1.):
+    """Compute great circle distances between arrays of unit sphere cartesian
+    points.
+
+    Args:
+        p, q (numpy arrays): start and end points, with x, y and z components
+            along the last axis (ref. lonlat2cart).
+        rad (float): nominal sphere radius (default=1. returns central angles,
+            in radians).
+
+    Returns:
+        dist (numpy array): great circle distances, atan2(|p x q|, p.q)*rad.
+
+    """
+    return rad * np.arctan2(
+        np.linalg.norm(np.cross(p,q),axis=-1),
+        np.sum(p*q,axis=-1))
+
+
+def slerp( p, q, npts):
+    """Compute equally-spaced great circle intermediate points between arrays
+    of unit sphere cartesian points by spherical linear interpolation.
+
+    Args:
+        p, q (numpy arrays): segment start and end points, with x, y and z
+            components along the last axis (ref. lonlat2cart).
+        npts (int): number of intermediate points per segment.
+
+    Returns:
+        pts (numpy array): intermediate points, of shape
+            p.shape[:-1]+(npts,3).
+
+    """
+
+    p = p[...,np.newaxis,:]
+    q = q[...,np.newaxis,:]
+
+    # central angles, and interpolation fractions k/(npts+1), k=1..npts:
+    omega = cart_dist(p,q)[...,np.newaxis]
+    t = (np.arange(1,npts+1)/(npts+1))[:,np.newaxis]
+
+    # coincident endpoints (omega=0) simply reproduce the start point:
+    sin_omega = np.sin(omega)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        pts = np.where(
+            sin_omega!=0.,
+            (np.sin((1.-t)*omega)*p + np.sin(t*omega)*q) / sin_omega,
+            p)
+
+    return pts
+
+
+def spherical( geod):
+    """Determine whether closed-form spherical formulae may be used in place of
+    pyproj geodesic calculations.
+
+    Args:
+        geod (pyproj.Geod object): Geod to be used as basis for distance
+            calculations.
+
+    Returns:
+        True if geod is a sphere and config.SPHERICAL_BACKEND is set, False
+        otherwise.
+
+    """
+    return bool(config.SPHERICAL_BACKEND and geod.sphere)
+
+
+def sphere_dist( lon1, lat1, lon2, lat2, rad=1.):
+    """Compute great circle distances between arrays of lon/lat points.
+
+    Args:
+        lon1, lat1 (numpy arrays): start point longitudes and latitudes (decimal
+            degrees).
+        lon2, lat2 (numpy arrays): end point longitudes and latitudes (decimal
+            degrees), broadcast-compatible with lon1, lat1.
+        rad (float): nominal sphere radius (default=1. returns central angles,
+            in radians).
+
+    Returns:
+        dist (numpy array): great circle distances.
+
+    Note:
+        Uses the atan2 form of the Vincenty formula for a sphere, which is
+        well-conditioned for both small and nearly antipodal separations.
+
+    """
+
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlam = np.radians(np.subtract(lon2,lon1))
+    sin_phi1, cos_phi1 = np.sin(phi1), np.cos(phi1)
+    sin_phi2, cos_phi2 = np.sin(phi2), np.cos(phi2)
+    sin_dlam, cos_dlam = np.sin(dlam), np.cos(dlam)
+
+    return rad * np.arctan2(
+        np.hypot(
+            cos_phi2*sin_dlam,
+            cos_phi1*sin_phi2 - sin_phi1*cos_phi2*cos_dlam),
+        sin_phi1*sin_phi2 + cos_phi1*cos_phi2*cos_dlam)
+
+
+def sphere_npts( lon1, lat1, lon2, lat2, npts):
+    """Compute equally-spaced great circle intermediate points by spherical
+    linear interpolation (slerp) of unit vectors.
+
+    Args:
+        lon1, lat1, lon2, lat2 (numpy arrays): segment start and end point
+            longitudes and latitudes (decimal degrees, all of the same shape).
+        npts (int): number of intermediate points per segment.
+
+    Returns:
+        (lons, lats) tuple of numpy arrays of shape lon1.shape+(npts,)
+        containing, along the last axis, intermediate point longitudes (-180 to
+        +180 range, as in pyproj.Geod.npts) and latitudes.
+
+    """
+
+    pts = slerp(
+        lonlat2cart(np.atleast_2d(lon1),np.atleast_2d(lat1)),
+        lonlat2cart(np.atleast_2d(lon2),np.atleast_2d(lat2)),
+        npts)
+    (lons,lats) = cart2lonlat(pts,np.atleast_2d(lon1)[...,np.newaxis])
+
+    shape = np.shape(lon1)+(npts,)
+    return np.reshape(lons,shape), np.reshape(lats,shape)
+
+
+def tile_extent( XG, YG):
+    """Compute the bounding spherical cap and longitude/latitude box of a tile.
+
+    Args:
+        XG (numpy 2-d array): tile corner point longitudes (decimal degrees).
+        YG (numpy 2-d array): tile corner point latitudes (decimal degrees).
+
+    Returns:
+        (cap,box): tuple of dictionaries, cap with 'lon', 'lat' (cap center)
+            and 'radius' (central angle) keys, and box with 'lon_min',
+            'lon_max', 'lat_min' and 'lat_max' keys, all in decimal degrees.
+            lon_min is in the -180 to +180 range, and lon_max is lon_min plus
+            the (eastward) box width, so that boxes spanning the
+            antimeridian have lon_max>180.
+
+    Raises:
+        ValueError: If the tile contains no defined (non-NaN) corner points.
+
+    Note:
+        Both the cap and the box are conservative, i.e., they contain each
+        tile cell's great circle edges and interior, not just its corner
+        points. Undefined (NaN) corner points are ignored.
+
+    """
+
+    defined = np.isfinite(XG) & np.isfinite(YG)
+    if not np.any(defined):
+        raise ValueError('tile has no defined corner points.')
+    cart = lonlat2cart(
+        XG[defined].reshape(1,-1),YG[defined].reshape(1,-1)).reshape(-1,3)
+
+    # bounding cap, centered on the mean corner point position. Since caps
+    # no larger than a hemisphere are convex, a cap containing every corner
+    # point contains every great circle cell edge as well:
+    center = np.sum(cart,axis=0)
+    norm = np.linalg.norm(center)
+    if norm > 0.:
+        center /= norm
+        radius = np.degrees(np.max(cart_dist(center,cart)))
+    else:
+        (center,radius) = (cart[0],180.)
+    if radius > 90.:
+        radius = 180.
+    (cap_lon,cap_lat) = cart2lonlat(center)
+
+    # bounding box, padded by the longest cell edge since no point within a
+    # cell is any farther than that from one of its corners:
+    full = lonlat2cart(XG,YG)
+    pad = np.degrees(np.nanmax([
+        np.nanmax(cart_dist(full[1:,:],full[:-1,:]),initial=0.),
+        np.nanmax(cart_dist(full[:,1:],full[:,:-1]),initial=0.)]))
+    lat_min = max(np.min(YG[defined])-pad,-90.)
+    lat_max = min(np.max(YG[defined])+pad, 90.)
+    if _encloses_pole(XG,YG):
+        if np.sum(cart[:,2]) > 0.:
+            lat_max = 90.
+        else:
+            lat_min = -90.
+    lat_abs = max(abs(lat_min),abs(lat_max))
+    if lat_abs==90. or np.sin(np.radians(pad))>=np.cos(np.radians(lat_abs)):
+        # touches a pole, or close enough that every longitude is in reach:
+        (lon_min,lon_width) = (-180.,360.)
+    else:
+        # smallest longitude interval containing all corner points, i.e., the
+        # complement of the largest gap between them:
+        lons = np.sort(np.mod(XG[defined],360.))
+        gaps = np.diff(np.append(lons,lons[0]+360.))
+        k = np.argmax(gaps)
+        lon_pad = np.degrees(np.arcsin(
+            np.sin(np.radians(pad))/np.cos(np.radians(lat_abs))))
+        lon_min = lons[(k+1)%lons.size] - lon_pad
+        lon_width = 360. - gaps[k] + 2.*lon_pad
+        if lon_width >= 360.:
+            (lon_min,lon_width) = (-180.,360.)
+        lon_min = np.mod(lon_min+180.,360.) - 180.
+
+    cap = {'lon':float(cap_lon),'lat':float(cap_lat),'radius':float(radius)}
+    box = {
+        'lon_min':float(lon_min),'lon_max':float(lon_min+lon_width),
+        'lat_min':float(lat_min),'lat_max':float(lat_max)}
+    return cap, box
+
+
+def _encloses_pole( XG, YG):
+    """Determine whether a tile's perimeter winds around either pole.
+
+    Tiles with an undefined (NaN), or polar, perimeter corner point are
+    assumed to do so.
+
+    """
+    ring = np.concatenate((
+        XG[:,0], XG[-1,1:], XG[-2::-1,-1], XG[0,-2:0:-1]))
+    ring_lats = np.concatenate((
+        YG[:,0], YG[-1,1:], YG[-2::-1,-1], YG[0,-2:0:-1]))
+    if not np.all(np.isfinite(ring)) or np.any(np.abs(ring_lats)>=90.):
+        return True
+    dlon = np.mod(np.diff(np.append(ring,ring[0]))+180.,360.) - 180.
+    return abs(np.sum(dlon)) > 180.
+
+
+class NearestIndex:
+    """
+    Spatial index of a matrix of lon/lat points for nearest neighbour queries:
+    a KD-tree of their unit sphere cartesian coordinates, built once and
+    queried in O(log N) time.
+
+    Args:
+        lons, lats (numpy 2-d arrays): longitudes and latitudes (decimal
+            degrees) of the points to be indexed (e.g., XG, YG). Undefined
+            (NaN) points are excluded.
+        leaf_size (int): maximum number of points per tree leaf (default=64).
+
+    Attributes:
+        shape (tuple of ints): lons, lats matrix dimensions.
+        points (numpy array): unit sphere cartesian coordinates of the indexed
+            points, in tree order.
+        order (numpy array): flat (row-major) lons, lats index of each of
+            points.
+        nodes (numpy array): tree nodes, one (lo, hi, left, right, axis) row
+            per node, where points[lo:hi] are the node's points, left and
+            right are child node indices (-1 for leaves), and axis is the
+            cartesian component along which the node is split.
+        splits (numpy array): node split values, such that left and right
+            child points are, respectively, no greater and no less than
+            splits[node] along the node's axis.
+
+    Raises:
+        ValueError: If input lons and lats matrix dimensions are not equal,
+            or if no defined points are provided.
+
+    Note:
+        Since chord length increases monotonically with great circle distance,
+        the nearest point on the unit sphere is the nearest on any sphere; on
+        an ellipsoid, it is the nearest to within geodetic/geocentric latitude
+        differences.
+
+    """
+
+    def __init__( self, lons, lats, leaf_size=64):
+
+        if lons.ndim!=2 or lats.ndim!=2 or lons.shape!=lats.shape:
+            raise ValueError('lons and lats must be two-dimensional matrices of equal size.')
+
+        self.shape = lons.shape
+        cart = np.reshape(lonlat2cart(lons,lats),(-1,3))
+        self.order = np.flatnonzero(~np.any(np.isnan(cart),axis=1))
+        if not self.order.size:
+            raise ValueError('no defined lon/lat points to be indexed.')
+        # (column-major, for fast per-component extents while building):
+        self.points = np.asfortranarray(cart[self.order])
+
+        nodes, splits = [], []
+
+        def build( lo, hi):
+            node = len(nodes)
+            nodes.append([lo,hi,-1,-1,0])
+            splits.append(0.)
+            if hi-lo>leaf_size:
+                # split at the median of the coordinate of greatest extent:
+                block = self.points[lo:hi]
+                axis = int(np.argmax(block.max(axis=0)-block.min(axis=0)))
+                mid = (lo+hi)//2
+                part = np.argpartition(block[:,axis],mid-lo)
+                self.points[lo:hi] = block[part]
+                self.order[lo:hi] = self.order[lo:hi][part]
+                splits[node] = self.points[mid,axis]
+                nodes[node][4] = axis
+                nodes[node][2] = build(lo,mid)
+                nodes[node][3] = build(mid,hi)
+            return node
+
+        build(0,self.order.size)
+        self.nodes = np.array(nodes,dtype=np.int64)
+        self.splits = np.array(splits)
+
+    def query( self, lon, lat):
+        """Find the indexed point nearest a given lon/lat.
+
+        Args:
+            lon (float): Longitude of search origin.
+            lat (float): Latitude of search origin.
+
+        Returns:
+            (i,j) tuple of zeros-based row and column indices of the nearest
+            point (of the lowest row-major index, if several are equidistant).
+
+        """
+
+        q = lonlat2cart(np.array([[lon]]),np.array([[lat]]))[0,0]
+        (best_d2,best) = (np.inf,-1)
+
+        # depth-first search, nearer child first, pruning any subtree whose
+        # (squared) distance lower bound exceeds that of the best point so far:
+        stack = [(0,0.)]
+        while stack:
+            (node,bound) = stack.pop()
+            if bound>best_d2:
+                continue
+            (lo,hi,left,right,axis) = self.nodes[node]
+            if left<0:
+                d = self.points[lo:hi]-q
+                d2 = np.sum(d*d,axis=1)
+                d2_min = d2.min()
+                if d2_min<=best_d2:
+                    candidate = self.order[lo:hi][d2==d2_min].min()
+                    if d2_min<best_d2 or candidate<best:
+                        (best_d2,best) = (d2_min,candidate)
+            else:
+                diff = q[axis]-self.splits[node]
+                (near,far) = (left,right) if diff<0. else (right,left)
+                stack.append((far,max(bound,diff*diff)))
+                stack.append((near,bound))
+
+        (i,j) = divmod(int(best),self.shape[1])
+        return i,j
+
+    def query_many( self, lon, lat):
+        """Find the indexed points nearest arrays of lon/lat points, in a
+        single (batched) search.
+
+        Args:
+            lon (array-like): Longitudes of search origins.
+            lat (array-like): Latitudes of search origins (same shape as lon).
+
+        Returns:
+            (i,j) tuple of numpy arrays, of the same shape as lon, of
+            zeros-based row and column indices of the nearest points (as per
+            query(), for each search origin).
+
+        Raises:
+            ValueError: If lon and lat shapes are not equal.
+
+        Note:
+            The tree is searched breadth-first for all origins at once, each
+            starting from the nearest point of the leaf it falls in, and
+            pruned by node bounding box distances. Origins are searched in
+            chunks of config.NEAREST_CHUNK_SIZE/leaf_size at a time.
+
+        """
+
+        (lon,lat) = (np.asarray(lon,dtype=float),np.asarray(lat,dtype=float))
+        if lon.shape!=lat.shape:
+            raise ValueError('lon and lat must be of equal shape.')
+
+        q = np.reshape(lonlat2cart(
+            np.reshape(lon,(1,-1)),np.reshape(lat,(1,-1))),(-1,3))
+        leaves = self.nodes[:,2]<0
+        leaf_size = int(np.max(self.nodes[leaves,1]-self.nodes[leaves,0]))
+        # (node point bounding boxes, for distance lower bounds):
+        boxes = np.array([
+            (self.points[lo:hi].min(axis=0),self.points[lo:hi].max(axis=0))
+            for (lo,hi) in self.nodes[:,:2]])
+        nearest_flat = np.empty(q.shape[0],dtype=np.int64)
+        chunk = max(1,config.NEAREST_CHUNK_SIZE//leaf_size)
+        for k0 in range(0,q.shape[0],chunk):
+            nearest_flat[k0:k0+chunk] = self._search(
+                q[k0:k0+chunk],leaf_size,boxes)
+
+        (i,j) = np.divmod(nearest_flat,self.shape[1])
+        return np.reshape(i,lon.shape), np.reshape(j,lon.shape)
+
+    def _search( self, q, leaf_size, boxes):
+        """Flat indices of the points nearest unit sphere points q (k x 3),
+        given node bounding boxes (nodes x 2 x 3).
+        """
+
+        (best_d2,best) = (np.full(q.shape[0],np.inf),np.full(q.shape[0],-1))
+        origins = np.arange(q.shape[0])
+
+        def visit( origins, nodes):
+            # nearest point of each (origin,leaf) pair, then of each origin:
+            idx = self.nodes[nodes,0,np.newaxis]+np.arange(leaf_size)
+            valid = idx<self.nodes[nodes,1,np.newaxis]
+            idx = np.minimum(idx,self.order.size-1)
+            d = self.points[idx]-q[origins,np.newaxis,:]
+            d2 = np.where(valid,np.sum(d*d,axis=-1),np.inf)
+            d2_min = d2.min(axis=1)
+            candidate = np.where(valid & (d2==d2_min[:,np.newaxis]),
+                self.order[idx],np.iinfo(np.int64).max).min(axis=1)
+            order = np.lexsort((candidate,d2_min,origins))
+            first = np.ones(order.size,dtype=bool)
+            first[1:] = origins[order[1:]]!=origins[order[:-1]]
+            (origins,d2_min,candidate) = (
+                origins[order[first]],d2_min[order[first]],
+                candidate[order[first]])
+            better = (d2_min<best_d2[origins]) | \
+                ((d2_min==best_d2[origins]) & (candidate<best[origins]))
+            best_d2[origins[better]] = d2_min[better]
+            best[origins[better]] = candidate[better]
+
+        # initial best points, from the leaves the origins fall in:
+        nodes = np.zeros(q.shape[0],dtype=np.int64)
+        while True:
+            (left,right,axis) = self.nodes[nodes,2:].T
+            internal = left>=0
+            if not np.any(internal):
+                break
+            diff = q[origins,axis]-self.splits[nodes]
+            nodes = np.where(internal,np.where(diff<0.,left,right),nodes)
+        visit(origins,nodes)
+
+        # breadth-first search of all (origin,node) pairs, pruning any whose
+        # (squared) distance to the node's bounding box exceeds that of the
+        # best point so far:
+        nodes = np.zeros(q.shape[0],dtype=np.int64)
+        while origins.size:
+            gap = np.maximum(np.maximum(
+                boxes[nodes,0]-q[origins],q[origins]-boxes[nodes,1]),0.)
+            keep = np.sum(gap*gap,axis=1)<=best_d2[origins]
+            (origins,nodes) = (origins[keep],nodes[keep])
+            leaf = self.nodes[nodes,2]<0
+            if np.any(leaf):
+                visit(origins[leaf],nodes[leaf])
+            (origins,nodes) = (origins[~leaf],nodes[~leaf])
+            origins = np.concatenate((origins,origins))
+            nodes = np.concatenate((self.nodes[nodes,2],self.nodes[nodes,3]))
+
+        return best
+
+    def save( self, filename, key=''):
+        """Write the index to a numpy .npz file.
+
+        Args:
+            filename (str or file object): (path and) file name.
+            key (str): identifier stored alongside the index (e.g., a content
+                hash of the indexed points; ref. cached_nearest_index).
+
+        """
+        np.savez(filename, key=np.array(key), shape=np.array(self.shape),
+            points=self.points, order=self.order, nodes=self.nodes,
+            splits=self.splits)
+
+    @classmethod
+    def load( cls, filename, key=None):
+        """Read an index written by save.
+
+        Args:
+            filename (str): (path and) file name.
+            key (str, optional): if provided, identifier the stored one must
+                match.
+
+        Returns:
+            NearestIndex
+
+        Raises:
+            ValueError: If the stored key does not match, or the stored
+                arrays are not those of a consistent index.
+
+        """
+        index = cls.__new__(cls)
+        with np.load(filename) as data:
+            if key is not None and str(data['key'])!=key:
+                raise ValueError('index key mismatch.')
+            index.shape = tuple(int(n) for n in data['shape'])
+            index.points = np.asfortranarray(data['points'])
+            index.order = data['order']
+            index.nodes = data['nodes']
+            index.splits = data['splits']
+        num_points, num_nodes = index.order.size, index.nodes.shape[0]
+        if (len(index.shape)!=2 or not num_points or
+            index.points.shape!=(num_points,3) or
+            index.nodes.shape!=(num_nodes,5) or
+            index.splits.shape!=(num_nodes,) or
+            index.order.min()<0 or
+            index.order.max()>=index.shape[0]*index.shape[1] or
+            index.nodes[:,:2].min()<0 or index.nodes[:,:2].max()>num_points or
+            index.nodes[:,2:4].max()>=num_nodes):
+            raise ValueError('inconsistent index data.')
+        return index
+
+
+def cached_nearest_index( lons, lats, cache_dir, verbose=False, key=None):
+    """Get a NearestIndex of a matrix of lon/lat points, reusing one stored by
+    a previous call (e.g., by another process) if possible.
+
+    Indices are stored in cache_dir as .npz files (ref. NearestIndex.save)
+    named, and keyed, by a content hash of lons and lats (or by key). A stored
+    index is used only if its key, dimensions, and indexed points all match
+    those of lons and lats; otherwise, or if it cannot be read, the index is
+    rebuilt and (re)stored.
+
+    Args:
+        lons, lats (numpy 2-d arrays): longitudes and latitudes (decimal
+            degrees) of the points to be indexed (ref. NearestIndex).
+        cache_dir (str): index cache directory (created if necessary).
+        verbose (bool): True for diagnostic output, False otherwise.
+        key (str, optional): identifier of lons, lats content to be used
+            instead of a hash of it (e.g., from mitgrid file sidecar
+            checksums; ref. gridio.read_sidecar). Must be usable as part of
+            a file name.
+
+    Returns:
+        NearestIndex
+
+    Raises:
+        ValueError: If input lons and lats matrix dimensions are not equal,
+            or if no defined points are provided.
+
+    Note:
+        Failures to store an index (e.g., in a read-only cache directory) are
+        not errors; the rebuilt index is simply returned.
+
+    """
+
+    if lons.ndim!=2 or lats.ndim!=2 or lons.shape!=lats.shape:
+        raise ValueError('lons and lats must be two-dimensional matrices of equal size.')
+
+    if key is None:
+        digest = hashlib.sha256(repr(lons.shape).encode())
+        for matrix in (lons,lats):
+            digest.update(np.ascontiguousarray(matrix,dtype=np.float64).data)
+        key = digest.hexdigest()
+    filename = os.path.join(cache_dir,'nearest_{0:s}.npz'.format(key))
+
+    try:
+        index = NearestIndex.load(filename,key)
+        if index.shape!=lons.shape:
+            raise ValueError('index shape mismatch.')
+        cart = np.reshape(lonlat2cart(lons,lats),(-1,3))[index.order]
+        if not np.allclose(index.points,cart,rtol=0.,atol=1.e-12):
+            raise ValueError('index points mismatch.')
+        if verbose:
+            print('using cached index {0:s}'.format(filename))
+        return index
+    except FileNotFoundError:
+        pass
+    except (OSError,EOFError,KeyError,ValueError,zipfile.BadZipFile) as err:
+        if verbose:
+            print('rebuilding cached index {0:s} ({1})'.format(filename,err))
+
+    index = NearestIndex(lons,lats)
+    tmpname = None
+    try:
+        # (written to a temporary file first, so that concurrent readers
+        # never see a partial index):
+        os.makedirs(cache_dir,exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=cache_dir,suffix='.npz',delete=False) as fd:
+            tmpname = fd.name
+            index.save(fd,key)
+        os.replace(tmpname,filename)
+    except OSError as err:
+        if tmpname and os.path.exists(tmpname):
+            os.remove(tmpname)
+        if verbose:
+            print('could not cache index {0:s} ({1})'.format(filename,err))
+    return index
+
+
+def nearest(lon,lat,lons,lats,geod,index=None):
     """Determine indices of, and distance to, nearest lon/lat point.
 
     Args:
@@ -50,6 +680,8 @@ def nearest(lon,lat,lons,lats,geod):
             neighbour search.
         geod (pyproj.Geod object): Geod to be used as basis for distance
             calculations.
+        index (NearestIndex, optional): spatial index of lons, lats, used to
+            locate the nearest neighbour in place of a search of all points.
 
     Returns:
         i (int): Zeros-based row index of nearest neighbour.
@@ -59,16 +691,42 @@ def nearest(lon,lat,lons,lats,geod):
 
     Raises:
         ValueError: If input lons and lats matrix dimensions are not
-            equal.
+            equal, or do not match those of index.
+
+    Note:
+        If index is provided, only the distance to the nearest neighbour is
+        computed. Otherwise, if spherical(geod), distances to all points are
+        computed at once using sphere_dist(); if not, each point is visited
+        with geod.inv.
+
     """
 
     if lons.ndim!=2 or lats.ndim!=2 or lons.shape!=lats.shape:
         raise ValueError('lons and lats must be two-dimensional matrices of equal size.')
 
+    if index is not None:
+        if index.shape!=lons.shape:
+            raise ValueError('index and lons/lats matrix dimensions must be equal.')
+        i,j = index.query(lon,lat)
+        if spherical(geod):
+            dist = sphere_dist(lon,lat,lons[i,j],lats[i,j],geod.a)
+        else:
+            count_geod_call('inv',1)
+            (_,_,dist) = geod.inv(lon,lat,lons[i,j],lats[i,j])
+        return i,j,float(dist)
+
+    if spherical(geod):
+        # closed-form distances to all points at once; np.argmin, like the
+        # scan below, selects the first minimum in row-major order:
+        dists = sphere_dist(lon,lat,lons,lats,geod.a)
+        i,j = np.unravel_index(np.argmin(dists),dists.shape)
+        return int(i),int(j),float(dists[i,j])
+
     i,j,dist = -1,-1,1.e10
 
     it = np.nditer(lons,flags=['multi_index'])
     while not it.finished:
+        count_geod_call('inv',1)
         (fwd_az,back_az,distance) = geod.inv(
             lon,lat,
             lons[it.multi_index[0],it.multi_index[1]],
@@ -80,7 +738,302 @@ def nearest(lon,lat,lons,lats,geod):
     return i,j,dist
 
 
-def squad_uarea( cart):
+def nearest_many( lon, lat, lons, lats, geod, index=None):
+    """Determine indices of, and distances to, nearest lon/lat points for
+    arrays of search origins.
+
+    Args:
+        lon (array-like): Longitudes of search origins.
+        lat (array-like): Latitudes of search origins (same shape as lon).
+        lons (numpy 2-d array): Matrix of longitude values used in the nearest
+            neighbour search.
+        lats (numpy 2-d array): Matrix of latitude values used in the nearest
+            neighbour search.
+        geod (pyproj.Geod object): Geod to be used as basis for distance
+            calculations.
+        index (NearestIndex, optional): spatial index of lons, lats, used to
+            locate nearest neighbours in place of exhaustive searches.
+
+    Returns:
+        (i,j,dist) tuple of numpy arrays, of the same shape as lon, of
+        zeros-based row and column indices of, and great circle distances to,
+        the nearest neighbours (as per nearest(), for each search origin).
+
+    Raises:
+        ValueError: If lon and lat shapes, or input lons and lats matrix
+            dimensions, are not equal, or if the latter do not match those of
+            index.
+
+    Note:
+        Exhaustive searches compute distances for chunks of search origins
+        at a time, each chunk's origin to grid point distance matrix having
+        at most config.NEAREST_CHUNK_SIZE elements (or one row, if lons is
+        larger). Distances are then recomputed for the nearest points only,
+        in a single (batched) calculation.
+
+    """
+
+    (lon,lat) = (np.asarray(lon,dtype=float),np.asarray(lat,dtype=float))
+    if lon.shape!=lat.shape:
+        raise ValueError('lon and lat must be of equal shape.')
+    if lons.ndim!=2 or lats.ndim!=2 or lons.shape!=lats.shape:
+        raise ValueError('lons and lats must be two-dimensional matrices of equal size.')
+    if index is not None and index.shape!=lons.shape:
+        raise ValueError('index and lons/lats matrix dimensions must be equal.')
+
+    (origin_lons,origin_lats) = (np.ravel(lon),np.ravel(lat))
+    nearest_flat = np.empty(origin_lons.size,dtype=np.int64)
+
+    if index is not None:
+        (i,j) = index.query_many(origin_lons,origin_lats)
+        nearest_flat[:] = i*lons.shape[1]+j
+    else:
+        (points_lon,points_lat) = (np.ravel(lons),np.ravel(lats))
+        chunk = max(1,config.NEAREST_CHUNK_SIZE//points_lon.size)
+        for k0 in range(0,origin_lons.size,chunk):
+            chunk_lon = origin_lons[k0:k0+chunk,np.newaxis]
+            chunk_lat = origin_lats[k0:k0+chunk,np.newaxis]
+            if spherical(geod):
+                dists = sphere_dist(
+                    chunk_lon,chunk_lat,points_lon,points_lat,geod.a)
+            else:
+                shape = (chunk_lon.shape[0],points_lon.size)
+                count_geod_call('inv',np.prod(shape))
+                (_,_,dists) = geod.inv(
+                    np.broadcast_to(chunk_lon,shape).ravel(),
+                    np.broadcast_to(chunk_lat,shape).ravel(),
+                    np.broadcast_to(points_lon,shape).ravel(),
+                    np.broadcast_to(points_lat,shape).ravel())
+                dists = np.reshape(dists,shape)
+            # (as in nearest(), the first minimum in row-major order):
+            nearest_flat[k0:k0+chunk] = np.argmin(dists,axis=1)
+
+    (i,j) = np.divmod(nearest_flat,lons.shape[1])
+    if spherical(geod):
+        dist = sphere_dist(origin_lons,origin_lats,lons[i,j],lats[i,j],geod.a)
+    else:
+        count_geod_call('inv',origin_lons.size)
+        (_,_,dist) = geod.inv(origin_lons,origin_lats,lons[i,j],lats[i,j])
+        dist = np.asarray(dist)
+
+    return (
+        np.reshape(i,lon.shape),
+        np.reshape(j,lon.shape),
+        np.reshape(dist,lon.shape))
+
+
+class CellLocator:
+    """
+    Locator of the cells of a curvilinear grid that contain given lon/lat
+    points, and of the points' fractional positions within them.
+
+    Args:
+        XG, YG (numpy 2-d arrays): cell corner longitudes and latitudes (e.g.,
+            mitgrid XG, YG, of dimension (ni+1) x (nj+1) for ni x nj tracer
+            cells).
+        index (NearestIndex, optional): spatial index of XG, YG (default:
+            built from XG, YG).
+
+    Attributes:
+        index (NearestIndex): spatial index of the cell corners.
+        cart (numpy 3-d array): unit sphere cartesian coordinates of the cell
+            corners (ref. lonlat2cart).
+        cap, box (dict): bounding cap and longitude/latitude box of the grid
+            (ref. tile_extent).
+        cell_extent (float): greatest central angle (radians) between any
+            two corners of any one cell.
+
+    Raises:
+        ValueError: If input XG and YG matrix dimensions are not equal, or do
+            not match those of index.
+
+    """
+
+    def __init__( self, XG, YG, index=None):
+
+        if XG.ndim!=2 or YG.ndim!=2 or XG.shape!=YG.shape:
+            raise ValueError('XG and YG must be two-dimensional matrices of equal size.')
+        if index is None:
+            index = NearestIndex(XG,YG)
+        elif index.shape!=XG.shape:
+            raise ValueError('index and XG/YG matrix dimensions must be equal.')
+
+        self.index = index
+        self.cart = lonlat2cart(XG,YG)
+        (self.cap,self.box) = tile_extent(XG,YG)
+        (a,b,c,d) = (
+            self.cart[:-1,:-1],self.cart[1:,:-1],
+            self.cart[1:,1:],self.cart[:-1,1:])
+        self.cell_extent = float(np.nanmax([
+            cart_dist(p,q)
+            for (p,q) in ((a,b),(b,c),(c,d),(d,a),(a,c),(b,d))],initial=0.))
+
+    def locate( self, lon, lat, max_reach=32):
+        """Locate the cells containing arrays of lon/lat points.
+
+        Args:
+            lon (array-like): Longitudes of points to be located.
+            lat (array-like): Latitudes of points to be located (same shape
+                as lon).
+            max_reach (int): maximum number of cells, in either direction,
+                from each point's nearest corner within which containing
+                cells are sought (default=32).
+
+        Returns:
+            (i,j,s,t) tuple of numpy arrays, of the same shape as lon, of
+            zeros-based row and column indices of the containing cells (-1 if
+            none), and of fractional positions within them (NaN if none), such
+            that cell corners (i,j), (i+1,j), (i+1,j+1) and (i,j+1) are at
+            (s,t) = (0,0), (1,0), (1,1) and (0,1), respectively.
+
+        Raises:
+            ValueError: If lon and lat shapes are not equal.
+
+        Note:
+            Points outside the grid's bounding cap or box, or farther from
+            their nearest corner (ref. NearestIndex.query_many) than
+            cell_extent, are not in any cell, and are not sought any further.
+            For the others, candidate cells are the (up to) four that share
+            the nearest corner and, for any points not contained by these
+            (e.g., in highly elongated cells), those within successively
+            doubled reaches of it, up to max_reach. Candidates are tested in
+            chunks of at most config.LOCATE_CHUNK_SIZE (point,cell) pairs, in
+            the gnomonic projection onto each cell's tangent plane, in which
+            the cell's great circle edges are straight lines. Points on shared
+            edges are assigned to the first containing cell in row-major
+            order.
+
+        """
+
+        (lon,lat) = (np.asarray(lon,dtype=float),np.asarray(lat,dtype=float))
+        if lon.shape!=lat.shape:
+            raise ValueError('lon and lat must be of equal shape.')
+
+        (lon_flat,lat_flat) = (np.ravel(lon),np.ravel(lat))
+        pts = np.reshape(lonlat2cart(
+            np.reshape(lon_flat,(1,-1)),np.reshape(lat_flat,(1,-1))),(-1,3))
+
+        i = np.full(pts.shape[0],-1,dtype=np.int64)
+        j = np.full(pts.shape[0],-1,dtype=np.int64)
+        s = np.full(pts.shape[0],np.nan)
+        t = np.full(pts.shape[0],np.nan)
+
+        # points within the grid's bounding cap and box, and their nearest
+        # corners:
+        center = lonlat2cart(
+            np.array([[self.cap['lon']]]),np.array([[self.cap['lat']]]))[0,0]
+        with np.errstate(invalid='ignore'):
+            pending = np.flatnonzero(
+                (lat_flat>=self.box['lat_min']) &
+                (lat_flat<=self.box['lat_max']) &
+                (np.mod(lon_flat-self.box['lon_min'],360.) <=
+                    self.box['lon_max']-self.box['lon_min']) &
+                (np.degrees(cart_dist(pts,center))<=self.cap['radius']))
+        nearest_corners = np.full((pts.shape[0],2),-1,dtype=np.int64)
+        (nearest_corners[pending,0],nearest_corners[pending,1]) = \
+            self.index.query_many(lon_flat[pending],lat_flat[pending])
+
+        # since no point of a (convex) cell is farther from any of its corners
+        # than the cell's corners are from each other, points farther than
+        # that from their nearest corner, e.g., off the grid boundary, are in
+        # no cell at all:
+        if self.cell_extent<np.pi/2.:
+            near = cart_dist(pts[pending],self.cart[
+                nearest_corners[pending,0],nearest_corners[pending,1]]) <= \
+                self.cell_extent*(1.+1.e-9)
+            pending = pending[near]
+
+        (ni,nj) = (self.cart.shape[0]-1,self.cart.shape[1]-1)
+        reach = 1
+        while pending.size and reach<=max_reach:
+            # candidate cells (k,c) within reach cells of each pending point's
+            # nearest corner:
+            (di,dj) = np.meshgrid(
+                np.arange(-reach,reach),np.arange(-reach,reach),indexing='ij')
+            found_any = np.zeros(pending.size,dtype=bool)
+            chunk = max(1,config.LOCATE_CHUNK_SIZE//di.size)
+            for k0 in range(0,pending.size,chunk):
+                block = pending[k0:k0+chunk]
+                cand_i = nearest_corners[block,0,np.newaxis]+np.ravel(di)
+                cand_j = nearest_corners[block,1,np.newaxis]+np.ravel(dj)
+                valid = (cand_i>=0) & (cand_i<ni) & (cand_j>=0) & (cand_j<nj)
+                (inside,cand_s,cand_t) = self._cell_coords(
+                    pts[block],np.clip(cand_i,0,ni-1),np.clip(cand_j,0,nj-1))
+                inside &= valid
+                found = np.any(inside,axis=1)
+                first = np.argmax(inside,axis=1)[found]
+                located = block[found]
+                i[located] = cand_i[found,first]
+                j[located] = cand_j[found,first]
+                s[located] = cand_s[found,first]
+                t[located] = cand_t[found,first]
+                found_any[k0:k0+chunk] = found
+            pending = pending[~found_any]
+            reach *= 2
+
+        return (
+            np.reshape(i,lon.shape),
+            np.reshape(j,lon.shape),
+            np.reshape(s,lon.shape),
+            np.reshape(t,lon.shape))
+
+    def _cell_coords( self, pts, cell_i, cell_j, iterations=8):
+        """Containment test, and fractional (s,t) coordinates, of unit sphere
+        points pts (k x 3) with respect to candidate cells (cell_i, cell_j,
+        each k x c).
+        """
+
+        a = self.cart[cell_i  ,cell_j  ]
+        b = self.cart[cell_i+1,cell_j  ]
+        c = self.cart[cell_i+1,cell_j+1]
+        d = self.cart[cell_i  ,cell_j+1]
+        p = np.broadcast_to(pts[:,np.newaxis,:],a.shape)
+
+        # gnomonic projection onto the plane tangent to the cell "center", with
+        # in-plane coordinates relative to corner a:
+        n = a+b+c+d
+        n /= np.linalg.norm(n,axis=-1,keepdims=True)
+        e1 = (b-a)+(c-d)
+        e1 -= np.sum(e1*n,axis=-1,keepdims=True)*n
+        e1 /= np.linalg.norm(e1,axis=-1,keepdims=True)
+        e2 = np.cross(n,e1)
+        with np.errstate(invalid='ignore',divide='ignore'):
+            proj = lambda v : v/np.sum(v*n,axis=-1,keepdims=True)
+            (a,b,c,d,p_proj) = (proj(a),proj(b),proj(c),proj(d),proj(p))
+            plane = lambda v : (np.sum((v-a)*e1,axis=-1),np.sum((v-a)*e2,axis=-1))
+            ((bx,by),(cx,cy),(dx,dy),(px,py)) = \
+                (plane(b),plane(c),plane(d),plane(p_proj))
+
+            # same side of all four (directed) edges, within round-off, and in
+            # the cell's hemisphere:
+            corners = ((0.,0.),(bx,by),(cx,cy),(dx,dy))
+            sides = [
+                (x2-x1)*(py-y1)-(y2-y1)*(px-x1)
+                for ((x1,y1),(x2,y2)) in zip(corners,corners[1:]+corners[:1])]
+            tol = 1.e-12*(np.square(cx)+np.square(cy))
+            inside = \
+                (np.all([side>=-tol for side in sides],axis=0) |
+                 np.all([side<= tol for side in sides],axis=0)) & \
+                (np.sum(p*n,axis=-1)>0.)
+
+            # invert the bilinear mapping
+            #   p = a + s*(b-a) + t*(d-a) + s*t*(a-b+c-d)
+            # by Newton iteration (a = origin):
+            (ex,ey) = (cx-bx-dx,cy-by-dy)
+            s = np.full(px.shape,0.5)
+            t = np.full(px.shape,0.5)
+            for _ in range(iterations):
+                (fx,fy) = (s*bx+t*dx+s*t*ex-px,s*by+t*dy+s*t*ey-py)
+                (jsx,jsy) = (bx+t*ex,by+t*ey)
+                (jtx,jty) = (dx+s*ex,dy+s*ey)
+                det = jsx*jty-jtx*jsy
+                s = s-(jty*fx-jtx*fy)/det
+                t = t-(jsx*fy-jsy*fx)/det
+
+        return inside, s, t
+
+
+def squad_uarea( cart, out=None):
     """Compute quadrilateral surface areas for cartesian array of corner points
     on the unit sphere.
 
@@ -88,58 +1041,53 @@ def squad_uarea( cart):
         cart (numpy array): 3-d array (m x n x 3) of cartesian x,y,z corner
             points on the unit sphere (for every (i,j), (x,y,z) = (i,j,0),
             (i,j,1), (i,j,2)).
+        out (numpy array, optional): 2-d array (m-1 x n-1) into which results
+            are written (e.g., a view of a larger, preallocated array).
 
     Returns:
-        areas (numpy array): 2-d array (n-1 x m-1) of cell areas.
+        areas (numpy array): 2-d array (m-1 x n-1) of cell areas (out, if
+            provided).
 
     Note:
-        One of many possible approaches, the algorithm implemented here is based
-        on Girard's spherical excess formula, with direct calculation of angles
-        using the spherical law of cosines.  Note that, due to numerical
-        round-off, its results can be inaccurate for small angles/areas (edge
-        lengths less than roughly 5km on the scaled sphere).  In such cases,
-        pquad_uarea is recommended.
+        Each quadrilateral is split into two spherical triangles, the
+        spherical excess E of which is computed for all cells at once using
+        the Eriksson/Van Oosterom-Strackee relation,
 
-    """
-
-    # only because some geometries are poorly conditioned:
-    import warnings
-    warnings.filterwarnings("ignore")
+            tan(E/2) = |a.(b x c)| / (1 + a.b + b.c + c.a),
 
-    area = np.zeros((np.size(cart,0)-1,np.size(cart,1)-1))
+        for unit vectors a, b, c.  Unlike Girard's formula with interior angles
+        from the spherical law of cosines, this remains well-conditioned for
+        small cells, although pquad_uarea is still somewhat cheaper for edge
+        lengths less than roughly 5km on the scaled sphere.
 
-    for x_idx in np.arange(np.size(cart,0)-1):
-        for y_idx in np.arange(np.size(cart,1)-1):
-
-            # quadrilateral corners in counterclockwise direction:
-            ptA = cart[x_idx  ,y_idx  ,:]
-            ptB = cart[x_idx+1,y_idx  ,:]
-            ptC = cart[x_idx+1,y_idx+1,:]
-            ptD = cart[x_idx  ,y_idx+1,:]
+    """
 
-            # interior angles of first subtriangle:
-            at,bt,ct = ptA, ptB, ptC
-            ca,cb,cc = np.dot(bt,ct), np.dot(at,ct), np.dot(at,bt)
-            sa,sb,sc = np.sin(np.arccos(ca)), np.sin(np.arccos(cb)), np.sin(np.arccos(cc))
-            A1 = np.arccos((ca-cb*cc)/(sb*sc))
-            B1 = np.arccos((cb-ca*cc)/(sa*sc))
-            C1 = np.arccos((cc-ca*cb)/(sa*sb))
+    # quadrilateral corners in counterclockwise direction:
+    ptA = cart[ :-1, :-1,:]
+    ptB = cart[1:  , :-1,:]
+    ptC = cart[1:  ,1:  ,:]
+    ptD = cart[ :-1,1:  ,:]
 
-            # interior angles of second subtriangle:
-            at,bt,ct = ptA, ptC, ptD
-            ca,cb,cc = np.dot(bt,ct), np.dot(at,ct), np.dot(at,bt)
-            sa,sb,sc = np.sin(np.arccos(ca)), np.sin(np.arccos(cb)), np.sin(np.arccos(cc))
-            A2 = np.arccos((ca-cb*cc)/(sb*sc))
-            B2 = np.arccos((cb-ca*cc)/(sa*sc))
-            C2 = np.arccos((cc-ca*cb)/(sa*sb))
+    def excess(at,bt,ct):
+        numer = np.abs(np.sum(at*np.cross(bt,ct),axis=-1))
+        denom = 1. + np.sum(at*bt,axis=-1) + np.sum(bt*ct,axis=-1) + \
+            np.sum(ct*at,axis=-1)
+        return 2.*np.arctan2(numer,denom)
 
-            # area:
-            area[x_idx,y_idx] = A1+B1+C1 + A2+B2+C2 - 2*np.pi
+    # only because some geometries (e.g., undefined corners) are poorly
+    # conditioned:
+    with np.errstate(invalid='ignore',divide='ignore'):
+        area = excess(ptA,ptB,ptC)
+        if out is None:
+            out = area
+        else:
+            out[...] = area
+        out += excess(ptA,ptC,ptD)
 
-    return area
+    return out
 
 
-def pquad_uarea( cart):
+def pquad_uarea( cart, out=None):
     """ Compute planar quadrilateral (faceted) areas for cartesian array of
     corner points on the unit sphere.
 
@@ -147,9 +1095,12 @@ def pquad_uarea( cart):
         cart (numpy array): 3-d array (m x n x 3) of cartesian x,y,z corner
             points on the unit sphere (for every (i,j), (x,y,z) = (i,j,0),
             (i,j,1), (i,j,2)).
+        out (numpy array, optional): 2-d array (m-1 x n-1) into which results
+            are written (e.g., a view of a larger, preallocated array).
 
     Returns:
-        areas (numpy array): 2-d array (n-1 x m-1) of cell areas.
+        areas (numpy array): 2-d array (m-1 x n-1) of cell areas (out, if
+            provided).
 
     Note:
         The algorithm implemented here computes areas using edge vector cross
@@ -159,23 +1110,165 @@ def pquad_uarea( cart):
 
     """
 
-    area = np.zeros((np.size(cart,0)-1,np.size(cart,1)-1))
+    # quadrilateral corners in counterclockwise direction:
+    ptA = cart[ :-1, :-1,:]
+    ptB = cart[1:  , :-1,:]
+    ptC = cart[1:  ,1:  ,:]
+    ptD = cart[ :-1,1:  ,:]
+
+    # edge vectors:
+    ab = ptB-ptA
+    ac = ptC-ptA
+    ad = ptD-ptA
+
+    # one half the norm of the summed sub-triangle cross products:
+    normal = np.cross(ab,ac) + np.cross(ac,ad)
+    out = np.sqrt(np.sum(normal*normal,axis=-1),out=out)
+    out *= 0.5
+
+    return out
+
+
+class Stats:
+    """
+    Geodesic call counts, and per-stage timings and memory allocations,
+    collected while active (see collect_stats()).
+
+    Args:
+        trace_memory (bool): if True, also record the peak number of bytes
+            allocated (as traced by the tracemalloc module, which is started,
+            if necessary, while collecting) by each stage.
+
+    Attributes:
+        calls (dict): pyproj.Geod method name ('inv', 'npts', 'fwd') to
+            [number of calls, number of points] list.
+        stages (dict): stage name (e.g., 'fill', 'edges', 'areas',
+            'assemble') to [number of calls, total seconds, peak bytes] list.
+            Stages may be nested, e.g., 'edges' and 'areas' within
+            'tomitgrid'.
+
+    """
+
+    def __init__( self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.calls = {}
+        self.stages = {}
+        self._frames = []
+
+    def count( self, name, npoints):
+        """Record a single geod.<name> call for npoints points."""
+        counts = self.calls.setdefault(name,[0,0])
+        counts[0] += 1
+        counts[1] += int(npoints)
+
+    def merge( self, other):
+        """Add the geodesic call counts of another Stats instance (e.g., as
+        collected in a worker process)."""
+        for (name,(ncalls,npoints)) in other.calls.items():
+            counts = self.calls.setdefault(name,[0,0])
+            counts[0] += ncalls
+            counts[1] += npoints
+
+    def __str__( self):
+        lines = ['{0:<12s}{1:>10s}{2:>14s}'.format('geod call','calls','points')]
+        for (name,(ncalls,npoints)) in sorted(self.calls.items()):
+            lines.append('{0:<12s}{1:>10d}{2:>14d}'.format(
+                name,ncalls,npoints))
+        lines.append('{0:<12s}{1:>10s}{2:>14s}{3:>14s}'.format(
+            'stage','calls','seconds','peak bytes'))
+        for (name,(ncalls,seconds,nbytes)) in self.stages.items():
+            lines.append('{0:<12s}{1:>10d}{2:>14.6f}{3:>14s}'.format(
+                name,ncalls,seconds,
+                str(nbytes) if self.trace_memory else '-'))
+        return '\n'.join(lines)
+
+
+# Stats instance currently collecting, if any:
+_active_stats = None
+
+
+def active_stats():
+    """Return the Stats instance currently collecting, or None."""
+    return _active_stats
+
+
+@contextlib.contextmanager
+def collect_stats( stats=None):
+    """Context manager within which geodesic calls and stages are recorded.
+
+    Args:
+        stats (Stats): instance to which results are added; if None, nothing
+            (further) is collected.
+
+    Yields:
+        stats: the collecting Stats instance (or None).
+
+    """
+    global _active_stats
+    if stats is None:
+        yield None
+        return
+    (previous,_active_stats) = (_active_stats,stats)
+    started_tracing = stats.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        yield stats
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _active_stats = previous
 
-    for x_idx in np.arange(np.size(cart,0)-1):
-        for y_idx in np.arange(np.size(cart,1)-1):
 
-            # quadrilateral corners in counterclockwise direction:
-            ptA = cart[x_idx  ,y_idx  ,:]
-            ptB = cart[x_idx+1,y_idx  ,:]
-            ptC = cart[x_idx+1,y_idx+1,:]
-            ptD = cart[x_idx  ,y_idx+1,:]
+def count_geod_call( name, npoints):
+    """Record a geod.<name> call for npoints points, if collecting stats."""
+    if _active_stats is not None:
+        _active_stats.count(name,npoints)
 
-            # edge vectors:
-            ab = ptB-ptA
-            ac = ptC-ptA
-            ad = ptD-ptA
 
-            area[x_idx,y_idx] = 0.5 * np.linalg.norm(np.cross(ab,ac)+np.cross(ac,ad))
+@contextlib.contextmanager
+def stage( name):
+    """Context manager that records the elapsed time, and (if traced) the peak
+    memory allocation, of a named stage, if collecting stats."""
+    stats = _active_stats
+    if stats is None:
+        yield
+        return
+    trace = stats.trace_memory and tracemalloc.is_tracing()
+    if trace:
+        # carry the peak so far over to any enclosing stage before resetting:
+        (current,peak) = tracemalloc.get_traced_memory()
+        if stats._frames:
+            stats._frames[-1][1] = max(stats._frames[-1][1],peak)
+        tracemalloc.reset_peak()
+        stats._frames.append([current,current])
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter()-start
+        nbytes = 0
+        if trace:
+            (base,peak) = stats._frames.pop()
+            peak = max(peak,tracemalloc.get_traced_memory()[1])
+            nbytes = peak-base
+            if stats._frames:
+                stats._frames[-1][1] = max(stats._frames[-1][1],peak)
+            tracemalloc.reset_peak()
+        record = stats.stages.setdefault(name,[0,0.,0])
+        record[0] += 1
+        record[1] += seconds
+        record[2] = max(record[2],nbytes)
 
-    return area
 
+def staged( name):
+    """Function decorator equivalent of stage()."""
+    def decorator( func):
+        @functools.wraps(func)
+        def wrapper( *args, **kwargs):
+            if _active_stats is None:
+                return func(*args,**kwargs)
+            with stage(name):
+                return func(*args,**kwargs)
+        return wrapper
+    return decorator